@@ -48,6 +48,37 @@ argparser.add_argument(
     action='store_true',
     help="Use stack only; default is registers"
 )
+argparser.add_argument(
+    '-O', '--optimize',
+    default=0,
+    type=int,
+    choices=[0, 1],
+    help="Optimization level; default is 0"
+)
+argparser.add_argument(
+    '-i', '--inline',
+    default=False,
+    action='store_true',
+    help="Inline calls to small non-recursive functions"
+)
+argparser.add_argument(
+    '-D', '--display',
+    default=False,
+    action='store_true',
+    help="Find outer frames through a display instead of static links"
+)
+argparser.add_argument(
+    '-R', '--register-arguments',
+    default=False,
+    action='store_true',
+    help="Pass the first six arguments in registers, as by System V"
+)
+argparser.add_argument(
+    '-a', '--allocator',
+    default='graph-coloring',
+    choices=['graph-coloring', 'linear-scan'],
+    help="Register allocator; default is graph-coloring"
+)
 
 args = argparser.parse_args()
 
@@ -5,11 +5,17 @@ from dataclasses import dataclass
 
 import src.phase.code_generation_register
 import src.phase.code_generation_stack
+import src.phase.constant_folding
 import src.phase.emit
+import src.phase.inlining
 import src.phase.lexer
 import src.phase.allocator
+import src.phase.linear_scan
+import src.phase.loop_invariant
 import src.phase.parser
+import src.phase.strength_reduction
 import src.phase.symbol_collection
+import src.phase.symbol_resolution
 import src.phase.syntactic_desugaring
 import src.printer.ast_printer as ast_printer
 import src.printer.symbol_printer as Symbol_printer
@@ -32,6 +38,12 @@ class PandaCompiler:
     file: str
     runTests: bool
     run: bool
+    stack: bool
+    allocator: str
+    optimize: int
+    inline: bool
+    display: bool
+    register_arguments: bool
     """
 
     args: argparse.Namespace
@@ -46,6 +58,7 @@ class PandaCompiler:
         else:
             user_program = input()
 
+        src.phase.lexer.lexer.lineno = 1
         src.phase.parser.parser.parse(
             user_program,
             lexer=src.phase.lexer.lexer
@@ -53,29 +66,57 @@ class PandaCompiler:
 
         the_program_ast = interfacing_parser.the_program
 
+        # Ownership of the IR is passed from phase to phase. Copies are
+        # only made when the debug printers need the earlier snapshots.
+        in_place = not self.args.debug
+
         symbol_table_incorporator = src.phase.symbol_collection.ASTSymbolIncorporator()
         symbol_collection_ir = symbol_table_incorporator.build_symbol_table(
-            the_program_ast)
+            the_program_ast, in_place)
 
         desugared_ast = src.phase.syntactic_desugaring.ASTSyntacticDesugar()
-        desugared_ir = desugared_ast.desugar_AST(symbol_collection_ir)
+        desugared_ir = desugared_ast.desugar_AST(symbol_collection_ir, in_place)
+
+        symbol_resolver = src.phase.symbol_resolution.ASTSymbolResolver()
+        desugared_ir = symbol_resolver.resolve_symbols(desugared_ir, in_place=True)
+
+        # The desugared tree is rendered by the debug printers, so the
+        # optimisations below only rewrite it when no snapshot is kept
+        optimized_ir = desugared_ir
+
+        if self.args.inline:
+            inliner = src.phase.inlining.ASTInliner()
+            optimized_ir = inliner.inline_functions(optimized_ir, in_place)
+
+        if self.args.optimize >= 1:
+            constant_folder = src.phase.constant_folding.ASTConstantFolder()
+            optimized_ir = constant_folder.fold_constants(optimized_ir, in_place)
 
         code_emitter = src.phase.emit.Emit()
         code = None
 
         if self.args.stack:
-            code_generation_stack = src.phase.code_generation_stack.GenerateCodeStack()
-            code_generation_stack.generate_code(desugared_ir)
-            stack_program_code = code_generation_stack.get_code()
+            code_generation_stack = src.phase.code_generation_stack.GenerateCodeStack(display=self.args.display)
+            code_generation_stack.generate_code(optimized_ir, in_place=True)
+            stack_program_code = code_generation_stack.get_code(in_place=True)
             code = stack_program_code
             assembly_code = code_emitter.emit(code)
         else:
-            code_generation_register = src.phase.code_generation_register.GenerateCodeRegister()
-            code_generation_register.generate_code(desugared_ir)
-            register_program_code = code_generation_register.get_code()
-            allocator = src.phase.allocator.Allocator()
+            code_generation_register = src.phase.code_generation_register.GenerateCodeRegister(
+                display=self.args.display, register_arguments=self.args.register_arguments)
+            code_generation_register.generate_code(optimized_ir, in_place=True)
+            register_program_code = code_generation_register.get_code(in_place=True)
+            if self.args.optimize >= 1:
+                loop_invariant = src.phase.loop_invariant.LoopInvariantCodeMotion()
+                register_program_code = loop_invariant.hoist_invariants(register_program_code, in_place=True)
+                strength_reducer = src.phase.strength_reduction.StrengthReducer()
+                register_program_code = strength_reducer.reduce_strength(register_program_code, in_place=True)
+            if self.args.allocator == "linear-scan":
+                allocator = src.phase.linear_scan.LinearScanAllocator()
+            else:
+                allocator = src.phase.allocator.Allocator()
             register_program_code = allocator.perform_register_allocation(
-                register_program_code)
+                register_program_code, in_place=True)
             code = register_program_code
             assembly_code = code_emitter.emit(code)
 
@@ -116,4 +157,4 @@ class PandaCompiler:
             else:
                 with open(f"{output}.register.iloc", 'w') as f:
                     pp = pprint.PrettyPrinter(stream=f)
-                    pp.pprint(register_program_code)
+                    pp.pprint(register_program_code.instructions)
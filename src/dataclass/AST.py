@@ -1,51 +1,67 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
+import src.dataclass.symbol as dataclass_symbol
 from src.enums.code_generation_enum import Op
 
 
+def annotation():
+    """Slot for information attached to a node by a later phase.
+
+    Annotations are not part of the constructor, the representation
+    or the comparison of a node.
+    """
+
+    return field(default=None, init=False, repr=False, compare=False)
+
+
+@dataclass(slots=True)
 class AstNode:
     """Structural node of AST produced by the parser.
+
+    Nodes use slots, so every annotation attached by a phase
+    must be declared on the node class.
     """
 
-    pass
+    dotnum: str = annotation()
 
 
-@dataclass
+@dataclass(slots=True)
 class Body(AstNode):
     decls: DeclarationList
     stm_list: StatementList
     lineno: int
+    variable_offset: int = annotation()
+    number_of_variables: int = annotation()
 
 
-@dataclass
-class DeclarationList:
-    decl: Declaration
-    next: DeclarationList
+@dataclass(slots=True)
+class DeclarationList(AstNode):
+    decls: list[Declaration]
     lineno: int
 
 
-@dataclass
+@dataclass(slots=True)
 class Declaration(AstNode):
     pass
 
 
-@dataclass
+@dataclass(slots=True)
 class DeclarationFunction(Declaration):
     type: str
     func: Function
     lineno: int
 
 
-@dataclass
+@dataclass(slots=True)
 class DeclarationVariableList(Declaration):
     type: str
     var_lst: VariableList
     lineno: int
 
 
-@dataclass
+@dataclass(slots=True)
 class DeclarationVariableInit(Declaration):
     type: str
     name: str
@@ -54,115 +70,133 @@ class DeclarationVariableInit(Declaration):
 
 
 class Symbol(AstNode):
-    pass
+    __slots__ = ()
 
 
-@dataclass
+@dataclass(slots=True)
 class VariableList(Symbol):
-    name: str
-    next: VariableList
+    names: list[str]
     lineno: int
 
 
-@dataclass
+@dataclass(slots=True)
 class Function(Symbol):
     name: str
     par_list: ParameterList
     body: Body
     lineno: int
+    symbol_table: dataclass_symbol.SymbolTable = annotation()
+    number_of_parameters: int = annotation()
+    start_label: str = annotation()
+    end_label: str = annotation()
+    tail_label: str = annotation()
+    captured: bool = annotation()
+    static_link: bool = annotation()
+    register_arguments: bool = annotation()
 
 
-@dataclass
+@dataclass(slots=True)
 class Parameter(Symbol):
     type: str
     name: str
     lineno: int
 
 
-@dataclass
+@dataclass(slots=True)
 class ParameterList(AstNode):
-    param: Parameter
-    next: ParameterList
+    params: list[Parameter]
     lineno: int
 
 
-@dataclass
+@dataclass(slots=True)
 class StatementList(AstNode):
-    stm: Statement
-    next: StatementList
+    stms: list[Statement]
     lineno: int
 
 
 class Statement(AstNode):
-    pass
+    __slots__ = ()
 
 
-@dataclass
+@dataclass(slots=True)
 class StatementAssignment(Statement):
     lhs: str
     rhs: Expression
     lineno: int
+    binding: tuple[dataclass_symbol.Symbol, int] = annotation()
 
 
-@dataclass
+@dataclass(slots=True)
 class StatementIfthenelse(Statement):
     exp: Expression
     then_part: Body
     else_part: Body
     lineno: int
+    symbol_table_then: dataclass_symbol.SymbolTable = annotation()
+    symbol_table_else: dataclass_symbol.SymbolTable = annotation()
+    else_label: str = annotation()
+    esle_label: str = annotation()
 
 
-@dataclass
+@dataclass(slots=True)
 class StatementWhile(Statement):
     exp: Expression
     body: Body
     lineno: int
+    symbol_table: dataclass_symbol.SymbolTable = annotation()
+    while_label: str = annotation()
+    elihw_label: str = annotation()
 
 
-@dataclass
+@dataclass(slots=True)
 class StatementFor(Statement):
     iter: DeclarationVariableInit
     exp: Expression
     assign: StatementAssignment
     body: Body
     lineno: int
+    symbol_table: dataclass_symbol.SymbolTable = annotation()
+    init: StatementAssignment = annotation()
+    for_label: str = annotation()
+    rof_label: str = annotation()
 
 
-@dataclass
+@dataclass(slots=True)
 class StatementPrint(Statement):
     exp: Expression
     lineno: int
 
 
-@dataclass
+@dataclass(slots=True)
 class StatementReturn(Statement):
     exp: Expression
     lineno: int
 
 
 class Expression(AstNode):
-    pass
+    __slots__ = ()
 
 
-@dataclass
+@dataclass(slots=True)
 class ExpressionIdentifier(Expression):
     identifier: str
     lineno: int
+    binding: tuple[dataclass_symbol.Symbol, int] = annotation()
 
 
-@dataclass
+@dataclass(slots=True)
 class ExpressionInteger(Expression):
     integer: int
     lineno: int
 
 
-@dataclass
+@dataclass(slots=True)
 class ExpressionFloat(Expression):
     float: float
     lineno: int
 
 
-@dataclass
+@dataclass(slots=True)
 class ExpressionBinop(Expression):
     op: Op
     lhs: Expression
@@ -170,15 +204,15 @@ class ExpressionBinop(Expression):
     lineno: int
 
 
-@dataclass
+@dataclass(slots=True)
 class ExpressionCall(Expression):
     name: str
     exp_list: ExpressionList
     lineno: int
+    binding: tuple[dataclass_symbol.Symbol, int] = annotation()
 
 
-@dataclass
-class ExpressionList:
-    exp: Expression
-    next: ExpressionList
+@dataclass(slots=True)
+class ExpressionList(AstNode):
+    exps: list[Expression]
     lineno: int
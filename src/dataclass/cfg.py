@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+
+from src.dataclass.iloc import Instruction, Operand, Target
+from src.enums.code_generation_enum import Meta, Op
+
+JUMPS = [Op.JE, Op.JNE, Op.JL, Op.JG, Op.JGE, Op.JLE, Op.JMP]
+
+
+@dataclass(slots=True)
+class BasicBlock:
+    """Maximal sequence of instructions with a single entry and exit
+
+    Blocks start at a label or after a jump, and end with a jump, a
+    return or right before the next label. Edges are block indices.
+    `live_in` and `live_out` are register bitsets set by liveness analysis.
+    """
+
+    index: int
+    instructions: list[Instruction] = field(default_factory=list)
+    succ: list[int] = field(default_factory=list)
+    pred: list[int] = field(default_factory=list)
+    live_in: int = field(default=None, repr=False, compare=False)
+    live_out: int = field(default=None, repr=False, compare=False)
+
+    def def_use(self) -> tuple[set[int], set[int]]:
+        """Registers defined in the block, and registers
+        used before being defined in it.
+        """
+
+        defs, uses = set(), set()
+
+        for ins in reversed(self.instructions):
+            ins_defs, ins_uses = ins.def_use()
+            defs.update(ins_defs)
+            uses.difference_update(ins_defs)
+            uses.update(ins_uses)
+
+        return defs, uses
+
+
+def _bits(registers: set[int], index: dict[int, int]) -> int:
+    bits = bytearray(len(index) // 8 + 1)
+
+    for reg in registers:
+        if (i := index.get(reg)) is not None:
+            bits[i >> 3] |= 1 << (i & 7)
+
+    return int.from_bytes(bits, "little")
+
+
+def registers(bits: int, names: list[int]) -> set[int]:
+    """Decode a liveness bitset into registers, given
+    the names returned by `ControlFlowGraph.liveness`.
+    """
+
+    registers = set()
+
+    while bits:
+        lowest = bits & -bits
+        registers.add(names[lowest.bit_length() - 1])
+        bits ^= lowest
+
+    return registers
+
+
+@dataclass
+class ControlFlowGraph:
+    """Basic-block control-flow graph of a single scope
+
+    Block 0 is the entry. Jumps to labels outside of the scope
+    leave the graph.
+
+    The API exposes `build`, `edges`, `reverse_postorder`, `dominators`,
+    `loops`, `loop_depths` and `liveness`.
+    """
+
+    blocks: list[BasicBlock] = field(default_factory=list)
+    labels: dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, code: list[Instruction]) -> ControlFlowGraph:
+        """Split `code` into basic blocks and connect them.
+        """
+
+        cfg = cls()
+        block = None
+
+        for ins in code:
+            if block is None or ins.opcode == Op.LABEL:
+                block = BasicBlock(len(cfg.blocks))
+                cfg.blocks.append(block)
+
+            if ins.opcode == Op.LABEL:
+                cfg.labels[ins.args[0].target.val] = block.index
+
+            block.instructions.append(ins)
+
+            if ins.opcode in JUMPS or (ins.opcode == Op.META and ins.args[0] == Meta.RET):
+                block = None
+
+        if not cfg.blocks:
+            cfg.blocks.append(BasicBlock(0))
+
+        for block in cfg.blocks:
+            match block.instructions[-1:]:
+                case [Instruction(opcode=Op.META, args=(Meta.RET, ))]:
+                    successors = []
+                case [Instruction(opcode=Op.JMP, args=(Operand(target=Target(val=label)), ))]:
+                    successors = [cfg.labels.get(label)]
+                case [Instruction(opcode=op, args=(Operand(target=Target(val=label)), ))] if op in JUMPS:
+                    successors = [cfg.labels.get(label), block.index + 1]
+                case _:
+                    successors = [block.index + 1]
+
+            for succ in successors:
+                if succ is not None and succ < len(cfg.blocks) and succ not in block.succ:
+                    block.succ.append(succ)
+                    cfg.blocks[succ].pred.append(block.index)
+
+        return cfg
+
+    def edges(self) -> list[tuple[int, int]]:
+        return [(block.index, succ) for block in self.blocks for succ in block.succ]
+
+    def reverse_postorder(self) -> list[int]:
+        """Blocks reachable from the entry in reverse postorder.
+        """
+
+        order = []
+        visited = {0}
+        stack = [(0, iter(self.blocks[0].succ))]
+
+        while stack:
+            index, successors = stack[-1]
+            for succ in successors:
+                if succ not in visited:
+                    visited.add(succ)
+                    stack.append((succ, iter(self.blocks[succ].succ)))
+                    break
+            else:
+                stack.pop()
+                order.append(index)
+
+        order.reverse()
+        return order
+
+    def dominators(self) -> list[int]:
+        """Immediate dominator of every block.
+
+        Computed iteratively over the reverse postorder, as described by
+        Cooper, Harvey and Kennedy. The entry is its own immediate
+        dominator, and unreachable blocks have None.
+        """
+
+        order = self.reverse_postorder()
+        position = {index: i for i, index in enumerate(order)}
+        idom = [None] * len(self.blocks)
+        idom[0] = 0
+
+        def intersect(a: int, b: int) -> int:
+            while a != b:
+                while position[a] > position[b]:
+                    a = idom[a]
+                while position[b] > position[a]:
+                    b = idom[b]
+            return a
+
+        changed = True
+        while changed:
+            changed = False
+            for index in order[1:]:
+                preds = [pred for pred in self.blocks[index].pred
+                         if idom[pred] is not None]
+                new_idom = preds[0]
+                for pred in preds[1:]:
+                    new_idom = intersect(pred, new_idom)
+                if idom[index] != new_idom:
+                    idom[index] = new_idom
+                    changed = True
+
+        return idom
+
+    def dominates(self, idom: list[int], a: int, b: int) -> bool:
+        """Whether block `a` dominates block `b`, given the
+        immediate dominators computed by `dominators`.
+        """
+
+        if idom[b] is None:
+            return False
+
+        while b != a:
+            if b == 0:
+                return False
+            b = idom[b]
+
+        return True
+
+    def loops(self) -> dict[int, set[int]]:
+        """Blocks of the natural loop of every loop header.
+
+        Every back edge b -> h, where h dominates b, induces the natural
+        loop of h, i.e., h and all blocks reaching b without passing
+        through h. Loops sharing a header are merged.
+        """
+
+        idom = self.dominators()
+        loops = {}
+
+        for tail, header in self.edges():
+            if not self.dominates(idom, header, tail):
+                continue
+
+            body = loops.setdefault(header, {header})
+            stack = [tail]
+
+            while stack:
+                index = stack.pop()
+                if index not in body and idom[index] is not None:
+                    body.add(index)
+                    stack.extend(self.blocks[index].pred)
+
+        return loops
+
+    def loop_depths(self) -> list[int]:
+        """Loop nesting depth of every block, i.e., the number
+        of natural loops containing it.
+        """
+
+        depths = [0] * len(self.blocks)
+        for body in self.loops().values():
+            for index in body:
+                depths[index] += 1
+
+        return depths
+
+    def liveness(self) -> list[int]:
+        """Block-level liveness, i.e., `live_in` and `live_out`
+        of every block as bitsets.
+
+        Only registers used before being defined in some block can be
+        live across block boundaries, so the bitsets are indexed densely
+        by these global names, which are returned for decoding.
+
+        Blocks are taken from a worklist, seeded in postorder, and
+        predecessors are only revisited when `live_in` changes.
+        """
+
+        def_use = [block.def_use() for block in self.blocks]
+
+        names = sorted(set().union(*(uses for _, uses in def_use)))
+        index = {reg: i for i, reg in enumerate(names)}
+        def_use = [(_bits(defs, index), _bits(uses, index))
+                   for defs, uses in def_use]
+
+        self._solve_liveness(def_use)
+
+        return names
+
+    def _solve_liveness(self, def_use: list[tuple[int, int]]) -> None:
+        reachable = self.reverse_postorder()
+        order = reachable + sorted(set(range(len(self.blocks))) - set(reachable))
+
+        for block in self.blocks:
+            block.live_in = 0
+            block.live_out = 0
+
+        worklist = order
+        queued = [True] * len(self.blocks)
+
+        while worklist:
+            i = worklist.pop()
+            queued[i] = False
+            block = self.blocks[i]
+            defs, uses = def_use[i]
+
+            live_out = 0
+            for succ in block.succ:
+                live_out |= self.blocks[succ].live_in
+            block.live_out = live_out
+
+            live_in = uses | (live_out & ~defs)
+            if live_in != block.live_in:
+                block.live_in = live_in
+                for pred in block.pred:
+                    if not queued[pred]:
+                        queued[pred] = True
+                        worklist.append(pred)
@@ -1,11 +1,15 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from array import array
+from dataclasses import dataclass, field
+from itertools import compress
 
-from src.enums.code_generation_enum import M, Op, T
+from src.enums.code_generation_enum import M, Meta, Op, T
 
+_ARITHMETIC = frozenset([Op.ADD, Op.SUB, Op.DIV, Op.MUL])
 
-@dataclass
+
+@dataclass(slots=True)
 class Operand:
     """Single operand layout
     """
@@ -14,7 +18,7 @@ class Operand:
     addressing: Mode
 
 
-@dataclass
+@dataclass(slots=True)
 class Target:
     """Targeted register class
     """
@@ -23,7 +27,7 @@ class Target:
     val: str = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Mode:
     """Addressing mode, i.e, direct and indirect relative
     """
@@ -32,7 +36,7 @@ class Mode:
     offset: int = None
 
 
-@dataclass(init=False)
+@dataclass(init=False, slots=True)
 class Instruction:
     """Linear IR ILOC instruction scheme
 
@@ -48,3 +52,154 @@ class Instruction:
     def __init__(self, *args) -> Instruction:
         self.opcode = args[0]
         self.args = args[1:]
+
+    def def_use(self) -> tuple[tuple[int, ...], tuple[int, ...]]:
+        """Virtual registers defined and used by the instruction.
+
+        Returns
+        -------
+        (defs, uses) : tuple[tuple[int, ...], tuple[int, ...]]
+        """
+
+        # Plain attribute tests instead of class patterns, since this
+        # is evaluated for every instruction by the dataflow analyses
+        args = self.args
+
+        if not args or not isinstance(args[0], Operand):
+            # Registers passed to a callee, or received from a caller
+            if args and args[0] is Meta.ARGUMENTS:
+                return (), tuple(arg.target.val for arg in args[1:])
+            if args and args[0] is Meta.PARAMETERS:
+                return tuple(arg.target.val for arg in args[1:]), ()
+            return (), ()
+
+        first = args[0].target
+        first_reg = first.spec is T.REG
+
+        if len(args) == 1:
+            return ((), (first.val, )) if first_reg else ((), ())
+
+        second = args[1].target
+
+        if second.spec is T.REG:
+            uses = (first.val, second.val) if first_reg else (second.val, )
+            # Stores through a register only read it
+            if args[1].addressing.mode is not M.DIR:
+                return (), uses
+            if self.opcode is Op.MOVE:
+                return (second.val, ), uses[:-1]
+            if self.opcode in _ARITHMETIC:
+                return (second.val, ), uses
+            return (), uses
+
+        return ((), (first.val, )) if first_reg else ((), ())
+
+
+@dataclass(slots=True)
+class InstructionBuffer:
+    """Flat linear ILOC code with scope boundaries as index ranges
+
+    Instructions are stored once, in emission order. Every scope, i.e.,
+    function, is the half-open index range [start, end) of the buffer,
+    and nested scopes are subranges of their parent. `owner` maps every index to the innermost scope it belongs to,
+    such that the instructions of a single scope can be recovered without
+    the nested lists used previously.
+
+    Scope 0 is the outermost scope. Scopes are numbered in the order
+    they are opened, thus a parent always precedes its children.
+    """
+
+    instructions: list[Instruction] = field(default_factory=list)
+    owner: array = field(default_factory=lambda: array("l"))
+    start: array = field(default_factory=lambda: array("l"))
+    end: array = field(default_factory=lambda: array("l"))
+    parent: array = field(default_factory=lambda: array("l"))
+    _open: list[int] = field(default_factory=list, repr=False)
+
+    def open_scope(self) -> int:
+        scope = len(self.start)
+        self.start.append(len(self.instructions))
+        self.end.append(-1)
+        self.parent.append(self._open[-1] if self._open else -1)
+        self._open.append(scope)
+        return scope
+
+    def close_scope(self) -> None:
+        self.end[self._open.pop()] = len(self.instructions)
+
+    def append(self, instruction: Instruction) -> None:
+        self.instructions.append(instruction)
+        self.owner.append(self._open[-1])
+
+    def extend(self, instructions: list[Instruction]) -> None:
+        for instruction in instructions:
+            self.append(instruction)
+
+    def scopes(self) -> range:
+        return range(len(self.start))
+
+    def scope_range(self, scope: int) -> range:
+        return range(self.start[scope], self.end[scope])
+
+    def scope(self, scope: int) -> list[Instruction]:
+        """Instructions owned by `scope`, excluding nested scopes.
+        """
+
+        start, end = self.start[scope], self.end[scope]
+        return list(compress(self.instructions[start:end],
+                             [owner == scope for owner in self.owner[start:end]]))
+
+    def scope_indices(self, scope: int) -> list[int]:
+        """Buffer indices of the instructions owned by `scope`.
+        """
+
+        return [i for i in self.scope_range(scope) if self.owner[i] == scope]
+
+    def expand(self, replacements: dict[int, list[Instruction]]) -> None:
+        """Replace single instructions by sequences of instructions,
+        e.g., to insert spill code around them.
+
+        Every sequence is owned by the scope of the instruction it
+        replaces, and scope ranges are shifted accordingly.
+        """
+
+        if not replacements:
+            return
+
+        instructions, owner = [], array("l")
+        position = array("l", [0]) * (len(self.instructions) + 1)
+
+        for i, instruction in enumerate(self.instructions):
+            position[i] = len(instructions)
+            sequence = replacements.get(i, (instruction, ))
+            instructions.extend(sequence)
+            owner.extend([self.owner[i]] * len(sequence))
+
+        position[-1] = len(instructions)
+
+        self.instructions, self.owner = instructions, owner
+        self.start = array("l", (position[i] for i in self.start))
+        self.end = array("l", (position[i] for i in self.end))
+
+    def __len__(self) -> int:
+        return len(self.instructions)
+
+    def __iter__(self):
+        return iter(self.instructions)
+
+    def __getitem__(self, index: int or slice) -> Instruction or list[Instruction]:
+        return self.instructions[index]
+
+    def __setitem__(self, index: int or slice, value: Instruction or list[Instruction]) -> None:
+        """Rewrite instructions in place.
+
+        Replacing a slice must preserve its length, such that
+        scope ranges and ownership remain valid.
+        """
+
+        if isinstance(index, slice):
+            value = list(value)
+            if len(range(*index.indices(len(self.instructions)))) != len(value):
+                raise ValueError("Slice rewrite must preserve the length.")
+
+        self.instructions[index] = value
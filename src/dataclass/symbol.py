@@ -27,9 +27,10 @@ class SymbolTable:
     parent: SymbolTable
     _tab: dict
 
-    def __init__(self, parent: SymbolTable) -> SymbolTable:
+    def __init__(self, parent: SymbolTable, block: bool = False) -> SymbolTable:
         self._tab = {}
-        self.level = parent.level + 1 if parent else 0
+        # Blocks share the frame, and thus the level, of their parent
+        self.level = parent.level + (not block) if parent else 0
         self.parent = parent
 
     def __str__(self):
@@ -50,9 +51,17 @@ class SymbolTable:
 
         self._tab[signature] = value
 
+    def items(self) -> list[tuple[Any, Symbol]]:
+        """Symbols declared directly in this scope.
+        """
+
+        return list(self._tab.items())
+
     def lookup(self, signature: Any) -> tuple(Symbol, int):
         """Retrieves declared symbol from closest accessible lexical scope.
 
+        The scope chain is only walked until the symbol is found.
+
         Returns
         -------
         (Symbol, level) : tuple(Symbol, int)
@@ -60,18 +69,10 @@ class SymbolTable:
             otherwise the located symbol.
         """
 
-        if self.parent:
-            symval = (
-                self._tab.get(
-                    signature,
-                    self.parent.lookup(signature)
-                ),
-                self.level
-            )
-            
-            if isinstance(symval[0], Symbol):
-                return symval
-            else:
-                return symval[0]
-            
-        return (self._tab.get(signature), self.level)
\ No newline at end of file
+        scope = self
+        while scope:
+            if symbol := scope._tab.get(signature):
+                return (symbol, scope.level)
+            scope = scope.parent
+
+        return (None, 0)
\ No newline at end of file
@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class Instruction:
+    """Single x86-64 instruction in AT&T syntax
+
+    Operands are kept as their assembly text, e.g.,
+    `%rbx`, `$8` or `-16(%rbp)`.
+    """
+
+    mnemonic: str
+    operands: tuple[str, ...] = ()
+
+
+@dataclass(slots=True)
+class Label:
+    """Label marking the next instruction
+    """
+
+    name: str
+
+
+@dataclass(slots=True)
+class Directive:
+    """Assembler directive, or a blank line if `text` is empty
+    """
+
+    text: str
+    indent: bool = False
+
+
+Line = Instruction or Label or Directive
+
+
+def is_register(operand: str) -> bool:
+    return operand.startswith("%")
+
+
+def is_memory(operand: str) -> bool:
+    return operand.endswith(")")
+
+
+def is_blank(line: Line) -> bool:
+    return isinstance(line, Directive) and not line.text
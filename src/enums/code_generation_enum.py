@@ -48,6 +48,7 @@ class T(Enum):
     RSP = auto()  # register: stack pointer
     RRT = auto()  # register: return value
     RSL = auto()  # register: static link computation
+    DSP = auto()  # memory: display entry of a nesting level
     REG = auto()  # general-purpose registers
 
 
@@ -61,3 +62,5 @@ class Meta(Enum):
     PRECALL = auto()
     POSTRETURN = auto()
     RET = auto()
+    ARGUMENTS = auto()  # arguments passed in registers
+    PARAMETERS = auto()  # parameters received in registers
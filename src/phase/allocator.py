@@ -1,8 +1,14 @@
 import copy
 from collections import defaultdict
 
-from src.dataclass.iloc import Instruction, Operand, Target
-from src.enums.code_generation_enum import Op, T
+import src.phase.emit
+from src.dataclass.cfg import ControlFlowGraph, registers
+from src.dataclass.iloc import Instruction, InstructionBuffer, Mode, Operand, Target
+from src.enums.code_generation_enum import M, Meta, Op, T
+
+# Instructions whose only effect is the definition of their target.
+# Division is kept even if its quotient is dead, since it may trap
+PURE = [Op.MOVE, Op.ADD, Op.SUB, Op.MUL]
 
 
 class Allocator:
@@ -10,232 +16,313 @@ class Allocator:
         constructing an interference graph, graph coloring and assigning 
         colors to instructions.
 
+        Graphs are coloured by Chaitin-Briggs with as many colours as
+        Emit has allocatable registers. Registers that cannot be
+        coloured are spilled to the frame by ILOC spill code, and the
+        scope is allocated again. Unless disabled by `coalesce`, the
+        source and target of register moves are merged conservatively
+        before colouring, such that the moves can be removed by Emit.
+
+        Unless disabled by `eliminate_dead_code`, functions that are
+        never called, unreachable blocks and dead definitions are
+        removed before allocation.
+
         The API exposes `perform_register_allocation`.
     """
 
-    _labels: dict = {}
-
-    def _find_labels(self, code: list) -> None:
-        i = 0
-        length_instructions = len(code)
-        while (i < length_instructions):
-            instruction = code[i]
-            match instruction:
-                case list():
-                    self._find_labels(instruction)
-                case Instruction(opcode=Op.LABEL, args=(Operand(target=Target(val=label)), )):
-                    j = i + 1
-                    succ_instruction = None
-                    while (j < length_instructions):
-                        ins = code[j]
-                        match ins:
-                            case Instruction(args=(Operand(target=Target(spec=T.REG)), Operand())):
-                                succ_instruction = ins
-                                break
-                            case Instruction(args=(Operand(), Operand(target=Target(spec=T.REG)))):
-                                succ_instruction = ins
-                                break
-                            case Instruction(args=(Operand(target=Target(spec=T.REG)), )):
-                                succ_instruction = ins
-                                break
-                        j += 1
-                    self._labels[label] = succ_instruction
-            i += 1
-
-    def _control_flow(self, code: list) -> None:
-        def setup_linking(before, instruction: Instruction) -> None:
-            if before:
-                instruction.pred.append(before)
-                before.succ.append(instruction)
+    # Colours 1 to K are kept in registers by Emit
+    _registers_available: int = src.phase.emit.ALLOCATABLE_REGISTERS
 
-        for ins in code:
-            match ins:
-                case list():
-                    self._control_flow(ins)
-                case _:
-                    ins.pred = []
-                    ins.succ = []
-                    ins.in_ = set()
-                    ins.out = set()
-                    ins.in_prime = set()
-                    ins.out_prime = set()
-
-        before = None
-        for ins in code:
-            match ins:
-                case Instruction(args=(Operand(target=Target(spec=T.REG)), Operand())):
-                    setup_linking(before, ins)
-                    before = ins
-                case Instruction(args=(Operand(), Operand(target=Target(spec=T.REG)))):
-                    setup_linking(before, ins)
-                    before = ins
-                case Instruction(args=(Operand(target=Target(spec=T.REG)), )):
-                    setup_linking(before, ins)
-                    before = ins
-                case Instruction(opcode=op, args=(Operand(target=Target(val=label)), )) if op in [Op.JE, Op.JNE, Op.JL, Op.JG, Op.JGE, Op.JLE, Op.JMP]:
-                    node = self._labels[label]
-                    if node is not None:
-                        before.succ.append(node)
-                        node.pred.append(before)
-
-    def _live_set_changed_and_out_calc(self, ins: Instruction) -> bool:
-        change = None
-
-        for node in ins.succ:
-            ins.out = ins.out.union(node.in_)
-
-        if ins.in_prime == ins.in_ and ins.out_prime == ins.out:
-            change = False
-        else:
-            change = True
-
-        ins.in_prime = set(ins.in_)
-        ins.out_prime = set(ins.out)
-
-        return change
-
-    def _do_set_calc(self, ins: Instruction or list) -> bool:
-        matched = None
-        match ins:
-            case list():
-                self._liveness_analysis(ins)
-            case Instruction(opcode=Op.MOVE, args=(op, Operand(target=Target(spec=T.REG, val=val_def)))):
-                match op:
-                    case Operand(target=Target(spec=T.REG, val=val_use)):
-                        ins.in_.add(val_use)
-                        ins.in_ = ins.in_.union(ins.out - {val_def})
-                    case _:
-                        ins.in_ = ins.in_.union(ins.out - {val_def})
-
-                matched = ins
-            case Instruction(opcode=op, args=(Operand(target=Target(spec=T.REG, val=val1)),
-                                              Operand(target=Target(spec=T.REG, val=val2)))) if op in [Op.ADD, Op.SUB, Op.DIV, Op.MUL]:
-                ins.in_.add(val1)
-                ins.in_.add(val2)
-                ins.in_ = ins.in_.union(ins.out - {val2})
-                matched = ins
-            case Instruction(args=(Operand(target=Target(spec=T.REG, val=val1)),
-                                   Operand(target=Target(spec=T.REG, val=val2)))):
-                ins.in_.add(val1)
-                ins.in_.add(val2)
-                ins.in_ = ins.in_.union(ins.out)
-                matched = ins
-            case Instruction(args=(Operand(target=Target(spec=T.REG, val=val)), Operand())):
-                ins.in_.add(val)
-                ins.in_.union(ins.out)
-                matched = ins
-            case Instruction(args=(Operand(target=Target(spec=T.REG, val=val)), )):
-                ins.in_.add(val)
-                ins.in_ = ins.in_.union(ins.out)
-                matched = ins
-
-        if matched:
-            return self._live_set_changed_and_out_calc(matched)
-
-    def _liveness_analysis(self, code: list) -> None:
-        change = True
-
-        while (change):
-            change = False
-
-            for ins in reversed(code):
-                if self._do_set_calc(ins):
-                    change = True
-
-    def _build_graph(self, code: list, graphs: list[defaultdict] = None) -> list[defaultdict]:
-        graph = {}
-
-        if graphs is None:
-            graphs = []
+    def __init__(self, coalesce: bool = True, eliminate_dead_code: bool = True) -> None:
+        self._coalesce_moves = coalesce
+        self._eliminate_dead_code = eliminate_dead_code
 
-        for ins in code:
-            node = None
-            
-            match ins:
-                case list():
-                    self._build_graph(ins, graphs)
-                case Instruction(args=(Operand(target=Target(spec=T.REG)), Operand())):
-                    node = ins
-                case Instruction(args=(Operand(), Operand(target=Target(spec=T.REG)))):
-                    node = ins
-                case Instruction(args=(Operand(target=Target(spec=T.REG)), )):
-                    node = ins
-
-            if node:
-                for i in node.in_:
-                    if i not in graph:
-                        graph[i] = set()
-                    for j in node.in_:
-                        if i == j:
-                            continue
-                        graph[i].add(j)
-
-        graphs.append(graph)
-
-        return graphs
-
-    def _remove_node_from_graph(self, graph: defaultdict, node: int) -> None:
-        for k in graph:
-            adj = graph[k]
-            if node in adj:
-                adj.remove(node)
-
-        graph.pop(node)
-
-    def _take_graph_apart(self, graph: defaultdict) -> list:
+    def _build_graph(self, cfg: ControlFlowGraph, names: list[int]) -> dict[int, set[int]]:
+        # Only registers that are used somewhere get a node. Definitions
+        # of the others are dead, and they are removed by Emit
+        used = {reg for block in cfg.blocks for ins in block.instructions
+                for reg in ins.def_use()[1]}
+        graph = {reg: set() for reg in used}
+
+        for block in cfg.blocks:
+            live = registers(block.live_out, names)
+
+            for ins in reversed(block.instructions):
+                defs, uses = ins.def_use()
+
+                if not defs and not uses:
+                    continue
+
+                # The source of a move may share its colour with the target,
+                # unless the move loads through the source
+                source = None
+                if ins.opcode is Op.MOVE and uses and ins.args[0].addressing.mode is M.DIR:
+                    source = uses[0]
+
+                for reg in defs:
+                    if reg not in graph:
+                        continue
+                    for other in live:
+                        if other != reg and other != source:
+                            graph[reg].add(other)
+                            graph[other].add(reg)
+
+                live.difference_update(defs)
+                live.update(uses)
+
+        return graph
+
+    def _moves(self, cfg: ControlFlowGraph, graph: dict[int, set[int]], temporaries: set[int]) -> list[tuple[int, int]]:
+        moves = []
+
+        for block in cfg.blocks:
+            for ins in block.instructions:
+                match ins:
+                    case Instruction(opcode=Op.MOVE, args=(Operand(target=Target(spec=T.REG, val=source), addressing=Mode(mode=M.DIR)),
+                                                           Operand(target=Target(spec=T.REG, val=target), addressing=Mode(mode=M.DIR)))):
+                        if source in graph and target in graph and not {source, target} & temporaries:
+                            moves.append((source, target))
+
+        return moves
+
+    def _coalesce(self, graph: dict[int, set[int]], moves: list[tuple[int, int]], costs: dict[int, float]) -> dict[int, int]:
+        """Merge the source and target of moves in `graph`, and return
+        the representative of every merged register.
+
+        Registers are only merged when they do not interfere, and when
+        the merge cannot turn a colourable graph into an uncolourable
+        one. Either the merged node has fewer than K neighbours of
+        significant degree (Briggs), or every neighbour of one register
+        interferes with the other or is of insignificant degree (George).
+        """
+
+        k = self._registers_available
+        alias = {}
+
+        def find(reg: int) -> int:
+            while reg in alias:
+                reg = alias[reg]
+            return reg
+
+        def briggs(a: int, b: int) -> bool:
+            return sum(len(graph[adj]) >= k for adj in graph[a] | graph[b]) < k
+
+        def george(a: int, b: int) -> bool:
+            return all(adj in graph[b] or len(graph[adj]) < k for adj in graph[a])
+
+        changed = True
+        while changed:
+            changed = False
+
+            for source, target in moves:
+                a, b = find(source), find(target)
+
+                if a == b or b in graph[a]:
+                    continue
+                if not (briggs(a, b) or george(a, b) or george(b, a)):
+                    continue
+
+                for adj in graph.pop(b):
+                    graph[adj].discard(b)
+                    graph[adj].add(a)
+                    graph[a].add(adj)
+
+                costs[a] += costs[b]
+                alias[b] = a
+                changed = True
+
+        return {reg: find(reg) for reg in alias}
+
+    def _spill_costs(self, cfg: ControlFlowGraph, temporaries: set[int]) -> dict[int, float]:
+        """Estimated cost of keeping every register in memory, i.e.,
+        its number of uses and definitions, where every occurrence is
+        weighted by 10 to the power of its loop depth.
+
+        Temporaries introduced by spill code are never spilled again.
+        """
+
+        costs = defaultdict(float)
+
+        for block, depth in zip(cfg.blocks, cfg.loop_depths()):
+            weight = 10 ** depth
+            for ins in block.instructions:
+                defs, uses = ins.def_use()
+                for reg in defs + uses:
+                    costs[reg] += weight
+
+        for reg in temporaries:
+            costs[reg] = float("inf")
+
+        return costs
+
+    def _simplify(self, graph: dict[int, set[int]], costs: dict[int, float]) -> list[int]:
+        k = self._registers_available
+        degree = {node: len(adj) for node, adj in graph.items()}
+        low = sorted((node for node, d in degree.items() if d < k), reverse=True)
+        remaining = set(graph)
         stack = []
 
-        while (graph):
-            found = None
-            for node, adj in graph.items():
-                if len(adj) < 10:
-                    found = (node, set(adj))
-                    break
+        while remaining:
+            if low:
+                node = low.pop()
+            else:
+                # Optimistically push the cheapest spill candidate,
+                # it may still receive a colour during select
+                node = min(remaining, key=lambda node: (costs[node] / len(graph[node]), node))
 
-            if not found:
-                # Pick random
-                found = list(graph.items())[0]
+            remaining.remove(node)
+            stack.append(node)
 
-            stack.append(found)
-            self._remove_node_from_graph(graph, found[0])
+            for adj in graph[node]:
+                if adj in remaining:
+                    degree[adj] -= 1
+                    if degree[adj] == k - 1:
+                        low.append(adj)
 
         return stack
 
-    def _assign_colors(self, stack: list, colors: dict) -> dict:
-        graph = defaultdict(set)
+    def _preferences(self, cfg: ControlFlowGraph) -> dict[int, int]:
+        # Registers passed to or received from argument registers prefer
+        # their colours, such that Emit can leave out the moves
+        colours = {name: color for color, name in src.phase.emit.REGISTERS.items()}
+        preferences = {}
 
-        for node, adj in reversed(stack):
-            graph[node] = adj
-            for adj_node in adj:
-                graph[adj_node].add(node)
+        for block in cfg.blocks:
+            for ins in block.instructions:
+                if ins.opcode is Op.META and ins.args[0] in (Meta.ARGUMENTS, Meta.PARAMETERS):
+                    for arg, name in zip(ins.args[1:], src.phase.emit.ARGUMENT_REGISTERS):
+                        if name in colours:
+                            preferences.setdefault(arg.target.val, colours[name])
 
-            adj_colors = set()
-            for i in adj:
-                color = colors[i]
+        return preferences
 
-                if color is None:
-                    continue
+    def _select(self, graph: dict[int, set[int]], stack: list[int],
+                preferences: dict[int, int]) -> tuple[dict[int, int], list[int]]:
+        colors = {}
+        spilled = []
 
-                adj_colors.add(color)
+        for node in reversed(stack):
+            adj_colors = {colors.get(adj) for adj in graph[node]}
 
-            i = 0
-            while (i := i + 1):
-                if i in adj_colors:
-                    continue
-                else:
-                    colors[node] = i
+            if preferences.get(node) not in adj_colors | {None}:
+                colors[node] = preferences[node]
+                continue
+
+            for color in range(1, self._registers_available + 1):
+                if color not in adj_colors:
+                    colors[node] = color
                     break
+            else:
+                spilled.append(node)
 
-    def _color_graph(self, graphs: list[defaultdict]) -> dict[int, int]:
-        colors = defaultdict(lambda: None)
+        return colors, spilled
+
+    def _color_graph(self, graph: dict[int, set[int]], costs: dict[int, float],
+                     preferences: dict[int, int]) -> tuple[dict[int, int], list[int]]:
+        """Chaitin-Briggs colouring with the physical registers of Emit,
+        where a register takes its preferred colour if it is free.
+
+        Returns the colours and the registers that must be spilled.
+        """
+
+        return self._select(graph, self._simplify(graph, costs), preferences)
+
+    def _allocate(self, cfg: ControlFlowGraph, temporaries: set[int]) -> tuple[dict[int, int], list[int]]:
+        """Colours of the registers of a single scope, and the
+        registers that must be spilled.
+        """
+
+        names = cfg.liveness()
+        graph = self._build_graph(cfg, names)
+        costs = self._spill_costs(cfg, temporaries)
+        preferences = self._preferences(cfg)
 
-        for graph in graphs:
-            stack = self._take_graph_apart(graph)
-            self._assign_colors(stack, colors)
+        if self._coalesce_moves:
+            coalesced = {node: set(adj) for node, adj in graph.items()}
+            merged_costs = defaultdict(float, costs)
+            alias = self._coalesce(coalesced, self._moves(cfg, graph, temporaries), merged_costs)
+            merged_preferences = {}
+            for reg, color in preferences.items():
+                merged_preferences.setdefault(alias.get(reg, reg), color)
+            colors, spilled = self._color_graph(coalesced, merged_costs, merged_preferences)
 
-        return colors
+            # Merged registers share the colour of their representative
+            if not spilled:
+                for reg, representative in alias.items():
+                    colors[reg] = colors[representative]
+                return colors, []
 
-    def _rename_registers(self, colors: dict, code: list) -> None:
+        # Spill decisions are made on the graph without merged
+        # registers, which would otherwise be spilled as a whole
+        return self._color_graph(graph, costs, preferences)
+
+    def _frame(self, groups: list[list[Instruction]]) -> tuple[int, int]:
+        # The prolog of a scope is followed by the allocation of its locals
+        for i, group in enumerate(groups):
+            if group[0].opcode is Op.META and group[0].args[0] == Meta.PROLOG:
+                return i + 1, groups[i + 1][0].args[0].target.val // 8
+
+        raise ValueError("Scope without prolog.")
+
+    def _spill_instruction(self, ins: Instruction, slots: dict[int, Operand], temporaries: set[int]) -> list[Instruction]:
+        defs, uses = ins.def_use()
+
+        if not any(reg in slots for reg in defs + uses):
+            return [ins]
+
+        match ins:
+            case Instruction(opcode=Op.MOVE, args=(Operand(target=Target(spec=T.REG, val=val1), addressing=Mode(mode=M.DIR)),
+                                                   Operand(target=Target(spec=T.REG, val=val2), addressing=Mode(mode=M.DIR)))) if (val1 in slots) != (val2 in slots):
+                if val1 in slots:
+                    return [Instruction(Op.MOVE, slots[val1], ins.args[1])]
+                return [Instruction(Op.MOVE, ins.args[0], slots[val2])]
+
+        loads, stores = [], []
+        renamed = {}
+        args = list(ins.args)
+
+        for i, arg in enumerate(args):
+            if not isinstance(arg, Operand) or arg.target.spec is not T.REG or arg.target.val not in slots:
+                continue
+
+            reg = arg.target.val
+
+            if reg not in renamed:
+                renamed[reg] = self._next_register
+                temporaries.add(self._next_register)
+                self._next_register += 1
+
+                # Operands are renamed in place, thus they are never shared
+                if reg in uses:
+                    loads.append(Instruction(Op.MOVE, slots[reg],
+                                             Operand(Target(T.REG, renamed[reg]), Mode(M.DIR))))
+                if reg in defs:
+                    stores.append(Instruction(Op.MOVE, Operand(Target(T.REG, renamed[reg]), Mode(M.DIR)),
+                                              slots[reg]))
+
+            args[i] = Operand(Target(T.REG, renamed[reg]), arg.addressing)
+
+        return loads + [Instruction(ins.opcode, *args)] + stores
+
+    def _insert_spill_code(self, groups: list[list[Instruction]], spilled: list[int], slots: dict[int, Operand], temporaries: set[int]) -> None:
+        """Keep the spilled registers in new slots of the frame, below
+        the locals of the scope. Every use is preceded by a load into a
+        new temporary, and every definition is followed by a store.
+        """
+
+        allocation, locals_ = self._frame(groups)
+
+        for reg in spilled:
+            slots[reg] = Operand(Target(T.RBP), Mode(M.IRL, locals_ + 1))
+            locals_ += 1
+
+        groups[allocation] = [Instruction(Op.SUB, Operand(Target(T.IMI, 8 * locals_), Mode(M.DIR)),
+                                          groups[allocation][0].args[1])]
+
+        for i, group in enumerate(groups):
+            groups[i] = [new for ins in group for new in self._spill_instruction(ins, slots, temporaries)]
+
+    def _rename_registers(self, colors: dict, code: InstructionBuffer) -> None:
         for ins in code:
             match ins:
                 case Instruction(args=(Operand(target=Target(spec=T.REG, val=val1)), Operand(target=Target(spec=T.REG, val=val2)))):
@@ -247,49 +334,214 @@ class Allocator:
                     ins.args[1].target.val = colors[val]
                 case Instruction(args=(Operand(target=Target(spec=T.REG, val=val)), )):
                     ins.args[0].target.val = colors[val]
+                case Instruction(opcode=Op.META, args=(Meta.ARGUMENTS | Meta.PARAMETERS, *registers)):
+                    for reg in registers:
+                        reg.target.val = colors[reg.target.val]
+
+    def _call_sites(self, code: InstructionBuffer) -> dict[int, dict[int, list[Instruction]]]:
+        # Matching PRECALL and POSTRETURN pairs, keyed by the scope and
+        # index of the POSTRETURN, after which the registers live are
+        # those live across the call
+        sites = defaultdict(lambda: defaultdict(list))
+        precalls = []
+
+        for i, ins in enumerate(code):
+            if ins.opcode is not Op.META:
+                continue
+            if ins.args[0] == Meta.PRECALL:
+                precalls.append(i)
+            elif ins.args[0] == Meta.POSTRETURN:
+                sites[code.owner[i]][i] += [code[precalls.pop()], ins]
+
+        return sites
+
+    def _save_live_registers(self, code: InstructionBuffer) -> None:
+        # Liveness of the coloured code, such that every PRECALL and
+        # POSTRETURN names the registers that Emit must preserve
+        for scope, anchors in self._call_sites(code).items():
+            indices = code.scope_indices(scope)
+            cfg = ControlFlowGraph.build([code[i] for i in indices])
+            names = cfg.liveness()
+            position = 0
+
+            for block in cfg.blocks:
+                end = position + len(block.instructions)
+                if not any(indices[i] in anchors for i in range(position, end)):
+                    position = end
+                    continue
 
-    def _flatmap(self, code, acc: list = None) -> list[Instruction]:
-        if acc is None:
-            acc = []
+                live = registers(block.live_out, names)
+                for i in range(end - 1, position - 1, -1):
+                    if calls := anchors.get(indices[i]):
+                        saved = tuple(Operand(Target(T.REG, reg), Mode(M.DIR))
+                                      for reg in sorted(live - {None}))
+                        for ins in calls:
+                            ins.args = (ins.args[0], saved)
 
-        for ins in code:
-            if isinstance(ins, list):
-                self._flatmap(ins, acc)
-            else:
-                acc.append(ins)
-        return acc
+                    defs, uses = block.instructions[i - position].def_use()
+                    live.difference_update(defs)
+                    live.update(uses)
+
+                position = end
+
+    def _dead_instructions(self, instructions: list[Instruction]) -> set[int]:
+        """Positions of the instructions of a scope that are either
+        unreachable from its entry, or pure definitions of registers
+        that are not live afterwards.
+
+        Removing a definition may kill the definitions of its operands,
+        so liveness is recomputed until no more instructions die.
+        """
+
+        cfg = ControlFlowGraph.build(instructions)
+        reachable = set(cfg.reverse_postorder())
+        dead = set()
+        position = 0
+
+        for block in cfg.blocks:
+            if block.index not in reachable:
+                dead.update(range(position, position + len(block.instructions)))
+            position += len(block.instructions)
+
+        remaining = range(len(instructions))
+
+        while True:
+            if len(remaining) + len(dead) != len(instructions):
+                remaining = [i for i in range(len(instructions)) if i not in dead]
+                cfg = ControlFlowGraph.build([instructions[i] for i in remaining])
+
+            names = cfg.liveness()
+            killed = len(dead)
+            position = 0
+
+            for block in cfg.blocks:
+                live = registers(block.live_out, names)
 
-    def perform_register_allocation(self, code: list[Instruction]) -> list[Instruction]:
+                for i in range(len(block.instructions) - 1, -1, -1):
+                    ins = block.instructions[i]
+                    defs, uses = ins.def_use()
+
+                    if defs and ins.opcode in PURE and ins.args[1].addressing.mode is M.DIR and not live.intersection(defs):
+                        dead.add(remaining[position + i])
+                        continue
+
+                    live.difference_update(defs)
+                    live.update(uses)
+
+                position += len(block.instructions)
+
+            if len(dead) == killed:
+                return dead
+
+    def _remove_dead_code(self, code: InstructionBuffer) -> None:
+        """Remove the dead instructions of every scope reachable by
+        calls from the outermost scope, i.e., `?main`, and all
+        instructions of the other scopes.
+
+        The call graph is walked from scope 0, where every function
+        scope starts with its label, and only calls that survive in
+        the callers are followed.
+        """
+
+        scope_of = {code[code.start[scope]].args[0].target.val: scope
+                    for scope in code.scopes() if code.start[scope] < code.end[scope]}
+        reachable = {0}
+        stack = [0]
+        removed = {}
+
+        while stack:
+            indices = code.scope_indices(stack.pop())
+            dead = self._dead_instructions([code[i] for i in indices])
+
+            for i, index in enumerate(indices):
+                match code[index]:
+                    case _ if i in dead:
+                        removed[index] = []
+                    case Instruction(opcode=Op.CALL, args=(Operand(target=Target(val=label)), )):
+                        callee = scope_of.get(label)
+                        if callee is not None and callee not in reachable:
+                            reachable.add(callee)
+                            stack.append(callee)
+
+        for scope in set(code.scopes()) - reachable:
+            removed.update({i: [] for i in code.scope_indices(scope)})
+
+        code.expand(removed)
+
+    def perform_register_allocation(self, code: InstructionBuffer, in_place: bool = False) -> InstructionBuffer:
         """ This method is responsible for orchestrating the total allocation flow. 
             The method calls a selection of hidden methods, so that it is finally 
             possible to return a list of instructions with correctly assigned registers,
             such that the rest can be handled by emit.
 
-                1. find labels
-                2. do control flow
+                1. remove dead code
+                2. build control-flow graph
                 3. perform liveness
                 4. build graph
                 5. color graph
-                6. flatmap code
+                6. insert spill code and repeat from 2, if necessary
                 7. assign colors to instructions
+                8. annotate calls with the registers live across them
+
+            Step 1 removes the functions that are never called, and then
+            the unreachable blocks and dead definitions of every scope.
+            Steps 2 to 6 are performed on every scope of the buffer
+            separately, i.e., on the instructions it owns. Step 8 lets
+            Emit save only the caller-save registers that are live
+            across a call, instead of all of them.
             
             Parameters
             ----------
-            code : list[Instruction]
+            code : InstructionBuffer
+            in_place : bool
+                Allocate directly on `code` instead of a copy.
 
             Returns
             -------
-            code : list[instructions]
+            code : InstructionBuffer
         """
 
-        code = copy.deepcopy(code) # input is left untouched
+        if not in_place:
+            code = copy.deepcopy(code) # input is left untouched
+
+        if self._eliminate_dead_code:
+            self._remove_dead_code(code)
+
+        colors = defaultdict(lambda: None)
+        replacements = {}
+
+        self._next_register = None
+
+        for scope in code.scopes():
+            instructions = code.scope(scope)
+            groups = None
+            slots, temporaries = {}, set()
+
+            while True:
+                cfg = ControlFlowGraph.build(instructions)
+                scope_colors, spilled = self._allocate(cfg, temporaries)
+
+                if not spilled:
+                    break
+
+                # Spill code replaces every instruction by a group
+                if groups is None:
+                    groups = [[ins] for ins in instructions]
+                if self._next_register is None:
+                    self._next_register = 1 + max(arg.target.val for ins in code for arg in ins.args
+                                                  if isinstance(arg, Operand) and arg.target.spec is T.REG)
+
+                self._insert_spill_code(groups, spilled, slots, temporaries)
+                instructions = [ins for group in groups for ins in group]
+
+            colors.update(scope_colors)
+
+            if groups is not None:
+                replacements.update({i: group for i, group in zip(code.scope_indices(scope), groups)
+                                     if len(group) != 1 or group[0] is not code[i]})
 
-        self._find_labels(code)
-        self._control_flow(code)
-        self._liveness_analysis(code)
-        graph = self._build_graph(code)
-        colors = self._color_graph(graph)
-        code = self._flatmap(code)
+        code.expand(replacements)
         self._rename_registers(colors, code)
+        self._save_live_registers(code)
 
         return code
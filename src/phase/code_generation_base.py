@@ -26,16 +26,30 @@ class GenerateCodeBase(ABC):
     |--------------------|
     | Callers ARP        |
     |--------------------|
-    | Caller-save area   |
-    |--------------------|
     | Parameter area     |
+    |--------------------|
+    | Caller-save area   |
     ----------------------
+
+    Arguments are pushed after the caller-save area, such that
+    parameters are found at fixed offsets from the callee RBP,
+    however many registers the caller saves. Blocks of if, while and
+    for statements are inline, and their variables are part of the
+    local data area of the enclosing function.
+
+    With `display`, frames of outer functions are found in a global
+    array indexed by level, instead of by following static links. A
+    function whose frame is captured by nested functions stores RBP in
+    the entry of its level on entry, and restores the previous entry on
+    exit, which its caller pushes in place of the static link.
     """
 
     _current_scope: dataclass_symbol.SymbolTable = None
     _function_stack: list(AST.AstNode) = field(default_factory=list)
-    _body_stack: list(AST.AstNode) = field(default_factory=list)
+    _block_declarations: list[list[AST.DeclarationList]] = field(default_factory=list)
     _labels: label.Labels = label.Labels()
+    _tail_call_stack: list[set[int]] = field(default_factory=list)
+    display: bool = False
 
     @abstractmethod
     def _append_instruction(self, instruction: Instruction) -> None:
@@ -52,6 +66,14 @@ class GenerateCodeBase(ABC):
     def _follow_static_link(self, symbol_level: int) -> int:
         level_difference = self._current_scope.level - symbol_level
 
+        if self.display and level_difference:
+            self._append_instruction(
+                Instruction(Op.MOVE,
+                            Operand(Target(T.DSP, symbol_level), Mode(M.DIR)),
+                            Operand(Target(T.RSL), Mode(M.DIR)))
+            )
+            return level_difference
+
         self._append_instruction(
             Instruction(Op.MOVE,
                         Operand(Target(T.RBP), Mode(M.DIR)),
@@ -71,10 +93,45 @@ class GenerateCodeBase(ABC):
             ast_node.start_label = "main"
             ast_node.end_label = "end_main"
 
-        if not hasattr(ast_node, 'start_label'):
+        if ast_node.start_label is None:
             ast_node.start_label = self._labels.next(ast_node.name)
             ast_node.end_label = self._labels.next(f"end_{ast_node.name}")
 
+    def _tail_calls(self, ast_node: AST.AstNode, function: AST.Function, tail: bool, calls: set[int]) -> None:
+        # Calls of the function itself that are returned, or that are the
+        # last statement before its end. Nested functions are not searched
+        match ast_node:
+            case AST.Body(_, stm_list):
+                self._tail_calls(stm_list, function, tail, calls)
+            case AST.StatementList(stms):
+                for i, stm in enumerate(stms):
+                    self._tail_calls(stm, function, tail and i == len(stms) - 1, calls)
+            case AST.StatementIfthenelse(_, then_part, else_part):
+                self._tail_calls(then_part, function, tail, calls)
+                self._tail_calls(else_part, function, tail, calls)
+            case AST.StatementWhile(_, body) | AST.StatementFor(body=body):
+                self._tail_calls(body, function, False, calls)
+            case AST.StatementReturn(AST.ExpressionCall() as call):
+                self._tail_calls(call, function, True, calls)
+            case AST.ExpressionCall(_, exp_list) if tail:
+                arguments = exp_list.exps if exp_list else []
+                if ast_node.binding[0].info is function and len(arguments) == function.number_of_parameters:
+                    calls.add(id(ast_node))
+
+    def _tail_label(self, function: AST.Function) -> None:
+        # Tail calls of the function itself jump back here, after the
+        # prolog, reusing the frame with the parameters overwritten
+        tail_calls = set()
+        self._tail_calls(function.body, function, True, tail_calls)
+        self._tail_call_stack.append(tail_calls)
+
+        if tail_calls:
+            function.tail_label = self._labels.next(f"tail_{function.name}")
+            self._append_instruction(
+                Instruction(Op.LABEL,
+                            Operand(Target(T.MEM, function.tail_label), Mode(M.DIR)))
+            )
+
     def _prolog(self, body: AST.Body) -> None:
         self._append_instruction(
             Instruction(Op.META, Meta.PROLOG)
@@ -87,68 +144,93 @@ class GenerateCodeBase(ABC):
                         Operand(Target(T.RSP), Mode(M.DIR)))
         )
 
+        if self.display and self._function_stack[-1].captured:
+            self._append_instruction(
+                Instruction(Op.MOVE,
+                            Operand(Target(T.RBP), Mode(M.DIR)),
+                            Operand(Target(T.DSP, self._current_scope.level), Mode(M.DIR)))
+            )
+
     def _epilog(self) -> None:
+        # The main function has no caller whose display entry is restored
+        if self.display and self._function_stack[-1].captured and self._current_scope.level > 0:
+            self._append_instruction(
+                Instruction(Op.MOVE,
+                            Operand(Target(T.RBP), Mode(M.IRL, -7)),
+                            Operand(Target(T.RSL), Mode(M.DIR)))
+            )
+            self._append_instruction(
+                Instruction(Op.MOVE,
+                            Operand(Target(T.RSL), Mode(M.DIR)),
+                            Operand(Target(T.DSP, self._current_scope.level), Mode(M.DIR)))
+            )
+
         # Local stack variables are deallocated in epilog
         self._append_instruction(
             Instruction(Op.META, Meta.EPILOG)
         )
 
-    def _precall(self, exp_list: AST.ExpressionList, symbol_level: int) -> None:
-        # Push arguments
-        self._generate_code(exp_list)
-
+    def _precall(self, exp_list: AST.ExpressionList, symbol_level: int, function: AST.Function) -> None:
         # Begin call
         self._append_instruction(
             Instruction(Op.META, Meta.PRECALL)
         )
 
-        # Push parents ARP
-        self._follow_static_link(symbol_level)
+        # Push arguments
+        self._generate_code(exp_list)
+
+        self._push_static_link(symbol_level, function)
+
+    def _push_static_link(self, symbol_level: int, function: AST.Function) -> None:
+        # Push parents ARP, or the display entry of a captured callee.
+        # Callees that never follow their static link get RBP instead
+        if self.display and function.captured:
+            self._append_instruction(
+                Instruction(Op.MOVE,
+                            Operand(Target(T.DSP, symbol_level + 1), Mode(M.DIR)),
+                            Operand(Target(T.RSL), Mode(M.DIR)))
+            )
+        elif self.display or not function.static_link:
+            self._append_instruction(
+                Instruction(Op.MOVE,
+                            Operand(Target(T.RBP), Mode(M.DIR)),
+                            Operand(Target(T.RSL), Mode(M.DIR)))
+            )
+        else:
+            self._follow_static_link(symbol_level)
 
         self._append_instruction(
             Instruction(Op.PUSH,
                         Operand(Target(T.RSL), Mode(M.DIR)))
         )
 
-    def _postreturn(self, number_of_parameters: int) -> None:
-        # Remove ARP
-        self._append_instruction(
-            Instruction(Op.ADD,
-                        Operand(Target(T.IMI, 8), Mode(M.DIR)),
-                        Operand(Target(T.RSP), Mode(M.DIR)))
-        )
+    def _stack_arguments(self, function: AST.Function) -> int:
+        # Words pushed by calls of the function, i.e., ARP and arguments
+        return function.number_of_parameters + 1
+
+    def _postreturn(self, function: AST.Function) -> None:
+        # Remove ARP and arguments
+        if words := self._stack_arguments(function):
+            self._append_instruction(
+                Instruction(Op.ADD,
+                            Operand(Target(T.IMI, 8*words), Mode(M.DIR)),
+                            Operand(Target(T.RSP), Mode(M.DIR)))
+            )
 
         # End call
         self._append_instruction(
             Instruction(Op.META, Meta.POSTRETURN)
         )
 
-        # Remove arguments
-        self._append_instruction(
-            Instruction(Op.ADD,
-                        Operand(Target(T.IMI, 8*number_of_parameters),
-                                Mode(M.DIR)),
-                        Operand(Target(T.RSP), Mode(M.DIR)))
-        )
-
-    def _push_pseudo_return_address(self) -> None:
-        self._append_instruction(
-            Instruction(Op.SUB,
-                        Operand(Target(T.IMI, 8), Mode(M.DIR)),
-                        Operand(Target(T.RSP), Mode(M.DIR)))
-        )
-
-    def _pop_pseudo_return_address(self) -> None:
-        self._append_instruction(
-            Instruction(Op.ADD,
-                        Operand(Target(T.IMI, 8), Mode(M.DIR)),
-                        Operand(Target(T.RSP), Mode(M.DIR)))
-        )
-
-    def generate_code(self, ast_node: AST.AstNode) -> AST.AstNode:
+    def generate_code(self, ast_node: AST.AstNode, in_place: bool = False) -> AST.AstNode:
         """Generate linear ILOC IR code.
+
+        Code generation annotates the AST, which is therefore
+        copied first, unless `in_place` is set.
         """
 
-        ast_node = copy.deepcopy(ast_node)
+        if not in_place:
+            ast_node = copy.deepcopy(ast_node)
+
         self._generate_code(ast_node)
         return ast_node
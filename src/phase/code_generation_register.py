@@ -6,25 +6,40 @@ from dataclasses import dataclass, field
 import src.dataclass.AST as AST
 import src.dataclass.symbol as dataclass_symbol
 import src.phase.code_generation_base
+import src.phase.emit
 import src.utils.error
-from src.dataclass.iloc import Instruction, Mode, Operand, Target
+from src.dataclass.iloc import Instruction, InstructionBuffer, Mode, Operand, Target
 from src.enums.code_generation_enum import M, Meta, Op, T
 from src.enums.symbols_enum import NameCategory
 
+# Jump taken when a comparison is false
+NEGATED_JUMP = {Op.JE: Op.JNE, Op.JNE: Op.JE, Op.JL: Op.JGE,
+                Op.JGE: Op.JL, Op.JG: Op.JLE, Op.JLE: Op.JG}
+
 
 @dataclass
 class GenerateCodeRegister(src.phase.code_generation_base.GenerateCodeBase):
     """Orchestrating register code generation. 
     The API exposes `generate_code` and `get_code`.
+
+    With `register_arguments`, functions with at most six parameters,
+    none of which are captured by nested functions, receive their
+    arguments in the registers of the System V calling convention. The
+    caller evaluates the arguments into virtual registers, which are
+    moved to the argument registers by `Meta.ARGUMENTS` right before
+    the call, and the callee defines the virtual registers of its
+    parameters from them by `Meta.PARAMETERS`, such that both are
+    allocated like any other register. Nothing but the static link is
+    pushed, and only if the callee follows it.
     """
 
-    _code: list = field(default_factory=list)
+    _code: InstructionBuffer = field(default_factory=InstructionBuffer)
     _reg_stack: list[int] = field(default_factory=list)
     _used_symbols: list[list[dataclass_symbol.Symbol]
                         ] = field(default_factory=list)
-    _symbol_restore: list[list[dataclass_symbol.Symbol]
-                          ] = field(default_factory=list)
+    _symbol_restore: list[list[int]] = field(default_factory=list)
     _reg_count: int = 0
+    register_arguments: bool = False
 
     def _push_new_reg_count(self) -> None:
         self._reg_count += 1
@@ -44,10 +59,11 @@ class GenerateCodeRegister(src.phase.code_generation_base.GenerateCodeBase):
         self._used_symbols[-1].append(symbol)
 
     def _create_new_symbol_scope(self) -> None:
-        self._code.append([])
+        self._code.open_scope()
 
         if self._used_symbols:
-            self._symbol_restore.append(copy.deepcopy(self._used_symbols[-1]))
+            self._symbol_restore.append(
+                [symbol.SR for symbol in self._used_symbols[-1]])
             for symbol in self._used_symbols[-1]:
                 symbol.SR = None
 
@@ -58,33 +74,199 @@ class GenerateCodeRegister(src.phase.code_generation_base.GenerateCodeBase):
             symbol.SR = None
 
         if self._symbol_restore:
-            for original, restore in zip(self._used_symbols[-1], self._symbol_restore.pop()):
-                original.SR = restore.SR
+            for original, SR in zip(self._used_symbols[-1], self._symbol_restore.pop()):
+                original.SR = SR
+
+        self._code.close_scope()
+
+    def _symbol_register(self, symbol: dataclass_symbol.Symbol) -> int:
+        # Symbols that are not captured by nested functions live in a
+        # single register of their function and never in memory. A use
+        # before any assignment reads an undefined register, as it would
+        # read an undefined slot
+        if symbol.SR is None:
+            symbol.SR = self._new_reg()
+            self._save_symbol(symbol)
+
+        return symbol.SR
+
+    def _passes_registers(self, function: AST.Function) -> bool:
+        if function.register_arguments is None:
+            function.register_arguments = self.register_arguments and \
+                function.number_of_parameters <= len(src.phase.emit.ARGUMENT_REGISTERS) and \
+                not any(symbol.kind is NameCategory.PARAMETER and symbol.escaping
+                        for _, symbol in function.symbol_table.items())
+
+        return function.register_arguments
+
+    def _pushes_static_link(self, function: AST.Function) -> bool:
+        # With a display, only captured functions read their static
+        # link, which holds the display entry they restore
+        return function.captured if self.display else function.static_link
+
+    def _stack_arguments(self, function: AST.Function) -> int:
+        if self._passes_registers(function):
+            return int(bool(self._pushes_static_link(function)))
+
+        return super()._stack_arguments(function)
+
+    def _precall(self, exp_list: AST.ExpressionList, symbol_level: int, function: AST.Function) -> None:
+        if not self._passes_registers(function):
+            super()._precall(exp_list, symbol_level, function)
+            return
+
+        self._append_instruction(
+            Instruction(Op.META, Meta.PRECALL)
+        )
+
+        # Arguments are evaluated in the order of a call on the stack
+        arguments = []
+        for exp in reversed(exp_list.exps if exp_list else []):
+            self._generate_code(exp)
+            arguments.append(Operand(Target(T.REG, self._reg_stack_pop()), Mode(M.DIR)))
+
+        if self._pushes_static_link(function):
+            self._push_static_link(symbol_level, function)
+
+        if arguments:
+            self._append_instruction(
+                Instruction(Op.META, Meta.ARGUMENTS, *reversed(arguments))
+            )
+
+    def _load_parameters(self, function: AST.Function) -> None:
+        if self._passes_registers(function):
+            parameters = sorted((symbol for _, symbol in function.symbol_table.items()
+                                 if symbol.kind is NameCategory.PARAMETER),
+                                key=lambda symbol: symbol.info)
+            for symbol in parameters:
+                symbol.SR = self._new_reg()
+                self._save_symbol(symbol)
+
+            if parameters:
+                self._append_instruction(
+                    Instruction(Op.META, Meta.PARAMETERS,
+                                *(Operand(Target(T.REG, symbol.SR), Mode(M.DIR)) for symbol in parameters))
+                )
+            return
+
+        # Registers of parameters are defined on entry, since
+        # their first use may be in a block that is skipped
+        for _, symbol in function.symbol_table.items():
+            if symbol.kind is NameCategory.PARAMETER and not symbol.escaping:
+                symbol.SR = self._new_reg()
+                self._save_symbol(symbol)
+                self._append_instruction(
+                    Instruction(Op.MOVE,
+                                Operand(Target(T.RBP), Mode(M.IRL, -(symbol.info + 8))),
+                                Operand(Target(T.REG, symbol.SR), Mode(M.DIR)))
+                )
 
-        if len(self._code) >= 2:
-            list_to_merge = self._code.pop()
-            self._code[-1].append(list_to_merge)
+    def _tail_call(self, exp_list: AST.ExpressionList) -> None:
+        """ evaluate arguments
+            move arguments to parameters
+            jmp tail_label
+        """
+        func = self._function_stack[-1]
+        exps = exp_list.exps if exp_list else []
+        arguments = []
+
+        # Arguments are evaluated in the order of a call, and
+        # copied first, since they may read the parameters
+        for exp in reversed(exps):
+            self._generate_code(exp)
+            arguments.append(self._new_reg())
+            self._append_instruction(
+                Instruction(Op.MOVE,
+                            Operand(Target(T.REG, self._reg_stack_pop()), Mode(M.DIR)),
+                            Operand(Target(T.REG, arguments[-1]), Mode(M.DIR)))
+            )
+
+        parameters = sorted((symbol for _, symbol in func.symbol_table.items()
+                             if symbol.kind is NameCategory.PARAMETER),
+                            key=lambda symbol: symbol.info)
+
+        for symbol, reg in zip(parameters, reversed(arguments)):
+            if symbol.escaping:
+                target = Operand(Target(T.RBP), Mode(M.IRL, -(symbol.info + 8)))
+            else:
+                target = Operand(Target(T.REG, symbol.SR), Mode(M.DIR))
+            self._append_instruction(
+                Instruction(Op.MOVE,
+                            Operand(Target(T.REG, reg), Mode(M.DIR)),
+                            target)
+            )
+
+        self._append_instruction(
+            Instruction(Op.JMP,
+                        Operand(Target(T.MEM, func.tail_label), Mode(M.DIR)))
+        )
+
+    def _generate_condition(self, exp: AST.Expression, false_label: str) -> None:
+        """ cmp rhs, lhs
+            negated_cond_jump false_label
+
+        Comparisons jump directly on their flags, and any other
+        expression is compared to zero. Integer literals on the right
+        are compared as immediates if they fit in 32 bits. Constant
+        conditions jump unconditionally if false, and not at all if true.
+        """
+        match exp:
+            case AST.ExpressionInteger(integer):
+                if integer == 0:
+                    self._append_instruction(
+                        Instruction(Op.JMP,
+                                    Operand(Target(T.MEM, false_label), Mode(M.DIR)))
+                    )
+                return
+            case AST.ExpressionBinop(op, lhs, AST.ExpressionInteger(integer)) if op in NEGATED_JUMP and -2**31 <= integer < 2**31:
+                self._generate_code(lhs)
+                first = Operand(Target(T.IMI, integer), Mode(M.DIR))
+            case AST.ExpressionBinop(op, lhs, rhs) if op in NEGATED_JUMP:
+                self._generate_code(lhs)
+                self._generate_code(rhs)
+                first = Operand(Target(T.REG, self._reg_stack_pop()), Mode(M.DIR))
+            case _:
+                op = Op.JNE
+                self._generate_code(exp)
+                first = Operand(Target(T.IMI, 0), Mode(M.DIR))
+
+        self._append_instruction(
+            Instruction(Op.CMP,
+                        first,
+                        Operand(Target(T.REG, self._reg_stack_pop()), Mode(M.DIR)))
+        )
+        self._append_instruction(
+            Instruction(NEGATED_JUMP[op],
+                        Operand(Target(T.MEM, false_label), Mode(M.DIR)))
+        )
 
     def _append_instruction(self, instruction: Instruction) -> None:
-        self._code[-1].append(instruction)
+        self._code.append(instruction)
 
-    def _get_code_block_to_extend(self) -> list[Instruction]:
-        return self._code[-1]
+    def _get_code_block_to_extend(self) -> InstructionBuffer:
+        return self._code
 
-    def get_code(self) -> list(Instruction):
+    def get_code(self, in_place: bool = False) -> InstructionBuffer:
         """Get copy of linear ILOC IR code.
+
+        If `in_place` is set, the generated code itself is handed over.
         """
 
-        return copy.deepcopy(self._code[0])
+        if in_place:
+            return self._code
+
+        return copy.deepcopy(self._code)
 
     def _generate_code(self, ast_node: AST.AstNode) -> None:
         match ast_node:
             case AST.Body(decls, stm_list):
-                self._generate_code(decls)
+                # Blocks are inline, thus their functions are
+                # generated after the enclosing function
+                self._block_declarations[-1].append(decls)
                 self._generate_code(stm_list)
-            case AST.DeclarationList(decl, next):
-                self._generate_code(decl)
-                self._generate_code(next)
+            case AST.DeclarationList(decls):
+                for decl in decls:
+                    self._generate_code(decl)
             case AST.DeclarationFunction(_, function):
                 self._generate_code(function)
             case AST.Function(body=body):
@@ -99,6 +281,7 @@ class GenerateCodeRegister(src.phase.code_generation_base.GenerateCodeBase):
                 self._create_new_symbol_scope()
                 self._current_scope = ast_node.symbol_table
                 self._function_stack.append(ast_node)
+                self._block_declarations.append([body.decls])
                 self._ensure_labels(ast_node)
 
                 self._append_instruction(
@@ -107,6 +290,9 @@ class GenerateCodeRegister(src.phase.code_generation_base.GenerateCodeBase):
                 )
 
                 self._prolog(body)
+                self._load_parameters(ast_node)
+
+                self._tail_label(ast_node)
 
                 self._generate_code(body.stm_list)
 
@@ -118,29 +304,31 @@ class GenerateCodeRegister(src.phase.code_generation_base.GenerateCodeBase):
                 self._append_instruction(
                     Instruction(Op.META, Meta.RET)
                 )
-                self._generate_code(body.decls)
+                for decls in self._block_declarations.pop():
+                    self._generate_code(decls)
                 self._function_stack.pop()
-                self._current_scope = self._current_scope.parent
+                self._tail_call_stack.pop()
+                self._current_scope = ast_node.symbol_table.parent
                 self._remove_symbol_scope()
-            case AST.StatementList(stm, next):
-                self._generate_code(stm)
-                self._generate_code(next)
+            case AST.StatementList(stms):
+                for stm in stms:
+                    self._generate_code(stm)
             case AST.StatementAssignment(lhs, rhs):
                 self._generate_code(rhs)
 
-                symbol, symbol_level = self._current_scope.lookup(lhs)
-                self._follow_static_link(symbol_level)
-
+                symbol, symbol_level = ast_node.binding
                 reg = self._reg_stack_pop()
 
                 if symbol.escaping:
+                    self._follow_static_link(symbol_level)
+
                     match symbol:
                         case dataclass_symbol.Symbol(kind=NameCategory.PARAMETER, info=info):
                             self._append_instruction(
                                 Instruction(Op.MOVE,
                                             Operand(Target(T.REG, reg),
                                                     Mode(M.DIR)),
-                                            Operand(Target(T.RSL), Mode(M.IRL, -(info + 16))))
+                                            Operand(Target(T.RSL), Mode(M.IRL, -(info + 8))))
                             )
                         case dataclass_symbol.Symbol(kind=NameCategory.VARIABLE, info=info):
                             self._append_instruction(
@@ -153,28 +341,14 @@ class GenerateCodeRegister(src.phase.code_generation_base.GenerateCodeBase):
                             raise ValueError(
                                 f"Symbol kind, {symbol.kind}, is unknown.")
                 else:
-                    match symbol:
-                        case dataclass_symbol.Symbol(SR=None):
-                            symbol.SR = self._new_reg()
-                            self._save_symbol(symbol)
-                            self._append_instruction(
-                                Instruction(Op.MOVE,
-                                            Operand(Target(T.REG, reg),
-                                                    Mode(M.DIR)),
-                                            Operand(Target(T.REG, symbol.SR), Mode(M.DIR)))
-                            )
-                        case dataclass_symbol.Symbol(SR=SR):
-                            self._append_instruction(
-                                Instruction(Op.MOVE,
-                                            Operand(Target(T.REG, reg),
-                                                    Mode(M.DIR)),
-                                            Operand(Target(T.REG, SR), Mode(M.DIR)))
-                            )
+                    self._append_instruction(
+                        Instruction(Op.MOVE,
+                                    Operand(Target(T.REG, reg),
+                                            Mode(M.DIR)),
+                                    Operand(Target(T.REG, self._symbol_register(symbol)), Mode(M.DIR)))
+                    )
             case AST.StatementIfthenelse(exp, then_part, else_part):
-                """     pop reg1
-                        move 0, reg 2
-                        cmp reg1, reg2
-                        je else_label
+                """     *jump to else_label if not exp*
                         *then_part*
                         jmp esle_label
                     else_label:
@@ -184,39 +358,11 @@ class GenerateCodeRegister(src.phase.code_generation_base.GenerateCodeBase):
                 ast_node.else_label = self._labels.next("else")
                 ast_node.esle_label = self._labels.next("esle")
 
-                self._generate_code(exp)
-
-                reg_cmp = self._new_reg()
-                self._append_instruction(
-                    Instruction(Op.MOVE,
-                                Operand(Target(T.IMI, 0), Mode(M.DIR)),
-                                Operand(Target(T.REG, reg_cmp), Mode(M.DIR)))
-                )
+                self._generate_condition(exp, ast_node.else_label)
 
-                self._append_instruction(
-                    Instruction(Op.CMP,
-                                Operand(
-                                    Target(T.REG, self._reg_stack_pop()), Mode(M.DIR)),
-                                Operand(Target(T.REG, reg_cmp), Mode(M.DIR)))
-                )
-                self._append_instruction(
-                    Instruction(Op.JE,
-                                Operand(Target(T.MEM, ast_node.else_label), Mode(M.DIR)))
-                )
-
-                self._create_new_symbol_scope()
                 self._current_scope = ast_node.symbol_table_then
-                self._precall(None, self._current_scope.level)
-                self._push_pseudo_return_address()
-                self._prolog(then_part)
-
                 self._generate_code(then_part)
-
-                self._epilog()
-                self._pop_pseudo_return_address()
-                self._postreturn(0)
                 self._current_scope = self._current_scope.parent
-                self._remove_symbol_scope()
 
                 self._append_instruction(
                     Instruction(Op.JMP, Operand(
@@ -228,19 +374,9 @@ class GenerateCodeRegister(src.phase.code_generation_base.GenerateCodeBase):
                 )
 
                 if else_part:
-                    self._create_new_symbol_scope()
                     self._current_scope = ast_node.symbol_table_else
-                    self._precall(None, self._current_scope.level)
-                    self._push_pseudo_return_address()
-                    self._prolog(else_part)
-
                     self._generate_code(else_part)
-
-                    self._epilog()
-                    self._pop_pseudo_return_address()
-                    self._postreturn(0)
                     self._current_scope = self._current_scope.parent
-                    self._remove_symbol_scope()
 
                 self._append_instruction(
                     Instruction(Op.LABEL,
@@ -248,48 +384,21 @@ class GenerateCodeRegister(src.phase.code_generation_base.GenerateCodeBase):
                 )
             case AST.StatementWhile(exp, body):
                 """ while_label:
-                        pop reg1
-                        move 0, reg2
-                        cmp reg1, reg2
-                        je elihw_label  
+                        *jump to elihw_label if not exp*
                         *body*
                         jmp while_label
                     elihw_label:
                 """
-                self._create_new_symbol_scope()
                 self._current_scope = ast_node.symbol_table
                 ast_node.while_label = self._labels.next("while")
                 ast_node.elihw_label = self._labels.next("elihw")
 
-                self._precall(None, self._current_scope.level)
-                self._push_pseudo_return_address()
-                self._prolog(body)
-
                 self._append_instruction(
                     Instruction(Op.LABEL,
                                 Operand(Target(T.MEM, ast_node.while_label), Mode(M.DIR)))
                 )
 
-                self._generate_code(exp)
-
-                reg_cmp = self._new_reg()
-                self._append_instruction(
-                    Instruction(Op.MOVE,
-                                Operand(Target(T.IMI, 0), Mode(M.DIR)),
-                                Operand(Target(T.REG, reg_cmp), Mode(M.DIR)))
-                )
-
-                self._append_instruction(
-                    Instruction(Op.CMP,
-                                Operand(
-                                    Target(T.REG, self._reg_stack_pop()), Mode(M.DIR)),
-                                Operand(Target(T.REG, reg_cmp), Mode(M.DIR)))
-                )
-
-                self._append_instruction(
-                    Instruction(Op.JE,
-                                Operand(Target(T.MEM, ast_node.elihw_label), Mode(M.DIR)))
-                )
+                self._generate_condition(exp, ast_node.elihw_label)
 
                 self._generate_code(body)
 
@@ -302,60 +411,28 @@ class GenerateCodeRegister(src.phase.code_generation_base.GenerateCodeBase):
                                 Operand(Target(T.MEM, ast_node.elihw_label), Mode(M.DIR)))
                 )
 
-                self._epilog()
-                self._pop_pseudo_return_address()
-                self._postreturn(0)
-
                 self._current_scope = self._current_scope.parent
-                self._remove_symbol_scope()
-            case AST.StatementFor(iter, exp, assign, body):
-                """ for_label: 
-                        pop reg1
-                        move 0, reg2
-                        cmp reg1, reg2
-                        je rof_label
+            case AST.StatementFor(_, exp, assign, body):
+                """     *init*
+                    for_label:
+                        *jump to rof_label if not exp*
                         *body*
                         *assign*
                         jmp for_label
                     rof_label:
                 """
-                self._create_new_symbol_scope()
                 self._current_scope = ast_node.symbol_table
                 ast_node.for_label = self._labels.next("for")
                 ast_node.rof_label = self._labels.next("rof")
 
-                self._precall(
-                    AST.ExpressionList(iter.exp, None, iter.lineno),
-                    self._current_scope.level
-                )
-                self._push_pseudo_return_address()
-                self._prolog(body)
+                self._generate_code(ast_node.init)
 
                 self._append_instruction(
                     Instruction(Op.LABEL,
                                 Operand(Target(T.MEM, ast_node.for_label), Mode(M.DIR)))
                 )
 
-                self._generate_code(exp)
-
-                reg_cmp = self._new_reg()
-                self._append_instruction(
-                    Instruction(Op.MOVE,
-                                Operand(Target(T.IMI, 0), Mode(M.DIR)),
-                                Operand(Target(T.REG, reg_cmp), Mode(M.DIR)))
-                )
-
-                self._append_instruction(
-                    Instruction(Op.CMP,
-                                Operand(
-                                    Target(T.REG, self._reg_stack_pop()), Mode(M.DIR)),
-                                Operand(Target(T.REG, reg_cmp), Mode(M.DIR)))
-                )
-
-                self._append_instruction(
-                    Instruction(Op.JE,
-                                Operand(Target(T.MEM, ast_node.rof_label), Mode(M.DIR)))
-                )
+                self._generate_condition(exp, ast_node.rof_label)
 
                 self._generate_code(body)
                 self._generate_code(assign)
@@ -369,41 +446,39 @@ class GenerateCodeRegister(src.phase.code_generation_base.GenerateCodeBase):
                                 Operand(Target(T.MEM, ast_node.rof_label), Mode(M.DIR)))
                 )
 
-                self._epilog()
-                self._pop_pseudo_return_address
-                self._postreturn(ast_node.number_of_parameters)
-
                 self._current_scope = self._current_scope.parent
-                self._remove_symbol_scope()
             case AST.StatementPrint(exp):
-                """ push argument
-                    precall
+                """ precall
+                    push argument
                     call printf
-                    postreturn
                     remove argument
+                    postreturn
                 """
                 self._generate_code(exp)
 
                 self._append_instruction(
-                    Instruction(Op.PUSH,
-                                Operand(Target(T.REG, self._reg_stack_pop()), Mode(M.DIR)))
+                    Instruction(Op.META, Meta.PRECALL)
                 )
 
                 self._append_instruction(
-                    Instruction(Op.META, Meta.PRECALL)
+                    Instruction(Op.PUSH,
+                                Operand(Target(T.REG, self._reg_stack_pop()), Mode(M.DIR)))
                 )
+
                 self._append_instruction(
                     Instruction(Op.META, Meta.CALL_PRINTF)
                 )
-                self._append_instruction(
-                    Instruction(Op.META, Meta.POSTRETURN)
-                )
 
                 self._append_instruction(
                     Instruction(Op.ADD,
                                 Operand(Target(T.IMI, 8), Mode(M.DIR)),
                                 Operand(Target(T.RSP), Mode(M.DIR)))
                 )
+                self._append_instruction(
+                    Instruction(Op.META, Meta.POSTRETURN)
+                )
+            case AST.StatementReturn(AST.ExpressionCall(_, exp_list) as call) if id(call) in self._tail_call_stack[-1]:
+                self._tail_call(exp_list)
             case AST.StatementReturn(exp):
                 self._generate_code(exp)
                 func = self._function_stack[-1]
@@ -416,41 +491,33 @@ class GenerateCodeRegister(src.phase.code_generation_base.GenerateCodeBase):
                                     Operand(Target(T.RRT), Mode(M.DIR)))
                     )
 
-                _, symbol_level = self._current_scope.lookup(func.name)
-                level_difference = self._current_scope.level - symbol_level
-
-                self._get_code_block_to_extend().extend(
-                    [Instruction(Op.MOVE,
-                                 Operand(Target(T.RBP), Mode(M.IRL, -7)),
-                                 Operand(Target(T.RBP), Mode(M.DIR)))
-                        for _ in range(level_difference-1)]
-                )
-
                 self._append_instruction(
                     Instruction(Op.JMP,
                                 Operand(Target(T.MEM, func.end_label), Mode(M.DIR)))
                 )
-            case AST.ExpressionIdentifier(identifier):
+            case AST.ExpressionIdentifier(_):
                 """ move rbp, rsl
                     move -2(rsl), rsl - dereference zero or more times
                     push rsl_offset
                 """
-                symbol, symbol_level = self._current_scope.lookup(identifier)
+                symbol, symbol_level = ast_node.binding
+
+                if not symbol.escaping:
+                    self._push_SR(self._symbol_register(symbol))
+                    return
+
                 self._follow_static_link(symbol_level)
 
                 match symbol:
-                    case dataclass_symbol.Symbol(kind=NameCategory.PARAMETER, info=info, SR=None, escaping=escaping):
+                    case dataclass_symbol.Symbol(kind=NameCategory.PARAMETER, info=info):
                         self._push_new_reg_count()
                         self._append_instruction(
                             Instruction(Op.MOVE,
                                         Operand(Target(T.RSL), Mode(
-                                            M.IRL, -(info + 16))),
+                                            M.IRL, -(info + 8))),
                                         Operand(Target(T.REG, self._reg_count), Mode(M.DIR)))
                         )
-                        if not escaping:
-                            symbol.SR = self._reg_count
-                            self._save_symbol(symbol)
-                    case dataclass_symbol.Symbol(kind=NameCategory.VARIABLE, info=info, SR=None, escaping=escaping):
+                    case dataclass_symbol.Symbol(kind=NameCategory.VARIABLE, info=info):
                         self._push_new_reg_count()
                         self._append_instruction(
                             Instruction(Op.MOVE,
@@ -458,11 +525,6 @@ class GenerateCodeRegister(src.phase.code_generation_base.GenerateCodeBase):
                                             M.IRL, info + 1)),
                                         Operand(Target(T.REG, self._reg_count), Mode(M.DIR)))
                         )
-                        if not escaping:
-                            symbol.SR = self._reg_count
-                            self._save_symbol(symbol)
-                    case dataclass_symbol.Symbol(SR=SR):
-                        self._push_SR(SR)
                     case _:
                         raise ValueError(
                             f"Symbol kind, {symbol.kind}, is unknown.")
@@ -557,22 +619,23 @@ class GenerateCodeRegister(src.phase.code_generation_base.GenerateCodeBase):
                     Instruction(Op.LABEL,
                                 Operand(Target(T.MEM, end_label), Mode(M.DIR)))
                 )
-            case AST.ExpressionCall(name, exp_list):
-                """ push arguments
-                    precall
+            case AST.ExpressionCall(_, exp_list) if id(ast_node) in self._tail_call_stack[-1]:
+                self._tail_call(exp_list)
+            case AST.ExpressionCall(_, exp_list):
+                """ precall
+                    push arguments
                     set up ARP
                     call label
-                    remove ARP
+                    remove ARP and arguments
                     postreturn
-                    remove arguments
                     push rrt
                 """
                 # Constant work
-                symbol, symbol_level = self._current_scope.lookup(name)
+                symbol, symbol_level = ast_node.binding
                 func = symbol.info
                 self._ensure_labels(func)
 
-                self._precall(exp_list, symbol_level)
+                self._precall(exp_list, symbol_level, func)
 
                 # Make the call
                 self._append_instruction(
@@ -580,7 +643,7 @@ class GenerateCodeRegister(src.phase.code_generation_base.GenerateCodeBase):
                                 Operand(Target(T.MEM, func.start_label), Mode(M.DIR)))
                 )
 
-                self._postreturn(func.number_of_parameters)
+                self._postreturn(func)
 
                 # Put return value on the stack (if any)
                 if symbol.type != "void":
@@ -590,14 +653,14 @@ class GenerateCodeRegister(src.phase.code_generation_base.GenerateCodeBase):
                                     Operand(Target(T.RRT), Mode(M.DIR)),
                                     Operand(Target(T.REG, self._reg_count), Mode(M.DIR)))
                     )
-            case AST.ExpressionList(exp, next):
-                self._generate_code(next)
-                self._generate_code(exp)
+            case AST.ExpressionList(exps):
+                for exp in reversed(exps):
+                    self._generate_code(exp)
 
-                self._append_instruction(
-                    Instruction(Op.PUSH,
-                                Operand(Target(T.REG, self._reg_stack_pop()), Mode(M.DIR)))
-                )
+                    self._append_instruction(
+                        Instruction(Op.PUSH,
+                                    Operand(Target(T.REG, self._reg_stack_pop()), Mode(M.DIR)))
+                    )
             case AST.DeclarationVariableList():
                 pass
             case AST.DeclarationVariableInit():
@@ -26,22 +26,51 @@ class GenerateCodeStack(src.phase.code_generation_base.GenerateCodeBase):
     def _get_code_block_to_extend(self) -> list[Instruction]:
         return self._code
 
-    def get_code(self) -> list(Instruction):
+    def get_code(self, in_place: bool = False) -> list(Instruction):
         """Get copy of linear ILOC IR code.
+
+        If `in_place` is set, the generated code itself is handed over.
         """
 
+        if in_place:
+            return self._code
+
         return copy.deepcopy(self._code)
 
+    def _tail_call(self, exp_list: AST.ExpressionList) -> None:
+        """ push arguments
+            pop arguments to parameters
+            jmp tail_label
+        """
+        func = self._function_stack[-1]
+        exps = exp_list.exps if exp_list else []
+
+        # Arguments are pushed in the order of a call, and all of them
+        # are evaluated before the parameters they may read are written
+        for exp in reversed(exps):
+            self._generate_code(exp)
+
+        for i in range(len(exps)):
+            self._append_instruction(
+                Instruction(Op.POP,
+                            Operand(Target(T.RBP), Mode(M.IRL, -(i + 8))))
+            )
+
+        self._append_instruction(
+            Instruction(Op.JMP,
+                        Operand(Target(T.MEM, func.tail_label), Mode(M.DIR)))
+        )
+
     def _generate_code(self, ast_node: AST.AstNode) -> None:
         match ast_node:
             case AST.Body(decls, stm_list):
-                self._body_stack.append(ast_node)
-                self._generate_code(decls)
+                # Blocks are inline, thus their functions are
+                # generated after the enclosing function
+                self._block_declarations[-1].append(decls)
                 self._generate_code(stm_list)
-                self._body_stack.pop()
-            case AST.DeclarationList(decl, next):
-                self._generate_code(decl)
-                self._generate_code(next)
+            case AST.DeclarationList(decls):
+                for decl in decls:
+                    self._generate_code(decl)
             case AST.DeclarationFunction(_, function):
                 self._generate_code(function)
             case AST.Function(body=body):
@@ -55,6 +84,7 @@ class GenerateCodeStack(src.phase.code_generation_base.GenerateCodeBase):
                 """
                 self._current_scope = ast_node.symbol_table
                 self._function_stack.append(ast_node)
+                self._block_declarations.append([body.decls])
                 self._ensure_labels(ast_node)
 
                 self._append_instruction(
@@ -62,6 +92,7 @@ class GenerateCodeStack(src.phase.code_generation_base.GenerateCodeBase):
                                 Operand(Target(T.MEM, ast_node.start_label), Mode(M.DIR)))
                 )
                 self._prolog(body)
+                self._tail_label(ast_node)
 
                 self._generate_code(body.stm_list)
 
@@ -73,23 +104,25 @@ class GenerateCodeStack(src.phase.code_generation_base.GenerateCodeBase):
                 self._append_instruction(
                     Instruction(Op.META, Meta.RET)
                 )
-                self._generate_code(body.decls)
+                for decls in self._block_declarations.pop():
+                    self._generate_code(decls)
                 self._function_stack.pop()
-                self._current_scope = self._current_scope.parent
-            case AST.StatementList(stm, next):
-                self._generate_code(stm)
-                self._generate_code(next)
+                self._tail_call_stack.pop()
+                self._current_scope = ast_node.symbol_table.parent
+            case AST.StatementList(stms):
+                for stm in stms:
+                    self._generate_code(stm)
             case AST.StatementAssignment(lhs, rhs):
                 self._generate_code(rhs)
 
-                symbol, symbol_level = self._current_scope.lookup(lhs)
+                symbol, symbol_level = ast_node.binding
                 self._follow_static_link(symbol_level)
 
                 match symbol:
                     case dataclass_symbol.Symbol(kind=NameCategory.PARAMETER, info=info):
                         self._append_instruction(
                             Instruction(Op.POP,
-                                        Operand(Target(T.RSL), Mode(M.IRL, -(info + 16))))
+                                        Operand(Target(T.RSL), Mode(M.IRL, -(info + 8))))
                         )
                     case dataclass_symbol.Symbol(kind=NameCategory.VARIABLE, info=info):
                         self._append_instruction(
@@ -135,15 +168,7 @@ class GenerateCodeStack(src.phase.code_generation_base.GenerateCodeBase):
                 )
 
                 self._current_scope = ast_node.symbol_table_then
-                self._precall(None, self._current_scope.level)
-                self._push_pseudo_return_address()
-                self._prolog(then_part)
-
                 self._generate_code(then_part)
-
-                self._epilog()
-                self._pop_pseudo_return_address()
-                self._postreturn(0)
                 self._current_scope = self._current_scope.parent
 
                 self._append_instruction(
@@ -157,15 +182,7 @@ class GenerateCodeStack(src.phase.code_generation_base.GenerateCodeBase):
 
                 if else_part:
                     self._current_scope = ast_node.symbol_table_else
-                    self._precall(None, self._current_scope.level)
-                    self._push_pseudo_return_address()
-                    self._prolog(else_part)
-
                     self._generate_code(else_part)
-
-                    self._epilog()
-                    self._pop_pseudo_return_address()
-                    self._postreturn(0)
                     self._current_scope = self._current_scope.parent
 
                 self._append_instruction(
@@ -187,10 +204,6 @@ class GenerateCodeStack(src.phase.code_generation_base.GenerateCodeBase):
                 ast_node.while_label = self._labels.next("while")
                 ast_node.elihw_label = self._labels.next("elihw")
 
-                self._precall(None, self._current_scope.level)
-                self._push_pseudo_return_address()
-                self._prolog(body)
-
                 self._append_instruction(
                     Instruction(Op.LABEL,
                                 Operand(Target(T.MEM, ast_node.while_label), Mode(M.DIR)))
@@ -229,13 +242,10 @@ class GenerateCodeStack(src.phase.code_generation_base.GenerateCodeBase):
                                 Operand(Target(T.MEM, ast_node.elihw_label), Mode(M.DIR)))
                 )
 
-                self._epilog()
-                self._pop_pseudo_return_address()
-                self._postreturn(0)
-
                 self._current_scope = self._current_scope.parent
-            case AST.StatementFor(iter, exp, assign, body):
-                """ for_label: 
+            case AST.StatementFor(_, exp, assign, body):
+                """     *init*
+                    for_label: 
                         pop reg1
                         move 0, reg2
                         cmp reg1, reg2
@@ -249,12 +259,7 @@ class GenerateCodeStack(src.phase.code_generation_base.GenerateCodeBase):
                 ast_node.for_label = self._labels.next("for")
                 ast_node.rof_label = self._labels.next("rof")
 
-                self._precall(
-                    AST.ExpressionList(iter.exp, None, iter.lineno),
-                    self._current_scope.level
-                )
-                self._push_pseudo_return_address()
-                self._prolog(body)
+                self._generate_code(ast_node.init)
 
                 self._append_instruction(
                     Instruction(Op.LABEL,
@@ -294,35 +299,34 @@ class GenerateCodeStack(src.phase.code_generation_base.GenerateCodeBase):
                                 Operand(Target(T.MEM, ast_node.rof_label), Mode(M.DIR)))
                 )
 
-                self._epilog()
-                self._pop_pseudo_return_address
-                self._postreturn(ast_node.number_of_parameters)
-
                 self._current_scope = self._current_scope.parent
             case AST.StatementPrint(exp):
-                """ push argument
-                    precall
+                """ precall
+                    push argument
                     call printf
-                    postreturn
                     remove argument
+                    postreturn
                 """
-                self._generate_code(exp)
-
                 self._append_instruction(
                     Instruction(Op.META, Meta.PRECALL)
                 )
+
+                self._generate_code(exp)
+
                 self._append_instruction(
                     Instruction(Op.META, Meta.CALL_PRINTF)
                 )
-                self._append_instruction(
-                    Instruction(Op.META, Meta.POSTRETURN)
-                )
 
                 self._append_instruction(
                     Instruction(Op.ADD,
                                 Operand(Target(T.IMI, 8), Mode(M.DIR)),
                                 Operand(Target(T.RSP), Mode(M.DIR)))
                 )
+                self._append_instruction(
+                    Instruction(Op.META, Meta.POSTRETURN)
+                )
+            case AST.StatementReturn(AST.ExpressionCall(_, exp_list) as call) if id(call) in self._tail_call_stack[-1]:
+                self._tail_call(exp_list)
             case AST.StatementReturn(exp):
                 self._generate_code(exp)
                 func = self._function_stack[-1]
@@ -333,33 +337,23 @@ class GenerateCodeStack(src.phase.code_generation_base.GenerateCodeBase):
                                     Operand(Target(T.RRT), Mode(M.DIR)))
                     )
 
-                _, symbol_level = self._current_scope.lookup(func.name)
-                level_difference = self._current_scope.level - symbol_level
-
-                self._get_code_block_to_extend().extend(
-                    [Instruction(Op.MOVE,
-                                 Operand(Target(T.RBP), Mode(M.IRL, -7)),
-                                 Operand(Target(T.RBP), Mode(M.DIR)))
-                        for _ in range(level_difference-1)]
-                )
-
                 self._append_instruction(
                     Instruction(Op.JMP,
                                 Operand(Target(T.MEM, func.end_label), Mode(M.DIR)))
                 )
-            case AST.ExpressionIdentifier(identifier):
+            case AST.ExpressionIdentifier(_):
                 """ move rbp, rsl
                     move -2(rsl), rsl - dereference zero or more times
                     push rsl_offset
                 """
-                symbol, symbol_level = self._current_scope.lookup(identifier)
+                symbol, symbol_level = ast_node.binding
                 self._follow_static_link(symbol_level)
 
                 match symbol:
                     case dataclass_symbol.Symbol(kind=NameCategory.PARAMETER, info=info):
                         self._append_instruction(
                             Instruction(Op.PUSH,
-                                        Operand(Target(T.RSL), Mode(M.IRL, -(info + 16))))
+                                        Operand(Target(T.RSL), Mode(M.IRL, -(info + 8))))
                         )
                     case dataclass_symbol.Symbol(kind=NameCategory.VARIABLE, info=info):
                         self._append_instruction(
@@ -369,13 +363,27 @@ class GenerateCodeStack(src.phase.code_generation_base.GenerateCodeBase):
                     case _:
                         raise ValueError(
                             f"Symbol kind, {symbol.kind}, is unknown.")
-            case AST.ExpressionInteger(integer):
+            case AST.ExpressionInteger(integer) if -2**31 <= integer < 2**31:
                 """ push integer
                 """
                 self._append_instruction(
                     Instruction(Op.PUSH,
                                 Operand(Target(T.IMI, integer), Mode(M.DIR)))
                 )
+            case AST.ExpressionInteger(integer):
+                """ move integer, rrt
+                    push rrt
+                """
+                # pushq only takes 32-bit immediates
+                self._append_instruction(
+                    Instruction(Op.MOVE,
+                                Operand(Target(T.IMI, integer), Mode(M.DIR)),
+                                Operand(Target(T.RRT), Mode(M.DIR)))
+                )
+                self._append_instruction(
+                    Instruction(Op.PUSH,
+                                Operand(Target(T.RRT), Mode(M.DIR)))
+                )
             case AST.ExpressionFloat(_, lineno):
                 src.utils.error("code Generation",
                                 "Floats are not implemented, yet.",
@@ -460,22 +468,23 @@ class GenerateCodeStack(src.phase.code_generation_base.GenerateCodeBase):
                     Instruction(Op.LABEL,
                                 Operand(Target(T.MEM, end_label), Mode(M.DIR)))
                 )
-            case AST.ExpressionCall(name, exp_list):
-                """ push arguments
-                    precall
+            case AST.ExpressionCall(_, exp_list) if id(ast_node) in self._tail_call_stack[-1]:
+                self._tail_call(exp_list)
+            case AST.ExpressionCall(_, exp_list):
+                """ precall
+                    push arguments
                     set up ARP
                     call label
-                    remove ARP
+                    remove ARP and arguments
                     postreturn
-                    remove arguments
                     push rrt
                 """
                 # Constant work
-                symbol, symbol_level = self._current_scope.lookup(name)
+                symbol, symbol_level = ast_node.binding
                 func = symbol.info
                 self._ensure_labels(func)
 
-                self._precall(exp_list, symbol_level)
+                self._precall(exp_list, symbol_level, func)
 
                 # Make the call
                 self._append_instruction(
@@ -483,7 +492,7 @@ class GenerateCodeStack(src.phase.code_generation_base.GenerateCodeBase):
                                 Operand(Target(T.MEM, func.start_label), Mode(M.DIR)))
                 )
 
-                self._postreturn(func.number_of_parameters)
+                self._postreturn(func)
 
                 # Put return value on the stack (if any)
                 if symbol.type != "void":
@@ -491,9 +500,9 @@ class GenerateCodeStack(src.phase.code_generation_base.GenerateCodeBase):
                         Instruction(Op.PUSH,
                                     Operand(Target(T.RRT), Mode(M.DIR)))
                     )
-            case AST.ExpressionList(exp, next):
-                self._generate_code(next)
-                self._generate_code(exp)
+            case AST.ExpressionList(exps):
+                for exp in reversed(exps):
+                    self._generate_code(exp)
             case AST.DeclarationVariableList():
                 pass
             case AST.DeclarationVariableInit():
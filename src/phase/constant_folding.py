@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import copy
+from dataclasses import dataclass
+from typing import Optional
+
+import src.dataclass.AST as AST
+import src.dataclass.symbol as dataclass_symbol
+from src.enums.code_generation_enum import Op
+from src.enums.symbols_enum import NameCategory
+
+# Environments map symbols, by identity, to the constant they hold.
+# None is the environment of unreachable code.
+Environment = Optional[dict[int, int]]
+
+
+def _wrap(value: int) -> int:
+    # Two's complement arithmetic of 64-bit registers
+    value &= (1 << 64) - 1
+    return value - (1 << 64) if value >> 63 else value
+
+
+def evaluate(op: Op, lhs: int, rhs: int) -> int or None:
+    """Value of `lhs op rhs` as computed by the generated code,
+    or None if the operation traps, i.e., if `idivq` divides by zero
+    or overflows.
+    """
+
+    match op:
+        case Op.ADD:
+            return _wrap(lhs + rhs)
+        case Op.SUB:
+            return _wrap(lhs - rhs)
+        case Op.MUL:
+            return _wrap(lhs * rhs)
+        case Op.DIV:
+            if rhs == 0 or (lhs == -(1 << 63) and rhs == -1):
+                return None
+            # idivq truncates towards zero
+            quotient = abs(lhs) // abs(rhs)
+            return quotient if (lhs < 0) == (rhs < 0) else -quotient
+        case Op.JE:
+            return int(lhs == rhs)
+        case Op.JNE:
+            return int(lhs != rhs)
+        case Op.JL:
+            return int(lhs < rhs)
+        case Op.JLE:
+            return int(lhs <= rhs)
+        case Op.JG:
+            return int(lhs > rhs)
+        case Op.JGE:
+            return int(lhs >= rhs)
+        case _:
+            raise ValueError(f"Unknown operator: {op}.")
+
+
+@dataclass
+class ASTConstantFolder:
+    """Constant folding and propagation over the resolved AST.
+
+    Binary operations on integers are evaluated with the semantics of
+    the generated code, i.e., wrapping 64-bit arithmetic and division
+    truncating towards zero. Operations that trap are left to runtime.
+
+    Constants are propagated through symbols that are not captured by
+    nested functions, since only assignments of their own function can
+    change them. Branches whose condition folds to a constant are not
+    analysed, the environments of both branches of an if are met, and
+    loops are analysed until the environment at the loop head is stable
+    before their code is rewritten.
+
+    The API exposes `fold_constants`, which takes the resolved AST
+    as parameter.
+    """
+
+    _rewrite: bool = True
+
+    def fold_constants(self, ast_node: AST.AstNode, in_place: bool = False) -> AST.AstNode:
+        """Fold the provided AST.
+
+        The AST is copied first, unless `in_place` is set.
+        """
+
+        if not in_place:
+            ast_node = copy.deepcopy(ast_node)
+
+        self._fold(ast_node, {})
+        return ast_node
+
+    def _tracked(self, symbol: dataclass_symbol.Symbol) -> bool:
+        return symbol.kind is not NameCategory.FUNCTION and not symbol.escaping
+
+    def _meet(self, env1: Environment, env2: Environment) -> Environment:
+        if env1 is None:
+            return env2
+        if env2 is None:
+            return env1
+
+        return {key: value for key, value in env1.items() if env2.get(key) == value}
+
+    def _copy(self, env: Environment) -> Environment:
+        return None if env is None else dict(env)
+
+    def _fold_loop(self, ast_node: AST.StatementWhile or AST.StatementFor, env: Environment, parts: list[AST.AstNode]) -> Environment:
+        # The environment at the loop head is the meet of the entry and
+        # the end of the body, and it only shrinks from one round to the next
+        head = self._copy(env)
+        rewrite, self._rewrite = self._rewrite, False
+
+        while head is not None:
+            body_env = self._copy(head)
+            match self._expression(ast_node.exp, head):
+                case AST.ExpressionInteger(0):
+                    body_env = None
+
+            for part in parts:
+                body_env = self._fold(part, body_env)
+
+            if (new_head := self._meet(env, body_env)) == head:
+                break
+            head = new_head
+
+        self._rewrite = rewrite
+
+        ast_node.exp = exp = self._rewritten(ast_node.exp, self._expression(ast_node.exp, head))
+
+        body_env = self._copy(head)
+        match exp:
+            case AST.ExpressionInteger(0):
+                body_env = None
+            case AST.ExpressionInteger():
+                # The loop is only left by returning
+                head = None
+
+        for part in parts:
+            body_env = self._fold(part, body_env)
+
+        return head
+
+    def _rewritten(self, old: AST.Expression, new: AST.Expression) -> AST.Expression:
+        return new if self._rewrite else old
+
+    def _fold(self, ast_node: AST.AstNode, env: Environment) -> Environment:
+        match ast_node:
+            case AST.Body(decls, stm_list):
+                self._fold(decls, env)
+                return self._fold(stm_list, env)
+            case AST.DeclarationList(decls):
+                for decl in decls:
+                    self._fold(decl, env)
+                return env
+            case AST.DeclarationFunction(_, func):
+                # Functions are folded once, independently of the caller
+                if self._rewrite:
+                    self._fold(func, env)
+                return env
+            case AST.Function(body=body):
+                self._fold(body, {})
+                return env
+            case AST.StatementList(stms):
+                for stm in stms:
+                    env = self._fold(stm, env)
+                return env
+            case AST.StatementAssignment(_, rhs):
+                rhs = ast_node.rhs = self._rewritten(rhs, self._expression(rhs, env))
+
+                symbol, _ = ast_node.binding
+                if env is not None and self._tracked(symbol):
+                    if isinstance(rhs, AST.ExpressionInteger):
+                        env[id(symbol)] = rhs.integer
+                    else:
+                        env.pop(id(symbol), None)
+                return env
+            case AST.StatementIfthenelse(exp, then_part, else_part):
+                exp = ast_node.exp = self._rewritten(exp, self._expression(exp, env))
+
+                then_env, else_env = self._copy(env), self._copy(env)
+                match exp:
+                    case AST.ExpressionInteger(0):
+                        then_env = None
+                    case AST.ExpressionInteger():
+                        else_env = None
+
+                return self._meet(self._fold(then_part, then_env),
+                                  self._fold(else_part, else_env))
+            case AST.StatementWhile(_, body):
+                return self._fold_loop(ast_node, env, [body])
+            case AST.StatementFor(_, _, assign, body):
+                env = self._fold(ast_node.init, env)
+                return self._fold_loop(ast_node, env, [body, assign])
+            case AST.StatementPrint(exp):
+                ast_node.exp = self._rewritten(exp, self._expression(exp, env))
+                return env
+            case AST.StatementReturn(exp):
+                ast_node.exp = self._rewritten(exp, self._expression(exp, env))
+                return None
+            case AST.ExpressionCall():
+                self._expression(ast_node, env)
+                return env
+            case AST.DeclarationVariableList() | AST.DeclarationVariableInit():
+                return env
+            case None:
+                return env
+            case _:
+                raise ValueError(ast_node)
+
+    def _expression(self, ast_node: AST.Expression, env: Environment) -> AST.Expression:
+        match ast_node:
+            case AST.ExpressionIdentifier(_, lineno):
+                symbol, _ = ast_node.binding
+                if env is not None and id(symbol) in env:
+                    return AST.ExpressionInteger(env[id(symbol)], lineno)
+                return ast_node
+            case AST.ExpressionBinop(op, lhs, rhs, lineno):
+                lhs = ast_node.lhs = self._rewritten(lhs, self._expression(lhs, env))
+                rhs = ast_node.rhs = self._rewritten(rhs, self._expression(rhs, env))
+
+                match lhs, rhs:
+                    case AST.ExpressionInteger(left), AST.ExpressionInteger(right):
+                        if (value := evaluate(op, left, right)) is not None:
+                            return AST.ExpressionInteger(value, lineno)
+                    case _, AST.ExpressionInteger(0) if op in [Op.ADD, Op.SUB]:
+                        return lhs
+                    case _, AST.ExpressionInteger(1) if op in [Op.MUL, Op.DIV]:
+                        return lhs
+                    case AST.ExpressionInteger(0), _ if op is Op.ADD:
+                        return rhs
+                    case AST.ExpressionInteger(1), _ if op is Op.MUL:
+                        return rhs
+
+                return ast_node
+            case AST.ExpressionCall(_, AST.ExpressionList(exps)):
+                ast_node.exp_list.exps = [self._rewritten(exp, self._expression(exp, env))
+                                          for exp in exps]
+                return ast_node
+            case AST.ExpressionCall():
+                return ast_node
+            case AST.ExpressionInteger() | AST.ExpressionFloat():
+                return ast_node
+            case None:
+                return ast_node
+            case _:
+                raise ValueError(ast_node)
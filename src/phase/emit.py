@@ -1,18 +1,31 @@
-import copy
+from itertools import repeat
 
 import src.dataclass.iloc as iloc
+import src.dataclass.x86 as x86
 from src.enums.code_generation_enum import M, Meta, Op, T
+from src.phase.peephole import Peephole
 from src.utils.label_generator import Labels
 from src.utils.x86_instruction_enum_dict import intermediate_to_x86
 
+# Colours of the general-purpose registers available to allocation. %rax
+# and %rdx are reserved for results, division and static links.
+REGISTERS = {1: "rbx", 2: "rcx", 3: "rsi", 4: "rdi", 5: "r8", 6: "r9",
+             7: "r10", 8: "r12", 9: "r13", 10: "r14", 11: "r15"}
+ALLOCATABLE_REGISTERS = len(REGISTERS)
+# Registers of the first arguments, as by the System V calling convention
+ARGUMENT_REGISTERS = ["rdi", "rsi", "rdx", "rcx", "r8", "r9"]
+
 
 class Emit:
     """Functionality to translate linear ILOC IR to x86-64 assembly code
 
+    Instructions are collected as x86-64 lines, which are rewritten
+    by the peephole optimiser before they are joined.
+
     The API exposes emit.
     """
 
-    def __init__(self):
+    def __init__(self, peephole: Peephole = None):
         self._callee_save_reg: list[str] = [
             "rbx", "r12", "r13", "r14", "r15", "rbp"]
         self._calleer_save_reg: list[str] = [
@@ -20,9 +33,8 @@ class Emit:
 
         self._labels = Labels()
         self._instruction_indent = 16
-        self._code = []
-        self._reg_scope = []
-        self._registers_on_stack = []
+        self._code: list[x86.Line] = []
+        self._peephole = Peephole() if peephole is None else peephole
 
         self._enum_to_method_map = {
             Meta.CALL_PRINTF: self._call_printf,
@@ -30,31 +42,72 @@ class Emit:
             Meta.EPILOG: self._epilog,
             Meta.PRECALL: self._precall,
             Meta.POSTRETURN: self._postreturn,
-            Meta.RET: self._ret
+            Meta.RET: self._ret,
+            Meta.ARGUMENTS: self._arguments,
+            Meta.PARAMETERS: self._parameters
         }
 
-    def emit(self, iloc_ir: list[iloc.Instruction]) -> str:
+    def emit(self, iloc_ir: iloc.InstructionBuffer or list[iloc.Instruction]) -> str:
         """Translates the ILOC IR to x86-64 assembly instructions.
 
+        Frames of an InstructionBuffer save only the callee-save registers
+        they clobber, whereas a plain list of instructions, which has no
+        scopes, saves all of them in every frame.
+
         The function outputs a string containing the complete program.
         """
 
-        self._program_prologue()
-        list(map(self._dispatch, iloc_ir))
-        self._code.append("\n")
-        return "\n".join(self._code)
+        # Display entries up to the deepest level that is accessed
+        levels = [arg.target.val for ins in iloc_ir for arg in ins.args
+                  if isinstance(arg, iloc.Operand) and arg.target.spec is T.DSP]
+        self._program_prologue(max(levels, default=-1) + 1)
+
+        if isinstance(iloc_ir, iloc.InstructionBuffer):
+            frames, owner = self._clobbered_callee_save_reg(iloc_ir), iloc_ir.owner
+        else:
+            frames, owner = [self._callee_save_reg[:-1]], repeat(0)
+
+        for scope, instruction in zip(owner, iloc_ir):
+            self._frame_callee_save_reg = frames[scope]
+            self._dispatch(instruction)
+
+        self._append_newline()
+        return "\n".join(map(self._render, self._peephole.optimize(self._code))) + "\n"
+
+    def _render(self, line: x86.Line) -> str:
+        match line:
+            case x86.Instruction(mnemonic, operands) if operands:
+                return f"{self._instruction_indent * ' '}{mnemonic} {', '.join(operands)}"
+            case x86.Instruction(mnemonic):
+                return self._instruction_indent * " " + mnemonic
+            case x86.Label(name):
+                return name + ":"
+            case x86.Directive(text, indent=True):
+                return self._instruction_indent * " " + text
+            case x86.Directive(text):
+                return text
+
+    def _clobbered_callee_save_reg(self, iloc_ir: iloc.InstructionBuffer) -> list[list[str]]:
+        # Callee-save registers occupied by the instructions of every scope
+        written = [set() for _ in iloc_ir.scopes()]
+        for scope, instruction in zip(iloc_ir.owner, iloc_ir):
+            written[scope].update(REGISTERS.get(arg.target.val) for arg in instruction.args
+                                  if isinstance(arg, iloc.Operand) and arg.target.spec is T.REG)
+
+        return [[reg for reg in self._callee_save_reg[:-1] if reg in registers]
+                for registers in written]
 
     def _append_label(self, lbl: str) -> None:
-        self._code.append(lbl + ":")
+        self._code.append(x86.Label(lbl))
 
-    def _append_instruction(self, instr_str) -> None:
-        self._code.append(self._instruction_indent * " " + instr_str)
+    def _append_instruction(self, mnemonic: str, *operands: str) -> None:
+        self._code.append(x86.Instruction(mnemonic, operands))
 
     def _append_newline(self) -> None:
-        self._code.append("")
+        self._code.append(x86.Directive(""))
 
     def _append_section(self, section):
-        self._code.append(f".{section}")
+        self._code.append(x86.Directive(f".{section}"))
 
     def _dispatch(self, instruction: iloc.Instruction) -> None:
         # Remove redundant move instructions
@@ -62,36 +115,53 @@ class Emit:
             for arg in instruction.args:
                 if arg.target.spec == T.REG and arg.target.val is None:
                     return
+            if instruction.args[0] == instruction.args[1]:
+                return
 
-        instructions = self._handle_reg_spill(instruction)
-
-        for ins in instructions:
-            match ins:
-                case iloc.Instruction(opcode, args) if opcode in intermediate_to_x86:
-                    line = intermediate_to_x86[opcode]
-                    if len(args) > 0:
-                        line += " " + self._do_operand(args[0])
-                    for i in range(1, len(args)):
-                        line += ", " + self._do_operand(args[i])
-                    self._append_instruction(line)
-                case iloc.Instruction(opcode=Op.DIV, args=args):
-                    # prepare for division
-                    self._append_instruction(
-                        f"movq {self._do_operand(args[1])}, %rax")
-                    # RDX:RAX <- sign-extend of RAX
-                    self._append_instruction("cqo")
-                    # divide
-                    self._append_instruction(
-                        f"idivq {self._do_operand(args[0])}")
-                    # move to destination
-                    self._append_instruction(
-                        f"movq %rax, {self._do_operand(args[1])}")
-                case iloc.Instruction(opcode=Op.LABEL, args=args):
-                    self._append_label(args[0].target.val)
-                case iloc.Instruction(opcode=Op.META, args=method):
-                    self._enum_to_method_map[method[0]]()
-                case _:
-                    raise ValueError(f"Unknown instruction: {instruction}.")
+        match instruction:
+            case iloc.Instruction(opcode=Op.MUL, args=(iloc.Operand(target=iloc.Target(spec=T.IMI, val=val)), target)) \
+                    if val > 0 and val & (val - 1) == 0:
+                # multiplication by 2^n is a left shift
+                if val > 1:
+                    self._append_instruction("salq", f"${val.bit_length() - 1}", self._do_operand(target))
+            case iloc.Instruction(opcode=Op.MUL, args=(iloc.Operand(target=iloc.Target(spec=T.IMI, val=val)), target)) \
+                    if val in [3, 5, 9] and target.target.spec is T.REG:
+                # x * (2^n + 1) = x + x * 2^n
+                reg = self._do_operand(target)
+                self._append_instruction("leaq", f"({reg},{reg},{val - 1})", reg)
+            case iloc.Instruction(opcode=Op.DIV, args=(iloc.Operand(target=iloc.Target(spec=T.IMI, val=val)), target)) \
+                    if val > 1 and val & (val - 1) == 0:
+                # division by 2^n is an arithmetic right shift, after adding
+                # 2^n - 1 to negative dividends to truncate towards zero
+                shift = val.bit_length() - 1
+                self._append_instruction("movq", self._do_operand(target), "%rax")
+                self._append_instruction("sarq", "$63", "%rax")
+                self._append_instruction("shrq", f"${64 - shift}", "%rax")
+                self._append_instruction("addq", "%rax", self._do_operand(target))
+                self._append_instruction("sarq", f"${shift}", self._do_operand(target))
+            case iloc.Instruction(opcode, args) if opcode in intermediate_to_x86:
+                self._append_instruction(intermediate_to_x86[opcode],
+                                         *map(self._do_operand, args))
+            case iloc.Instruction(opcode=Op.DIV, args=args):
+                # prepare for division
+                self._append_instruction("movq", self._do_operand(args[1]), "%rax")
+                # RDX:RAX <- sign-extend of RAX
+                self._append_instruction("cqo")
+                # divide, where idivq takes no immediate divisor
+                if args[0].target.spec is T.IMI:
+                    self._append_instruction("pushq", self._do_operand(args[0]))
+                    self._append_instruction("idivq", "(%rsp)")
+                    self._append_instruction("addq", "$8", "%rsp")
+                else:
+                    self._append_instruction("idivq", self._do_operand(args[0]))
+                # move to destination
+                self._append_instruction("movq", "%rax", self._do_operand(args[1]))
+            case iloc.Instruction(opcode=Op.LABEL, args=args):
+                self._append_label(args[0].target.val)
+            case iloc.Instruction(opcode=Op.META, args=method):
+                self._enum_to_method_map[method[0]](*method[1:])
+            case _:
+                raise ValueError(f"Unknown instruction: {instruction}.")
 
     def _do_operand(self, operand: iloc.Operand) -> str:
         match operand.target:
@@ -107,28 +177,10 @@ class Emit:
                 text = "%rax"
             case iloc.Target(spec=T.RSL):
                 text = "%rdx"
-            case iloc.Target(spec=T.REG, val=1):
-                text = "%rbx"
-            case iloc.Target(spec=T.REG, val=2):
-                text = "%rcx"
-            case iloc.Target(spec=T.REG, val=3):
-                text = "%rsi"
-            case iloc.Target(spec=T.REG, val=4):
-                text = "%rdi"
-            case iloc.Target(spec=T.REG, val=5):
-                text = "%r8"
-            case iloc.Target(spec=T.REG, val=6):
-                text = "%r9"
-            case iloc.Target(spec=T.REG, val=7):
-                text = "%r10"
-            case iloc.Target(spec=T.REG, val=8):
-                text = "%r12"
-            case iloc.Target(spec=T.REG, val=9):
-                text = "%r13"
-            case iloc.Target(spec=T.REG, val=10):
-                text = "%r14"
-            case iloc.Target(spec=T.REG, val=11):
-                text = "%r15"
+            case iloc.Target(spec=T.DSP, val=val):
+                text = f"display+{8*val}(%rip)"
+            case iloc.Target(spec=T.REG, val=val) if val in REGISTERS:
+                text = f"%{REGISTERS[val]}"
             case _:
                 raise ValueError(f"Unkown target: {operand.target}")
 
@@ -143,158 +195,95 @@ class Emit:
         return text
 
 
-########################### REGISTER LOGIC ######################################## REGISTER LOGIC ###########################
-
-    def _handle_reg_spill(self, instruction: iloc.Instruction) -> list[iloc.Instruction]:
-        if instructions := self._check_register_dependent_operations(instruction):
-            return instructions
-
-        instructions.extend(
-            self._check_if_spill_is_needed(instruction)
-        )
-
-        instructions.append(
-            self._make_reference_to_spilled_registers(instruction)
-        )
-
-        return instructions
-
-    def _check_register_dependent_operations(self, instruction: iloc.Instruction) -> list[iloc.Instruction]:
-        instructions = []
-
-        match instruction:
-            case iloc.Instruction(opcode=op, args=(iloc.Operand(target=iloc.Target(spec=T.REG, val=val1)),
-                                                   iloc.Operand(target=iloc.Target(spec=T.REG, val=val2)))) if op in [Op.ADD, Op.SUB, Op.DIV, Op.MUL, Op.CMP]:
-                reg1 = val1
-                reg2 = val2
-
-                if val1 > 9:
-                    reg1 = 10
-                    instructions.append(
-                        iloc.Instruction(Op.MOVE,
-                                         iloc.Operand(iloc.Target(
-                                             T.RSP), iloc.Mode(M.IRL, self._reg_scope[-1][val1] - self._registers_on_stack[-1])),
-                                         iloc.Operand(iloc.Target(T.REG, reg1), iloc.Mode(M.DIR)))
-                    )
-                if val2 > 9:
-                    reg2 = 11
-                    instructions.append(
-                        iloc.Instruction(Op.MOVE,
-                                         iloc.Operand(iloc.Target(
-                                             T.RSP), iloc.Mode(M.IRL, self._reg_scope[-1][val2] - self._registers_on_stack[-1])),
-                                         iloc.Operand(iloc.Target(T.REG, reg2), iloc.Mode(M.DIR)))
-                    )
-
-                instructions.append(
-                    iloc.Instruction(op,
-                                     iloc.Operand(iloc.Target(
-                                         T.REG, reg1), iloc.Mode(M.DIR)),
-                                     iloc.Operand(iloc.Target(T.REG, reg2), iloc.Mode(M.DIR)))
-                )
-
-                if op is not Op.CMP and val2 > 9:
-                    instructions.append(
-                        iloc.Instruction(Op.MOVE,
-                                         iloc.Operand(iloc.Target(
-                                             T.REG, reg2), iloc.Mode(M.DIR)),
-                                         iloc.Operand(iloc.Target(T.RSP), iloc.Mode(M.IRL, self._reg_scope[-1][val2] - self._registers_on_stack[-1])))
-                    )
-
-            # Solution to: Error: too many memory references for `movq'
-            case iloc.Instruction(opcode=Op.MOVE, args=(iloc.Operand(target=iloc.Target(spec=T.RSL)),
-                                                   iloc.Operand(target=iloc.Target(spec=T.REG, val=val)))) if val > 9:
-                
-                instructions.extend(self._check_if_spill_is_needed(instruction))
-
-                instructions.append(
-                    iloc.Instruction(Op.MOVE,
-                        instruction.args[0],
-                        iloc.Operand(iloc.Target(T.REG, 10), iloc.Mode(M.DIR)))
-                )
-
-                instructions.append(
-                    iloc.Instruction(Op.MOVE,
-                        iloc.Operand(iloc.Target(T.REG, 10), iloc.Mode(M.DIR)),
-                        iloc.Operand(iloc.Target(T.RSP), iloc.Mode(M.IRL, self._reg_scope[-1][val] - self._registers_on_stack[-1])))
-                )
-
-        return instructions
-
-    def _check_if_spill_is_needed(self, instruction: iloc.Instruction) -> list[iloc.Instruction]:
-        instructions = []
-
-        match instruction:
-            case iloc.Instruction(opcode=Op.MOVE, args=(iloc.Operand(), iloc.Operand(target=iloc.Target(spec=T.REG, val=val)))) if val > 9:
-                if val not in self._reg_scope[-1]:
-                    self._registers_on_stack[-1] += 1
-                    self._reg_scope[-1][val] = self._registers_on_stack[-1]
-                    instructions.append(
-                        iloc.Instruction(Op.SUB,
-                                         iloc.Operand(iloc.Target(
-                                             T.IMI, 8), iloc.Mode(M.DIR)),
-                                         iloc.Operand(iloc.Target(T.RSP), iloc.Mode(M.DIR)))
-                    )
-
-        return instructions
-
-    def _make_reference_to_spilled_registers(self, instruction: iloc.Instruction) -> iloc.Instruction:
-        instruction = copy.deepcopy(instruction)
-
-        if instruction.opcode is not Op.META and instruction.opcode is not Op.LABEL:
-            for i in range(len(instruction.args)):
-                if instruction.args[i].target.spec == T.REG and instruction.args[i].target.val > 9:
-                    if len(instruction.args) == 1:
-                        val = instruction.args[0].target.val
-                        instruction.args = (iloc.Operand(
-                            iloc.Target(T.RSP), iloc.Mode(M.IRL, self._reg_scope[-1][val] - self._registers_on_stack[-1])),)
-                    elif i == 0:
-                        val = instruction.args[0].target.val
-                        instruction.args = (iloc.Operand(iloc.Target(
-                            T.RSP), iloc.Mode(M.IRL, self._reg_scope[-1][val] - self._registers_on_stack[-1])), instruction.args[1])
-                    else:
-                        val = instruction.args[1].target.val
-                        instruction.args = (instruction.args[0], iloc.Operand(
-                            iloc.Target(T.RSP), iloc.Mode(M.IRL, self._reg_scope[-1][val] - self._registers_on_stack[-1])))
-
-        return instruction
-
 ########################### META ########################### META ########################### META ###########################
 
     def _save_retore_reg(self, mode: str, registers: list or reversed) -> None:
         self._append_newline()
         for reg in registers:
-            self._append_instruction(f"{mode} %{reg}")
+            self._append_instruction(mode, f"%{reg}")
         self._append_newline()
 
+    def _callee_save_slot(self, reg: str) -> int:
+        # Offset from the bottom of the callee-save area, laid out as if
+        # every register had been pushed in order
+        return 8*(len(self._callee_save_reg) - 2 - self._callee_save_reg.index(reg))
+
     def _prolog(self) -> None:
-        self._reg_scope.append({})
-        self._registers_on_stack.append(-1)
-        self._save_retore_reg("pushq", self._callee_save_reg)
-        self._append_instruction("movq %rsp, %rbp")
+        # The callee-save area keeps its size, such that the static link
+        # and parameters are found at fixed offsets, but only registers
+        # clobbered by the frame are stored
+        self._append_newline()
+        self._append_instruction("subq", f"${8*(len(self._callee_save_reg) - 1)}", "%rsp")
+        for reg in self._frame_callee_save_reg:
+            self._append_instruction("movq", f"%{reg}", f"{self._callee_save_slot(reg)}(%rsp)")
+        self._append_instruction("pushq", "%rbp")
+        self._append_newline()
+        self._append_instruction("movq", "%rsp", "%rbp")
         self._append_newline()
 
     def _epilog(self) -> None:
-        self._reg_scope.pop()
-        self._registers_on_stack.pop()
-        self._append_instruction("movq %rbp, %rsp")
-        self._save_retore_reg("popq", reversed(self._callee_save_reg))
+        self._append_instruction("movq", "%rbp", "%rsp")
+        self._append_newline()
+        self._append_instruction("popq", "%rbp")
+        for reg in reversed(self._frame_callee_save_reg):
+            self._append_instruction("movq", f"{self._callee_save_slot(reg)}(%rsp)", f"%{reg}")
+        self._append_instruction("addq", f"${8*(len(self._callee_save_reg) - 1)}", "%rsp")
         self._append_newline()
 
     def _ret(self) -> None:
         self._append_instruction("ret")
 
-    def _precall(self) -> None:
-        self._save_retore_reg("pushq", self._calleer_save_reg)
-
-    def _postreturn(self) -> None:
-        self._save_retore_reg("popq", reversed(self._calleer_save_reg))
-
-    def _program_prologue(self) -> None:
+    def _live_caller_save_reg(self, registers: tuple[iloc.Operand, ...] or None) -> list[str]:
+        # Without liveness information, all caller-save registers are saved
+        if registers is None:
+            return self._calleer_save_reg
+
+        live = {REGISTERS.get(reg.target.val) for reg in registers}
+        return [reg for reg in self._calleer_save_reg if reg in live]
+
+    def _precall(self, registers: tuple[iloc.Operand, ...] = None) -> None:
+        self._save_retore_reg("pushq", self._live_caller_save_reg(registers))
+
+    def _postreturn(self, registers: tuple[iloc.Operand, ...] = None) -> None:
+        self._save_retore_reg("popq", reversed(self._live_caller_save_reg(registers)))
+
+    def _parallel_move(self, moves: list[tuple[str, str]]) -> None:
+        # Moves that read all sources before writing any target. A move
+        # is made once no other move reads its target, and cycles are
+        # broken by saving a source in %rax, which is free at calls
+        moves = [(source, target) for source, target in moves if source != target]
+
+        while moves:
+            for i, (source, target) in enumerate(moves):
+                if all(other != target for other, _ in moves):
+                    self._append_instruction("movq", source, target)
+                    del moves[i]
+                    break
+            else:
+                source = moves[0][0]
+                self._append_instruction("movq", source, "%rax")
+                moves = [("%rax" if other == source else other, target) for other, target in moves]
+
+    def _arguments(self, *registers: iloc.Operand) -> None:
+        self._parallel_move([(self._do_operand(reg), f"%{target}")
+                             for reg, target in zip(registers, ARGUMENT_REGISTERS)])
+
+    def _parameters(self, *registers: iloc.Operand) -> None:
+        # Parameters that are never used have no colour
+        self._parallel_move([(f"%{source}", self._do_operand(reg))
+                             for reg, source in zip(registers, ARGUMENT_REGISTERS)
+                             if reg.target.val is not None])
+
+    def _program_prologue(self, display: int) -> None:
         self._append_section("data")
         self._append_newline()
         self._append_label("form")
-        self._append_instruction('.string "%d\\n"')
+        self._code.append(x86.Directive('.string "%d\\n"', indent=True))
         self._append_newline()
+        if display:
+            self._append_label("display")
+            self._code.append(x86.Directive(f".zero {8*display}", indent=True))
+            self._append_newline()
         self._append_section("text")
         self._append_newline()
         self._append_section("globl main")
@@ -303,35 +292,35 @@ class Emit:
     # * The printf function is borrowed from SCIL.
     def _call_printf(self) -> None:
         # pass 1. argument in %rdi
-        self._append_instruction("leaq form(%rip), %rdi")
-        # By-passing caller save values on the stack:
-        # pass 2. argument in %rsi
-        self._append_instruction(
-            f"movq {8*len(self._calleer_save_reg)}(%rsp), %rsi")
+        self._append_instruction("leaq", "form(%rip)", "%rdi")
+        # pass 2. argument in %rsi, pushed after the caller save values
+        self._append_instruction("movq", "(%rsp)", "%rsi")
         # no floating point registers used
-        self._append_instruction("movq $0, %rax")
+        self._append_instruction("movq", "$0", "%rax")
         # saving stack pointer for change check
-        self._append_instruction("movq %rsp, %rcx")
+        self._append_instruction("movq", "%rsp", "%rcx")
         # aligning stack pointer for call
-        self._append_instruction("andq $-16, %rsp")
-        self._append_instruction("movq $0, %rbx")  # preparing check indicator
+        self._append_instruction("andq", "$-16", "%rsp")
+        # %rdx only holds static links, which are recomputed before use,
+        # whereas %rbx may hold an allocated register
+        self._append_instruction("movq", "$0", "%rdx")  # preparing check indicator
         # checking for alignment change
-        self._append_instruction("cmpq %rsp, %rcx")
+        self._append_instruction("cmpq", "%rsp", "%rcx")
         lbl = self._labels.next("aligned")
-        self._append_instruction(f"je {lbl}")  # jump if correctly aligned
+        self._append_instruction("je", lbl)  # jump if correctly aligned
         # it was not aligned, indicate by '1'
-        self._append_instruction("incq %rbx")
+        self._append_instruction("incq", "%rdx")
         self._append_label(lbl)
-        self._append_instruction("pushq %rbx")  # pushing 0/1 on the stack
-        self._append_instruction("subq $8, %rsp")  # aligning
-        self._append_instruction("callq printf@plt")  # call printf
-        self._append_instruction("addq $8, %rsp")  # revert latest aligning
-        self._append_instruction("popq %rbx")  # get alignment indicator
+        self._append_instruction("pushq", "%rdx")  # pushing 0/1 on the stack
+        self._append_instruction("subq", "$8", "%rsp")  # aligning
+        self._append_instruction("callq", "printf@plt")  # call printf
+        self._append_instruction("addq", "$8", "%rsp")  # revert latest aligning
+        self._append_instruction("popq", "%rdx")  # get alignment indicator
         # checking for alignment change
-        self._append_instruction("cmpq $0, %rbx")
+        self._append_instruction("cmpq", "$0", "%rdx")
         lbl = self._labels.next("aligned")
-        self._append_instruction(f"je {lbl}")  # jump if correctly aligned
+        self._append_instruction("je", lbl)  # jump if correctly aligned
         # revert earlier alignment change
-        self._append_instruction("addq $8, %rsp")
+        self._append_instruction("addq", "$8", "%rsp")
         self._append_label(lbl)
         self._append_newline()
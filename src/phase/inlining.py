@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import copy
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+
+import src.dataclass.AST as AST
+import src.dataclass.symbol as dataclass_symbol
+from src.enums.symbols_enum import NameCategory
+
+
+@dataclass
+class ASTInliner:
+    """Inlining of calls to small functions over the resolved AST.
+
+    Functions whose body is a single return of an expression, without
+    declarations, are inlined by substituting the arguments for the
+    parameters in a copy of that expression. Names of the copy keep
+    their bindings, i.e., symbol and level, so code generation follows
+    the static link from the caller to the same frames. This is sound,
+    since every scope enclosing a function also encloses its callers.
+
+    A function is inlined if its expression, after inlining the calls
+    in it, has at most `max_size` nodes, or if it is called exactly
+    once. Functions that may call themselves, directly or through other
+    functions, are never inlined. A call is kept if substituting its
+    arguments could change their values or side effects, see
+    `_substitutable`, and calls used as statements are kept as well.
+
+    The API exposes `inline_functions`, which takes the resolved AST
+    as parameter, and counts the calls inlined in `inlined`.
+    """
+
+    max_size: int = 12
+    max_argument_size: int = 3
+    inlined: int = 0
+    _calls: Counter = field(default_factory=Counter, repr=False)
+    _callees: defaultdict = field(default_factory=lambda: defaultdict(list), repr=False)
+    _bodies: dict = field(default_factory=dict, repr=False)
+
+    def inline_functions(self, ast_node: AST.AstNode, in_place: bool = False) -> AST.AstNode:
+        """Inline calls in the provided AST.
+
+        The AST is copied first, unless `in_place` is set.
+        """
+
+        if not in_place:
+            ast_node = copy.deepcopy(ast_node)
+
+        self._collect(ast_node, None)
+        self._inline(ast_node)
+        return ast_node
+
+    def _collect(self, ast_node: AST.AstNode, caller: AST.Function) -> None:
+        # Number of calls of every function, and the call graph
+        match ast_node:
+            case AST.Function(body=body):
+                self._collect(body, ast_node)
+            case AST.Body(decls, stm_list):
+                self._collect(decls, caller)
+                self._collect(stm_list, caller)
+            case AST.DeclarationList(nodes) | AST.StatementList(nodes) | AST.ExpressionList(nodes):
+                for node in nodes:
+                    self._collect(node, caller)
+            case AST.DeclarationFunction(_, func):
+                self._collect(func, caller)
+            case AST.StatementAssignment(_, rhs):
+                self._collect(rhs, caller)
+            case AST.StatementIfthenelse(exp, then_part, else_part):
+                self._collect(exp, caller)
+                self._collect(then_part, caller)
+                self._collect(else_part, caller)
+            case AST.StatementWhile(exp, body):
+                self._collect(exp, caller)
+                self._collect(body, caller)
+            case AST.StatementFor(_, exp, assign, body):
+                self._collect(ast_node.init, caller)
+                self._collect(exp, caller)
+                self._collect(assign, caller)
+                self._collect(body, caller)
+            case AST.StatementPrint(exp) | AST.StatementReturn(exp):
+                self._collect(exp, caller)
+            case AST.ExpressionBinop(_, lhs, rhs):
+                self._collect(lhs, caller)
+                self._collect(rhs, caller)
+            case AST.ExpressionCall(_, exp_list):
+                func = ast_node.binding[0].info
+                self._calls[id(func)] += 1
+                self._callees[id(caller)].append(func)
+                self._collect(exp_list, caller)
+            case AST.DeclarationVariableList() | AST.DeclarationVariableInit():
+                pass
+            case AST.ExpressionIdentifier() | AST.ExpressionInteger() | AST.ExpressionFloat():
+                pass
+            case None:
+                pass
+            case _:
+                raise ValueError(ast_node)
+
+    def _recursive(self, func: AST.Function) -> bool:
+        visited = set()
+        stack = list(self._callees[id(func)])
+
+        while stack:
+            callee = stack.pop()
+            if callee is func:
+                return True
+            if id(callee) not in visited:
+                visited.add(id(callee))
+                stack.extend(self._callees[id(callee)])
+
+        return False
+
+    def _body(self, func: AST.Function) -> AST.Expression or None:
+        """Returned expression of `func`, with the calls in it inlined,
+        or None if `func` is not inlined.
+        """
+
+        if id(func) in self._bodies:
+            return self._bodies[id(func)]
+
+        self._bodies[id(func)] = None
+
+        match func.body:
+            case AST.Body(None | AST.DeclarationList([]), AST.StatementList([AST.StatementReturn(AST.Expression() as exp)])):
+                if not self._recursive(func):
+                    exp = self._expression(self._clone(exp, {}, []))
+                    if self._calls[id(func)] == 1 or self._size(exp) <= self.max_size:
+                        self._bodies[id(func)] = exp
+
+        return self._bodies[id(func)]
+
+    def _size(self, exp: AST.Expression) -> int:
+        match exp:
+            case AST.ExpressionBinop(_, lhs, rhs):
+                return 1 + self._size(lhs) + self._size(rhs)
+            case AST.ExpressionCall(_, AST.ExpressionList(exps)):
+                return 1 + sum(map(self._size, exps))
+            case _:
+                return 1
+
+    def _has_call(self, exp: AST.Expression) -> bool:
+        match exp:
+            case AST.ExpressionBinop(_, lhs, rhs):
+                return self._has_call(lhs) or self._has_call(rhs)
+            case AST.ExpressionCall():
+                return True
+            case _:
+                return False
+
+    def _uses(self, exp: AST.Expression, symbol: dataclass_symbol.Symbol) -> int:
+        match exp:
+            case AST.ExpressionIdentifier():
+                return int(exp.binding[0] is symbol)
+            case AST.ExpressionBinop(_, lhs, rhs):
+                return self._uses(lhs, symbol) + self._uses(rhs, symbol)
+            case AST.ExpressionCall(_, AST.ExpressionList(exps)):
+                return sum(self._uses(e, symbol) for e in exps)
+            case _:
+                return 0
+
+    def _substitutable(self, body: AST.Expression, params: list[dataclass_symbol.Symbol], args: list[AST.Expression]) -> bool:
+        """Whether substituting `args` for `params` in `body` evaluates
+        to the value of the call.
+
+        Literals and names that no call can assign, i.e., names that
+        are not captured by nested functions, may be read any number of
+        times. Other names may only be read if the body calls nothing.
+        Any other argument must be free of calls, and be read by a body
+        that calls nothing, either exactly once, or several times if it
+        has at most `max_argument_size` nodes.
+        """
+
+        calls = self._has_call(body)
+
+        for param, arg in zip(params, args):
+            match arg:
+                case AST.ExpressionInteger() | AST.ExpressionFloat():
+                    continue
+                case AST.ExpressionIdentifier():
+                    if not calls or not arg.binding[0].escaping:
+                        continue
+                case _:
+                    uses = self._uses(body, param)
+                    if not calls and not self._has_call(arg) and \
+                            (uses == 1 or (uses > 1 and self._size(arg) <= self.max_argument_size)):
+                        continue
+            return False
+
+        return True
+
+    def _clone(self, exp: AST.Expression, params: dict[int, int], args: list[AST.Expression]) -> AST.Expression:
+        # Copy of `exp` that shares the bindings of its names, where
+        # parameters are replaced by copies of their arguments
+        match exp:
+            case AST.ExpressionIdentifier(identifier, lineno):
+                if (i := params.get(id(exp.binding[0]))) is not None:
+                    return self._clone(args[i], {}, [])
+                clone = AST.ExpressionIdentifier(identifier, lineno)
+                clone.binding = exp.binding
+                return clone
+            case AST.ExpressionBinop(op, lhs, rhs, lineno):
+                return AST.ExpressionBinop(op, self._clone(lhs, params, args), self._clone(rhs, params, args), lineno)
+            case AST.ExpressionCall(name, exp_list, lineno):
+                if exp_list is not None:
+                    exp_list = AST.ExpressionList([self._clone(e, params, args) for e in exp_list.exps],
+                                                  exp_list.lineno)
+                clone = AST.ExpressionCall(name, exp_list, lineno)
+                clone.binding = exp.binding
+                return clone
+            case AST.ExpressionInteger(integer, lineno):
+                return AST.ExpressionInteger(integer, lineno)
+            case AST.ExpressionFloat(value, lineno):
+                return AST.ExpressionFloat(value, lineno)
+            case _:
+                raise ValueError(exp)
+
+    def _expression(self, ast_node: AST.Expression) -> AST.Expression:
+        match ast_node:
+            case AST.ExpressionBinop(_, lhs, rhs):
+                ast_node.lhs = self._expression(lhs)
+                ast_node.rhs = self._expression(rhs)
+                return ast_node
+            case AST.ExpressionCall(_, exp_list):
+                args = []
+                if exp_list is not None:
+                    args = exp_list.exps = [self._expression(exp) for exp in exp_list.exps]
+
+                func = ast_node.binding[0].info
+                if (body := self._body(func)) is None or len(args) != func.number_of_parameters:
+                    return ast_node
+
+                params = sorted((symbol for _, symbol in func.symbol_table.items()
+                                 if symbol.kind is NameCategory.PARAMETER),
+                                key=lambda symbol: symbol.info)
+                if not self._substitutable(body, params, args):
+                    return ast_node
+
+                self.inlined += 1
+                return self._clone(body, {id(param): param.info for param in params}, args)
+            case _:
+                return ast_node
+
+    def _inline(self, ast_node: AST.AstNode) -> None:
+        match ast_node:
+            case AST.Function(body=body):
+                self._inline(body)
+            case AST.Body(decls, stm_list):
+                self._inline(decls)
+                self._inline(stm_list)
+            case AST.DeclarationList(nodes) | AST.StatementList(nodes):
+                for node in nodes:
+                    self._inline(node)
+            case AST.DeclarationFunction(_, func):
+                self._inline(func)
+            case AST.StatementAssignment(_, rhs):
+                ast_node.rhs = self._expression(rhs)
+            case AST.StatementIfthenelse(exp, then_part, else_part):
+                ast_node.exp = self._expression(exp)
+                self._inline(then_part)
+                self._inline(else_part)
+            case AST.StatementWhile(exp, body):
+                ast_node.exp = self._expression(exp)
+                self._inline(body)
+            case AST.StatementFor(_, exp, assign, body):
+                self._inline(ast_node.init)
+                ast_node.exp = self._expression(exp)
+                self._inline(assign)
+                self._inline(body)
+            case AST.StatementPrint(exp) | AST.StatementReturn(exp):
+                ast_node.exp = self._expression(exp)
+            case AST.ExpressionCall(_, exp_list):
+                # Calls used as statements are kept for their effects
+                if exp_list is not None:
+                    exp_list.exps = [self._expression(exp) for exp in exp_list.exps]
+            case AST.DeclarationVariableList() | AST.DeclarationVariableInit():
+                pass
+            case None:
+                pass
+            case _:
+                raise ValueError(ast_node)
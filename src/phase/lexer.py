@@ -1,6 +1,9 @@
+import sys
+
 import ply.lex as lex
 
 import src.utils.error as error
+import src.utils.table_cache as table_cache
 
 reserved = {
     'print': 'PRINT',
@@ -90,4 +93,30 @@ def t_error(t):
         t.lexer.lineno)
 
 
-lexer = lex.lex()
+def _build_lexer() -> lex.Lexer:
+    """Build the lexer, reusing cached tables when available.
+    """
+
+    module = sys.modules[__name__]
+
+    if not table_cache.enabled() or (directory := table_cache.cache_directory()) is None:
+        return lex.lex(module=module)
+
+    lextab = "lextab_" + table_cache.grammar_hash(vars(module), "t_")
+
+    if (tables := table_cache.load_module(directory, lextab)) is not None:
+        return lex.lex(module=module, optimize=True, lextab=tables)
+
+    lexer = lex.lex(module=module)
+
+    temporary = table_cache.temporary_name(lextab)
+    try:
+        lexer.writetab(temporary, directory)
+    except OSError:
+        return lexer
+    table_cache.publish(directory, f"{temporary}.py", f"{lextab}.py")
+
+    return lexer
+
+
+lexer = _build_lexer()
@@ -0,0 +1,94 @@
+import src.phase.allocator
+from src.dataclass.cfg import ControlFlowGraph, registers
+
+
+class LinearScanAllocator(src.phase.allocator.Allocator):
+    """ This class is responsible for assigning colors to instructions
+        by a single scan over live intervals, instead of colouring an
+        interference graph.
+
+        Control flow and liveness analysis are shared with `Allocator`.
+        Every interval is the smallest range of positions covering all
+        points where a register is live, so a single pass in order of
+        interval start suffices to hand out registers. Intervals that
+        do not fit are spilled by the ILOC spill code of `Allocator`.
+
+        The API exposes `perform_register_allocation`.
+    """
+
+    def _live_intervals(self, cfg: ControlFlowGraph, names: list[int]) -> dict[int, list[int]]:
+        # Every instruction occupies two positions, such that a register
+        # used by an instruction may share its colour with the one defined
+        intervals = {}
+        used = set()
+
+        def extend(reg: int, position: int) -> None:
+            if interval := intervals.get(reg):
+                interval[0] = min(interval[0], position)
+                interval[1] = max(interval[1], position)
+            else:
+                intervals[reg] = [position, position]
+
+        position = 0
+        for block in cfg.blocks:
+            if not block.instructions:
+                continue
+
+            end = position + 2*len(block.instructions) - 1
+
+            for reg in registers(block.live_in, names):
+                extend(reg, position)
+            for reg in registers(block.live_out, names):
+                extend(reg, end)
+
+            for ins in block.instructions:
+                defs, uses = ins.def_use()
+                for reg in uses:
+                    extend(reg, position)
+                    used.add(reg)
+                for reg in defs:
+                    extend(reg, position + 1)
+                position += 2
+
+        # Registers that are never used are left uncoloured, and
+        # their definitions are removed by Emit
+        return {reg: interval for reg, interval in intervals.items() if reg in used}
+
+    def _linear_scan(self, intervals: dict[int, list[int]], temporaries: set[int]) -> tuple[dict[int, int], list[int]]:
+        colors = {}
+        spilled = []
+        free = list(range(self._registers_available, 0, -1))
+        active = []
+
+        def expire(active: list, start: int) -> list:
+            for end, reg in active:
+                if end < start:
+                    free.append(colors[reg])
+            return [(end, reg) for end, reg in active if end >= start]
+
+        for reg, (start, end) in sorted(intervals.items(), key=lambda item: (item[1][0], item[0])):
+            active = expire(active, start)
+
+            if not free:
+                # Spill the interval ending last, temporaries of
+                # spill code are kept in registers
+                last_end, last_reg = max((interval for interval in active
+                                          if interval[1] not in temporaries), default=(-1, None))
+
+                if last_reg is not None and (last_end > end or reg in temporaries):
+                    colors[reg] = colors.pop(last_reg)
+                    active.remove((last_end, last_reg))
+                    active.append((end, reg))
+                    reg = last_reg
+
+                spilled.append(reg)
+                continue
+
+            colors[reg] = free.pop()
+            active.append((end, reg))
+
+        return colors, spilled
+
+    def _allocate(self, cfg: ControlFlowGraph, temporaries: set[int]) -> tuple[dict[int, int], list[int]]:
+        names = cfg.liveness()
+        return self._linear_scan(self._live_intervals(cfg, names), temporaries)
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import copy
+from collections import defaultdict
+from dataclasses import dataclass
+
+import src.phase.allocator
+from src.dataclass.cfg import ControlFlowGraph, registers
+from src.dataclass.iloc import Instruction, InstructionBuffer, Mode, Operand, Target
+from src.enums.code_generation_enum import M, Op, T
+from src.phase.loops import Line, LoopOptimizer
+
+
+@dataclass
+class LoopInvariantCodeMotion(LoopOptimizer):
+    """Loop-invariant code motion on register ILOC, before allocation.
+
+    Loops are visited as described by `LoopOptimizer`, and code is
+    hoisted into their preheaders.
+
+    Static-link walks in a loop, i.e., RBP followed by loads of the
+    static link into RSL, and loads of display entries into RSL, are
+    computed once in the preheader into a new register, and the loads,
+    stores and pushes through RSL use that register instead. Walks of
+    length zero use RBP directly. Display entries are restored by every
+    callee, and thus invariant as well.
+
+    Then a register is hoisted with all of its definitions in the loop,
+    if they are in one block, compute it from immediates and from
+    registers that are not defined in the loop or hoisted before, and
+    the register is neither live at the header nor at any exit. Loads
+    of variables are invariant if the loop neither stores nor calls.
+    Division is never hoisted, since it may trap.
+
+    The API exposes `hoist_invariants`, and counts the instructions
+    removed from loops in `hoisted`.
+    """
+
+    hoisted: int = 0
+
+    def hoist_invariants(self, code: InstructionBuffer, in_place: bool = False) -> InstructionBuffer:
+        """Hoist loop invariants of every scope of `code`.
+
+        The code is copied first, unless `in_place` is set.
+        """
+
+        return self._optimize(code, in_place)
+
+    def _optimize_loop(self, lines: list[Line], cfg: ControlFlowGraph, starts: list[int],
+                       header: int, body: set[int]) -> list[Line]:
+        lines = self._hoist_walks(lines, cfg, starts, header, body)
+        return self._hoist_definitions(lines, header, body)
+
+    def _uses_static_link(self, ins: Instruction) -> bool:
+        return any(isinstance(arg, Operand) and arg.target.spec is T.RSL and
+                   (arg.addressing.mode is M.IRL or len(ins.args) == 1)
+                   for arg in ins.args)
+
+    def _rebase(self, ins: Instruction, frame: Target) -> Instruction:
+        # Operands are renamed in place by allocation, thus never shared
+        return Instruction(ins.opcode, *(Operand(Target(frame.spec, frame.val), arg.addressing)
+                                         if isinstance(arg, Operand) and arg.target.spec is T.RSL else arg
+                                         for arg in ins.args))
+
+    def _hoist_walks(self, lines: list[Line], cfg: ControlFlowGraph, starts: list[int], header: int, body: set[int]) -> list[Line]:
+        walk_start = Instruction(Op.MOVE, Operand(Target(T.RBP), Mode(M.DIR)), Operand(Target(T.RSL), Mode(M.DIR)))
+        walk_step = Instruction(Op.MOVE, Operand(Target(T.RSL), Mode(M.IRL, -7)), Operand(Target(T.RSL), Mode(M.DIR)))
+
+        lines = list(lines)
+        frames, preheader, removed = {}, [], set()
+
+        for index in body:
+            i, end = starts[index], starts[index] + len(cfg.blocks[index].instructions)
+
+            while i < end:
+                # Walks are identified by their length, and display
+                # loads by their level
+                match lines[i][1]:
+                    case Instruction(opcode=Op.MOVE, args=(Operand(target=Target(spec=T.DSP, val=level)),
+                                                           Operand(target=Target(spec=T.RSL)))):
+                        j, walk = i + 1, ("display", level)
+                    case ins if ins == walk_start:
+                        j = i + 1
+                        while j < end and lines[j][1] == walk_step:
+                            j += 1
+                        walk = j - i - 1
+                    case _:
+                        i += 1
+                        continue
+
+                users = j
+                while users < end and self._uses_static_link(lines[users][1]):
+                    users += 1
+
+                if users > j:
+                    if walk == 0:
+                        frame = Target(T.RBP)
+                    else:
+                        if walk not in frames:
+                            frames[walk] = self._new_register()
+                            preheader += [copy.deepcopy(ins) for _, ins in lines[i:j]]
+                            preheader.append(Instruction(Op.MOVE, Operand(Target(T.RSL), Mode(M.DIR)),
+                                                         Operand(Target(T.REG, frames[walk]), Mode(M.DIR))))
+                        frame = Target(T.REG, frames[walk])
+
+                    removed.update(range(i, j))
+                    for k in range(j, users):
+                        lines[k] = (lines[k][0], self._rebase(lines[k][1], frame))
+
+                i = max(users, i + 1)
+
+        self.hoisted += len(removed)
+
+        return self._with_preheader(lines, starts[header], preheader, removed)
+
+    def _stores(self, ins: Instruction) -> bool:
+        return ins.opcode is Op.CALL or (len(ins.args) == 2 and isinstance(ins.args[1], Operand)
+                                         and ins.args[1].addressing.mode is M.IRL)
+
+    def _invariant_group(self, lines: list[Line], positions: list[int], reg: int, defined: dict[int, list[int]],
+                         hoisted: set[int], memory: bool) -> bool:
+        # Whether the definitions of `reg` at `positions` of one block
+        # compute a value that is the same in every iteration
+        for position in positions:
+            ins = lines[position][1]
+            if ins.opcode not in src.phase.allocator.PURE or ins.args[1].addressing.mode is not M.DIR:
+                return False
+
+            operand = ins.args[0]
+            match operand.target.spec, operand.addressing.mode:
+                case T.IMI, _:
+                    pass
+                case T.REG, M.DIR if operand.target.val == reg:
+                    pass
+                case T.REG, mode if mode is M.DIR or memory:
+                    if operand.target.val in defined and operand.target.val not in hoisted:
+                        return False
+                case T.RBP, M.IRL if memory:
+                    pass
+                case _:
+                    return False
+
+        # Nothing else reads or writes the register while it is computed
+        group = set(positions)
+        for position in range(positions[0], positions[-1]):
+            if position not in group and reg in sum(lines[position][1].def_use(), ()):
+                return False
+
+        return True
+
+    def _hoist_definitions(self, lines: list[Line], header: int, body: set[int]) -> list[Line]:
+        cfg, starts = self._build(lines)
+        names = cfg.liveness()
+
+        live = registers(cfg.blocks[header].live_in, names)
+        for index in body:
+            for succ in cfg.blocks[index].succ:
+                if succ not in body:
+                    live |= registers(cfg.blocks[succ].live_in, names)
+
+        defined = defaultdict(list)
+        block_of = {}
+        memory = True
+
+        for index in sorted(body):
+            for position in range(starts[index], starts[index] + len(cfg.blocks[index].instructions)):
+                ins = lines[position][1]
+                memory = memory and not self._stores(ins)
+                block_of[position] = index
+                for reg in ins.def_use()[0]:
+                    defined[reg].append(position)
+
+        hoisted, moved = set(), []
+        changed = True
+
+        while changed:
+            changed = False
+            for reg, positions in defined.items():
+                if reg in hoisted or reg in live or len({block_of[p] for p in positions}) != 1:
+                    continue
+                if self._invariant_group(lines, positions, reg, defined, hoisted, memory):
+                    hoisted.add(reg)
+                    moved += positions
+                    changed = True
+
+        self.hoisted += len(moved)
+
+        return self._with_preheader(lines, starts[header], [lines[position][1] for position in moved], set(moved))
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import copy
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from src.dataclass.cfg import JUMPS, ControlFlowGraph
+from src.dataclass.iloc import Instruction, InstructionBuffer, Operand, Target
+from src.enums.code_generation_enum import Op, T
+
+# A line is an instruction of a scope, with the position of the
+# instruction it originates from
+Line = tuple[int, Instruction]
+
+
+@dataclass
+class LoopOptimizer(ABC):
+    """Base of the optimisations of natural loops in register ILOC.
+
+    Every scope is rewritten as a list of lines, and its loops are
+    visited from the innermost out, recognised by the label instruction
+    of their header, which survives the rewriting of other loops. Code
+    placed in the preheader of a loop goes right before that label,
+    which is only reached by falling through from the code before the
+    loop, since loops are compiled as a label followed by the condition
+    and the body, which jumps back. Loops without such a preheader are
+    left alone.
+
+    Subclasses implement `_optimize_loop`, and may extend
+    `_optimize_scope`.
+    """
+
+    _next_register: int = field(default=0, repr=False)
+
+    def _optimize(self, code: InstructionBuffer, in_place: bool) -> InstructionBuffer:
+        if not in_place:
+            code = copy.deepcopy(code)
+
+        self._next_register = 1 + max((arg.target.val for ins in code for arg in ins.args
+                                       if isinstance(arg, Operand) and arg.target.spec is T.REG), default=0)
+        replacements = {}
+
+        for scope in code.scopes():
+            indices = code.scope_indices(scope)
+            lines = self._optimize_scope(list(enumerate(code.scope(scope))))
+
+            groups = defaultdict(list)
+            for origin, ins in lines:
+                groups[origin].append(ins)
+
+            for i, index in enumerate(indices):
+                group = groups.get(i, [])
+                if len(group) != 1 or group[0] is not code[index]:
+                    replacements[index] = group
+
+        code.expand(replacements)
+        return code
+
+    def _new_register(self) -> int:
+        self._next_register += 1
+        return self._next_register - 1
+
+    def _build(self, lines: list[Line]) -> tuple[ControlFlowGraph, list[int]]:
+        # Graph of the lines, and the position of the first line of every block
+        cfg = ControlFlowGraph.build([ins for _, ins in lines])
+        starts, position = [], 0
+
+        for block in cfg.blocks:
+            starts.append(position)
+            position += len(block.instructions)
+
+        return cfg, starts
+
+    def _optimize_scope(self, lines: list[Line]) -> list[Line]:
+        done = set()
+
+        while True:
+            cfg, starts = self._build(lines)
+            loops = [(len(body), header, body) for header, body in cfg.loops().items()
+                     if id(cfg.blocks[header].instructions[0]) not in done]
+
+            if not loops:
+                return lines
+
+            _, header, body = min(loops, key=lambda loop: loop[:2])
+            done.add(id(cfg.blocks[header].instructions[0]))
+
+            if self._preheader(cfg, header, body) is not None:
+                lines = self._optimize_loop(lines, cfg, starts, header, body)
+
+    @abstractmethod
+    def _optimize_loop(self, lines: list[Line], cfg: ControlFlowGraph, starts: list[int],
+                       header: int, body: set[int]) -> list[Line]:
+        pass
+
+    def _preheader(self, cfg: ControlFlowGraph, header: int, body: set[int]) -> int or None:
+        # The block falling through to the header, if it is the only
+        # way into the loop
+        label = cfg.blocks[header].instructions[0]
+
+        if label.opcode is not Op.LABEL:
+            return None
+        if [pred for pred in cfg.blocks[header].pred if pred not in body] != [header - 1]:
+            return None
+
+        match cfg.blocks[header - 1].instructions[-1:]:
+            case [Instruction(opcode=op, args=(Operand(target=Target(val=target)), ))] if op in JUMPS:
+                if target == label.args[0].target.val:
+                    return None
+
+        return header - 1
+
+    def _with_preheader(self, lines: list[Line], label: int, preheader: list[Instruction],
+                        removed: set[int] = frozenset()) -> list[Line]:
+        # Lines without the `removed` positions, and with `preheader`
+        # right before the label at position `label`
+        return [line for position, line in enumerate(lines[:label]) if position not in removed] + \
+            [(lines[label][0], ins) for ins in preheader] + \
+            [line for position, line in enumerate(lines[label:], label) if position not in removed]
@@ -1,9 +1,13 @@
+import os
+import sys
+
 import ply.yacc as yacc
 
 import src.dataclass.AST as AST
 import src.phase.lexer
 import src.utils.error as error
 import src.utils.interfacing_parser as interfacing_parser
+import src.utils.table_cache as table_cache
 from src.enums.code_generation_enum import Op
 
 tokens = src.phase.lexer.tokens
@@ -40,11 +44,12 @@ def p_optional_declaration(t):
 
 def p_declaration_list(t):
     '''declaration_list : declaration
-                        | declaration declaration_list'''
+                        | declaration_list declaration'''
     if len(t) == 2:
-        t[0] = AST.DeclarationList(t[1], None, t.lexer.lineno)
+        t[0] = AST.DeclarationList([t[1]], t.lexer.lineno)
     else:
-        t[0] = AST.DeclarationList(t[1], t[2], t.lexer.lineno)
+        t[1].decls.append(t[2])
+        t[0] = t[1]
 
 
 def p_declaration(t):
@@ -72,11 +77,12 @@ def p_variable_init_declaration(t):
 
 def p_variables_list(t):
     '''variable_list : IDENT
-                      | IDENT COMMA variable_list'''
+                      | variable_list COMMA IDENT'''
     if len(t) == 2:
-        t[0] = AST.VariableList(t[1], None, t.lexer.lineno)
+        t[0] = AST.VariableList([t[1]], t.lexer.lineno)
     else:
-        t[0] = AST.VariableList(t[1], t[3], t.lexer.lineno)
+        t[1].names.append(t[3])
+        t[0] = t[1]
 
 
 def p_function(t):
@@ -97,11 +103,12 @@ def p_optional_parameter_list(t):
 
 def p_parameter_list(t):
     '''parameter_list : param
-                      | param COMMA parameter_list'''
+                      | parameter_list COMMA param'''
     if len(t) == 2:
-        t[0] = AST.ParameterList(t[1], None, t.lexer.lineno)
+        t[0] = AST.ParameterList([t[1]], t.lexer.lineno)
     else:
-        t[0] = AST.ParameterList(t[1], t[3], t.lexer.lineno)
+        t[1].params.append(t[3])
+        t[0] = t[1]
 
 
 def p_param(t):
@@ -124,11 +131,12 @@ def p_optional_statement_list(t):
 
 def p_statement_list(t):
     '''statement_list : statement
-                    | statement statement_list'''
+                    | statement_list statement'''
     if len(t) == 2:
-        t[0] = AST.StatementList(t[1], None, t.lexer.lineno)
+        t[0] = AST.StatementList([t[1]], t.lexer.lineno)
     else:
-        t[0] = AST.StatementList(t[1], t[2], t.lexer.lineno)
+        t[1].stms.append(t[2])
+        t[0] = t[1]
 
 
 def p_statement(t):
@@ -246,11 +254,12 @@ def p_optional_expression_list(t):
 
 def p_expression_list(t):
     '''expression_list : expression
-                       | expression COMMA expression_list'''
+                       | expression_list COMMA expression'''
     if len(t) == 2:
-        t[0] = AST.ExpressionList(t[1], None, t.lexer.lineno)
+        t[0] = AST.ExpressionList([t[1]], t.lexer.lineno)
     else:
-        t[0] = AST.ExpressionList(t[1], t[3], t.lexer.lineno)
+        t[1].exps.append(t[3])
+        t[0] = t[1]
 
 
 def p_error(t):
@@ -266,4 +275,32 @@ def p_error(t):
         location)
 
 
-parser = yacc.yacc()
+def _build_parser() -> yacc.LRParser:
+    """Build the LALR parser, reusing pickled tables when available.
+
+    Neither `parser.out` nor `parsetab.py` is written to the source tree.
+    """
+
+    module = sys.modules[__name__]
+
+    if not table_cache.enabled() or (directory := table_cache.cache_directory()) is None:
+        return yacc.yacc(module=module, debug=False, write_tables=False)
+
+    parsetab = "parsetab_" + table_cache.grammar_hash(vars(module), "p_") + ".pickle"
+
+    if os.path.exists(path := os.path.join(directory, parsetab)):
+        try:
+            return yacc.yacc(module=module, debug=False, write_tables=False,
+                             picklefile=path)
+        except Exception:
+            pass  # Corrupted cache entry, rebuild it below
+
+    temporary = table_cache.temporary_name(parsetab)
+    parser = yacc.yacc(module=module, debug=False, write_tables=False,
+                       picklefile=os.path.join(directory, temporary))
+    table_cache.publish(directory, temporary, parsetab)
+
+    return parser
+
+
+parser = _build_parser()
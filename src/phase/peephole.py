@@ -0,0 +1,163 @@
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Callable
+
+from src.dataclass.x86 import Instruction, Label, Line, is_blank, is_memory, is_register
+
+JUMPS = ["jmp", "je", "jne", "jl", "jle", "jg", "jge"]
+
+
+@dataclass(frozen=True)
+class Rule:
+    """Rewrite of `size` consecutive lines, blank lines excluded
+
+    `rewrite` returns the replacement lines, which must be fewer than
+    the lines of the window, or None if the rule does not apply.
+    """
+
+    name: str
+    size: int
+    rewrite: Callable[[list[Line]], list[Line] or None]
+
+
+def _push_pop(window: list[Line]) -> list[Line] or None:
+    match window:
+        case [Instruction("pushq", (source, )), Instruction("popq", (target, ))]:
+            if source == target:
+                return []
+            if not (is_memory(source) and is_memory(target)):
+                return [Instruction("movq", (source, target))]
+
+
+def _pop_push(window: list[Line]) -> list[Line] or None:
+    match window:
+        case [Instruction("popq", (target, )), Instruction("pushq", (source, ))] if source == target and is_register(target):
+            return [Instruction("movq", ("(%rsp)", target))]
+
+
+def _stack_adjustment(line: Line) -> int or None:
+    match line:
+        case Instruction("addq", (immediate, "%rsp")) if immediate.startswith("$"):
+            return int(immediate[1:])
+        case Instruction("subq", (immediate, "%rsp")) if immediate.startswith("$"):
+            return -int(immediate[1:])
+
+
+def _zero_stack_adjustment(window: list[Line]) -> list[Line] or None:
+    if _stack_adjustment(window[0]) == 0:
+        return []
+
+
+def _merge_stack_adjustments(window: list[Line]) -> list[Line] or None:
+    first, second = map(_stack_adjustment, window)
+
+    if first is None or second is None:
+        return None
+
+    if first + second < 0:
+        return [Instruction("subq", (f"${-(first + second)}", "%rsp"))]
+    return [Instruction("addq", (f"${first + second}", "%rsp"))]
+
+
+def _jump_to_next(window: list[Line]) -> list[Line] or None:
+    match window:
+        case [Instruction(jump, (target, )), Label(name) as label] if jump in JUMPS and target == name:
+            return [label]
+
+
+def _self_move(window: list[Line]) -> list[Line] or None:
+    match window:
+        case [Instruction("movq", (source, target))] if source == target:
+            return []
+
+
+def _move_back(window: list[Line]) -> list[Line] or None:
+    # The second move writes back what the first read, unless the
+    # first overwrote a register its source is addressed by
+    match window:
+        case [Instruction("movq", (source, target)) as move, Instruction("movq", (back_source, back_target))] \
+                if (back_source, back_target) == (target, source) and target not in source:
+            return [move]
+
+
+def _overwritten_move(window: list[Line]) -> list[Line] or None:
+    # The second move neither reads the register nor is it affected
+    # by the first, which therefore has no effect
+    match window:
+        case [Instruction("movq", (_, target)), Instruction("movq", (source, second_target)) as move] \
+                if target == second_target and is_register(target) and target not in source:
+            return [move]
+
+
+RULES = [
+    Rule("push/pop", 2, _push_pop),
+    Rule("pop/push", 2, _pop_push),
+    Rule("zero stack adjustment", 1, _zero_stack_adjustment),
+    Rule("stack adjustments", 2, _merge_stack_adjustments),
+    Rule("jump to next", 2, _jump_to_next),
+    Rule("self move", 1, _self_move),
+    Rule("move back", 2, _move_back),
+    Rule("overwritten move", 2, _overwritten_move),
+]
+
+
+@dataclass
+class Peephole:
+    """Peephole optimisation of x86-64 lines.
+
+    Lines are appended one at a time, and after every instruction each
+    rule is tried on the window ending with it. The replacement of a
+    matching window is fed back as input, such that it may complete
+    further windows, e.g., nested pushes and pops. Rules only apply to
+    consecutive instructions, so labels delimit windows, and the flags
+    set by `addq` and `subq` are assumed to be read only right after a
+    comparison.
+
+    The API exposes `optimize`, and the number of windows rewritten by
+    every rule is counted in `applied`.
+    """
+
+    rules: list[Rule] = field(default_factory=lambda: list(RULES))
+    applied: Counter = field(default_factory=Counter)
+
+    def _window_start(self, code: list[Line], size: int) -> int or None:
+        # Index of the first of the last `size` lines that are not blank
+        for i in range(len(code) - 1, -1, -1):
+            if not is_blank(code[i]):
+                size -= 1
+                if size == 0:
+                    return i
+
+        return None
+
+    def optimize(self, code: list[Line]) -> list[Line]:
+        """Rewrite `code` until no rule applies.
+        """
+
+        optimized = []
+        pending = list(reversed(code))
+
+        while pending:
+            line = pending.pop()
+            optimized.append(line)
+
+            if not isinstance(line, Instruction | Label):
+                continue
+
+            for rule in self.rules:
+                start = self._window_start(optimized, rule.size)
+                if start is None:
+                    continue
+
+                replacement = rule.rewrite([line for line in optimized[start:] if not is_blank(line)])
+                if replacement is None:
+                    continue
+
+                del optimized[start:]
+                pending.extend(reversed(replacement))
+                self.applied[rule.name] += 1
+                break
+
+        return optimized
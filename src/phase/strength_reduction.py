@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+
+from src.dataclass.cfg import ControlFlowGraph
+from src.dataclass.iloc import Instruction, InstructionBuffer, Mode, Operand, Target
+from src.enums.code_generation_enum import M, Op, T
+from src.phase.loops import Line, LoopOptimizer
+
+# Instructions whose first operand may be an immediate
+IMMEDIATE_OPERAND = [Op.MOVE, Op.PUSH, Op.CMP, Op.ADD, Op.SUB, Op.MUL]
+
+
+def _wrap(value: int) -> int:
+    # Two's complement arithmetic of 64-bit registers
+    value &= (1 << 64) - 1
+    return value - (1 << 64) if value >> 63 else value
+
+
+def _immediate(value: int) -> bool:
+    # x86-64 instructions take sign-extended 32-bit immediates
+    return -(1 << 31) <= value < (1 << 31)
+
+
+def _power_of_two(value: int) -> bool:
+    return value > 1 and value & (value - 1) == 0
+
+
+def _register(reg: int) -> Operand:
+    return Operand(Target(T.REG, reg), Mode(M.DIR))
+
+
+@dataclass
+class StrengthReducer(LoopOptimizer):
+    """Strength reduction on register ILOC, before allocation.
+
+    Registers defined once, by a move of an immediate that dominates
+    their uses, are replaced by the immediate in moves, pushes,
+    comparisons and arithmetic, and in divisions by powers of two.
+    `Emit` turns multiplications by immediates into shifts or `leaq`
+    where possible, and divisions into shifts. Increments, i.e., a copy
+    of a register, an addition or subtraction of an immediate and a
+    copy back, become a single addition or subtraction.
+
+    In loops, visited as described by `LoopOptimizer`, a basic
+    induction variable is a register whose definitions in the loop all
+    add or subtract immediates, like the iterator of a for loop or the
+    counter of a while loop. A product of an induction variable and an
+    immediate is computed once in the preheader into a new register,
+    which is advanced by the product of the step after every step of
+    the induction variable, such that the multiplication in the loop
+    becomes a move.
+
+    The API exposes `reduce_strength`, and the number of rewrites of
+    every kind is counted in `reduced`.
+    """
+
+    reduced: Counter = field(default_factory=Counter)
+
+    def reduce_strength(self, code: InstructionBuffer, in_place: bool = False) -> InstructionBuffer:
+        """Reduce the strength of every scope of `code`.
+
+        The code is copied first, unless `in_place` is set.
+        """
+
+        return self._optimize(code, in_place)
+
+    def _optimize_scope(self, lines: list[Line]) -> list[Line]:
+        lines = self._forward_immediates(lines)
+        lines = self._increments(lines)
+        return super()._optimize_scope(lines)
+
+    def _forward_immediates(self, lines: list[Line]) -> list[Line]:
+        cfg, _ = self._build(lines)
+        idom = cfg.dominators()
+        block_of = [index for index, block in enumerate(cfg.blocks) for _ in block.instructions]
+
+        definitions, constants = Counter(), {}
+        for position, (_, ins) in enumerate(lines):
+            definitions.update(ins.def_use()[0])
+            match ins:
+                case Instruction(opcode=Op.MOVE, args=(Operand(target=Target(spec=T.IMI, val=value)),
+                                                       Operand(target=Target(spec=T.REG, val=reg), addressing=Mode(mode=M.DIR)))):
+                    if _immediate(value):
+                        constants[reg] = position
+
+        lines = list(lines)
+        for position, (origin, ins) in enumerate(lines):
+            match ins.args[:1]:
+                case [Operand(target=Target(spec=T.REG, val=reg), addressing=Mode(mode=M.DIR))] \
+                        if definitions[reg] == 1 and reg in constants:
+                    definition = constants[reg]
+                    value = lines[definition][1].args[0].target.val
+                case _:
+                    continue
+
+            if ins.opcode not in IMMEDIATE_OPERAND and not (ins.opcode is Op.DIV and _power_of_two(value)):
+                continue
+
+            if block_of[definition] == block_of[position]:
+                if definition > position:
+                    continue
+            elif not cfg.dominates(idom, block_of[definition], block_of[position]):
+                continue
+
+            lines[position] = (origin, Instruction(ins.opcode, Operand(Target(T.IMI, value), Mode(M.DIR)), *ins.args[1:]))
+            self.reduced["immediate operands"] += 1
+
+        return lines
+
+    def _increments(self, lines: list[Line]) -> list[Line]:
+        # Number of instructions reading or writing every register
+        occurrences = Counter()
+        for _, ins in lines:
+            occurrences.update(set(sum(ins.def_use(), ())))
+
+        increments = {}
+        for position in range(len(lines) - 2):
+            match [ins for _, ins in lines[position:position + 3]]:
+                case [Instruction(opcode=Op.MOVE, args=(Operand(target=Target(spec=T.REG, val=reg), addressing=Mode(mode=M.DIR)),
+                                                        Operand(target=Target(spec=T.REG, val=temporary), addressing=Mode(mode=M.DIR)))),
+                      Instruction(opcode=Op.ADD | Op.SUB as op, args=(Operand(target=Target(spec=T.IMI)) as step,
+                                                                      Operand(target=Target(spec=T.REG, val=target), addressing=Mode(mode=M.DIR)))),
+                      Instruction(opcode=Op.MOVE, args=(Operand(target=Target(spec=T.REG, val=source), addressing=Mode(mode=M.DIR)),
+                                                        Operand(target=Target(spec=T.REG, val=back), addressing=Mode(mode=M.DIR))))] \
+                        if temporary == target == source and back == reg != temporary and occurrences[temporary] == 3 \
+                        and position - 1 not in increments and position - 2 not in increments:
+                    increments[position] = Instruction(op, step, _register(reg))
+
+        self.reduced["increments"] += len(increments)
+
+        rewritten = []
+        for position, line in enumerate(lines):
+            if position in increments:
+                rewritten.append((line[0], increments[position]))
+            elif position - 1 not in increments and position - 2 not in increments:
+                rewritten.append(line)
+
+        return rewritten
+
+    def _optimize_loop(self, lines: list[Line], cfg: ControlFlowGraph, starts: list[int],
+                       header: int, body: set[int]) -> list[Line]:
+        positions = [position for index in sorted(body)
+                     for position in range(starts[index], starts[index] + len(cfg.blocks[index].instructions))]
+
+        defined = defaultdict(list)
+        for position in positions:
+            for reg in lines[position][1].def_use()[0]:
+                defined[reg].append(position)
+
+        # Steps of the basic induction variables, by position
+        steps = {}
+        for reg, definitions in defined.items():
+            step = {}
+            for position in definitions:
+                match lines[position][1]:
+                    case Instruction(opcode=Op.ADD | Op.SUB as op, args=(Operand(target=Target(spec=T.IMI, val=value)),
+                                                                         Operand(addressing=Mode(mode=M.DIR)))):
+                        step[position] = value if op is Op.ADD else -value
+                    case _:
+                        break
+            else:
+                steps[reg] = step
+
+        # Products of an induction variable and an immediate, by the
+        # position of the copy of the variable
+        products = {}
+        for position in positions[:-1]:
+            match lines[position][1], lines[position + 1][1]:
+                case (Instruction(opcode=Op.MOVE, args=(Operand(target=Target(spec=T.REG | T.IMI as spec, val=first), addressing=Mode(mode=M.DIR)),
+                                                        Operand(target=Target(spec=T.REG, val=temporary), addressing=Mode(mode=M.DIR)))),
+                      Instruction(opcode=Op.MUL, args=(Operand(target=Target(spec=T.REG | T.IMI as other_spec, val=second), addressing=Mode(mode=M.DIR)),
+                                                       Operand(target=Target(spec=T.REG, val=target))))) if temporary == target:
+                    match (spec, first), (other_spec, second):
+                        case ((T.REG, reg), (T.IMI, factor)) | ((T.IMI, factor), (T.REG, reg)):
+                            pass
+                        case _:
+                            continue
+                case _:
+                    continue
+
+            if reg in steps and reg != temporary and all(_immediate(_wrap(step * factor)) for step in steps[reg].values()):
+                products[position] = (reg, factor)
+
+        if not products:
+            return lines
+
+        derived, preheader = {}, []
+        for reg, factor in products.values():
+            if (reg, factor) not in derived:
+                derived[reg, factor] = derived_reg = self._new_register()
+                preheader += [Instruction(Op.MOVE, _register(reg), _register(derived_reg)),
+                              Instruction(Op.MUL, Operand(Target(T.IMI, factor), Mode(M.DIR)), _register(derived_reg))]
+
+        self.reduced["induction variables"] += len(products)
+
+        rewritten = []
+        for position, (origin, ins) in enumerate(lines):
+            if position == starts[header]:
+                rewritten += [(origin, ins) for ins in preheader]
+
+            if position in products:
+                rewritten.append((origin, Instruction(Op.MOVE, _register(derived[products[position]]),
+                                                      _register(ins.args[1].target.val))))
+                continue
+            if position - 1 in products:
+                continue
+
+            rewritten.append((origin, ins))
+
+            for (reg, factor), derived_reg in derived.items():
+                if position in steps[reg]:
+                    rewritten.append((origin, Instruction(Op.ADD, Operand(Target(T.IMI, _wrap(steps[reg][position] * factor)), Mode(M.DIR)),
+                                                          _register(derived_reg))))
+
+        return rewritten
@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import copy
+from collections import defaultdict
+
+import src.dataclass.AST as AST
+import src.utils.error as error
+from src.dataclass.symbol import Symbol, SymbolTable
+from src.enums.symbols_enum import NameCategory
+
+
+class ASTSymbolResolver:
+    """Binds every use of a name to its declaration once, such that
+        later phases never have to walk the scope chain.
+
+    Visible symbols are kept in a flattened scope chain, mapping each
+    name to a stack of (Symbol, level) bindings, which is pushed and
+    popped when scopes are entered and left. Lookups are therefore
+    constant-time regardless of the nesting depth.
+
+    Every `ExpressionIdentifier`, `StatementAssignment` and `ExpressionCall`
+    is annotated with `binding`, i.e., (Symbol, level). Variables and
+    parameters used from a different level than their declaration, i.e.,
+    from a nested function, are marked as escaping, and the function
+    declaring them is marked as `captured`.
+
+    Functions that follow their static link, i.e., that use names of
+    outer functions, directly or in nested functions, or that call
+    functions declared further out which follow theirs, are marked as
+    `static_link`. The calls are only known once the whole AST is
+    resolved, so they are propagated last.
+
+    The API exposes `resolve_symbols`, which takes the desugared AST
+    as parameter.
+    """
+
+    def __init__(self) -> ASTSymbolResolver:
+        self._visible: defaultdict[str, list[tuple[Symbol, int]]] = defaultdict(list)
+        self._scopes: list[SymbolTable] = []
+        # Enclosing functions, indexed by their level
+        self._functions: list[AST.Function] = []
+        # Callees of calls that follow static links, and the functions
+        # whose links are followed
+        self._calls: list[tuple[AST.Function, list[AST.Function]]] = []
+
+    def resolve_symbols(self, ast_node: AST.AstNode, in_place: bool = False) -> AST.AstNode:
+        """Bind all uses of names in the provided AST.
+
+        The AST is copied first, unless `in_place` is set.
+        """
+
+        if not in_place:
+            ast_node = copy.deepcopy(ast_node)
+
+        self._resolve(ast_node)
+        self._propagate_static_links()
+        return ast_node
+
+    def _enter_scope(self, symbol_table: SymbolTable) -> None:
+        self._scopes.append(symbol_table)
+        for name, symbol in symbol_table.items():
+            self._visible[name].append((symbol, symbol_table.level))
+
+    def _leave_scope(self) -> None:
+        for name, _ in self._scopes.pop().items():
+            self._visible[name].pop()
+
+    def _bind(self, ast_node: AST.AstNode, name: str) -> None:
+        if not (bindings := self._visible.get(name)):
+            error.error_message(
+                "Symbol Resolution",
+                f"Use of undeclared name '{name}'.",
+                ast_node.lineno)
+
+        symbol, level = ast_node.binding = bindings[-1]
+
+        if self._scopes[-1].level == level:
+            return
+
+        if symbol.kind is NameCategory.FUNCTION:
+            self._calls.append((symbol.info, self._functions[level + 1:]))
+        else:
+            symbol.escaping = True
+            self._functions[level].captured = True
+            for function in self._functions[level + 1:]:
+                function.static_link = True
+
+    def _propagate_static_links(self) -> None:
+        # A call of a function that follows its static link follows
+        # the links of the caller and its enclosing functions
+        changed = True
+        while changed:
+            changed = False
+            for callee, functions in self._calls:
+                if callee.static_link and not all(function.static_link for function in functions):
+                    for function in functions:
+                        function.static_link = True
+                    changed = True
+
+    def _resolve(self, ast_node: AST.AstNode) -> None:
+        match ast_node:
+            case AST.Body(decls, stm_list):
+                self._resolve(decls)
+                self._resolve(stm_list)
+            case AST.DeclarationList(decls):
+                for decl in decls:
+                    self._resolve(decl)
+            case AST.DeclarationFunction(_, func):
+                self._resolve(func)
+            case AST.Function(body=body):
+                self._functions.append(ast_node)
+                self._enter_scope(ast_node.symbol_table)
+                self._resolve(body)
+                self._leave_scope()
+                self._functions.pop()
+            case AST.StatementList(stms):
+                for stm in stms:
+                    self._resolve(stm)
+            case AST.StatementAssignment(lhs, rhs):
+                self._resolve(rhs)
+                self._bind(ast_node, lhs)
+            case AST.StatementIfthenelse(exp, then_part, else_part):
+                self._resolve(exp)
+                self._enter_scope(ast_node.symbol_table_then)
+                self._resolve(then_part)
+                self._leave_scope()
+                if else_part:
+                    self._enter_scope(ast_node.symbol_table_else)
+                    self._resolve(else_part)
+                    self._leave_scope()
+            case AST.StatementWhile(exp, body):
+                # The condition is evaluated inside the loop scope
+                self._enter_scope(ast_node.symbol_table)
+                self._resolve(exp)
+                self._resolve(body)
+                self._leave_scope()
+            case AST.StatementFor(_, exp, assign, body):
+                # The iterator is initialized in the enclosing scope
+                self._resolve(ast_node.init.rhs)
+                self._enter_scope(ast_node.symbol_table)
+                self._bind(ast_node.init, ast_node.init.lhs)
+                self._resolve(exp)
+                self._resolve(body)
+                self._resolve(assign)
+                self._leave_scope()
+            case AST.StatementReturn(exp):
+                self._resolve(exp)
+            case AST.StatementPrint(exp):
+                self._resolve(exp)
+            case AST.ExpressionIdentifier(identifier):
+                self._bind(ast_node, identifier)
+            case AST.ExpressionCall(name, exp_list):
+                self._resolve(exp_list)
+                self._bind(ast_node, name)
+            case AST.ExpressionList(exps):
+                for exp in exps:
+                    self._resolve(exp)
+            case AST.ExpressionBinop(_, lhs, rhs):
+                self._resolve(lhs)
+                self._resolve(rhs)
+            case AST.DeclarationVariableList() | AST.DeclarationVariableInit():
+                pass
+            case AST.ExpressionInteger() | AST.ExpressionFloat():
+                pass
+            case None:
+                pass
+            case _:
+                raise ValueError(ast_node)
@@ -18,64 +18,35 @@ class ASTSyntacticDesugar:
     """
 
     def _collect_decl_var_init(self, decls_arg: AST.DeclarationList) -> list[AST.DeclarationVariableInit]:
-        acc = []
-
         if decls_arg is None:
-            return acc
-
-        while (decl := decls_arg.decl):
-            if isinstance(decl, AST.DeclarationVariableInit):
-                acc.append(decl)
-
-            if decls_arg.next is None:
-                break
-
-            decls_arg = decls_arg.next
-
-        return acc
+            return []
 
-    def _trans_var_init_list_to_stm(self, init_list: list[AST.DeclarationVariableInit]) -> AST.StatementList:
-        top_node = None
+        return [decl for decl in decls_arg.decls
+                if isinstance(decl, AST.DeclarationVariableInit)]
 
-        if init_list:
-            var = init_list.pop(0)
-            top_node = AST.StatementList(
-                AST.StatementAssignment(var.name, var.exp, -1),
-                None,
-                -1
-            )
+    def _trans_var_init_list_to_stm(self, init_list: list[AST.DeclarationVariableInit]) -> list[AST.StatementAssignment]:
+        return [AST.StatementAssignment(var.name, var.exp, -1)
+                for var in init_list]
 
-        stm_list = top_node
-        for var in init_list:
-            stm_list.next = AST.StatementList(
-                AST.StatementAssignment(var.name, var.exp, -1),
-                None,
-                -1
-            )
-            stm_list = stm_list.next
-
-        return top_node
-
-    def _insert_stm(self, assignments: AST.StatementList, ast_node: AST.Body) -> None:
+    def _insert_stm(self, assignments: list[AST.StatementAssignment], ast_node: AST.Body) -> None:
         if not assignments:
             return
 
-        top_node = assignments
-        second_last_node = assignments
+        if ast_node.stm_list is None:
+            ast_node.stm_list = AST.StatementList([], -1)
 
-        while (assignments := assignments.next):
-            second_last_node = assignments
+        ast_node.stm_list.stms[:0] = assignments
 
-        second_last_node.next = ast_node.stm_list
-        ast_node.stm_list = top_node
+    def desugar_AST(self, ast_node: AST.AstNode, in_place: bool = False) -> AST.AstNode:
+        """Perform deep copy of provided IR before desugaring,
+        unless `in_place` is set.
 
-    def desugar_AST(self, ast_node: AST.AstNode) -> AST.AstNode:
-        """Perform deep copy of provided IR before desugaring.
-
-        Returns new desugared IR/AST.
+        Returns desugared IR/AST.
         """
 
-        ast_node = copy.deepcopy(ast_node)
+        if not in_place:
+            ast_node = copy.deepcopy(ast_node)
+
         self._desugar_AST(ast_node)
         return ast_node
 
@@ -88,20 +59,21 @@ class ASTSyntacticDesugar:
                     decl_var_init_list)
                 self._insert_stm(assignments, ast_node)
                 self._desugar_AST(ast_node.stm_list)
-            case AST.DeclarationList(decl, next):
-                self._desugar_AST(decl)
-                self._desugar_AST(next)
+            case AST.DeclarationList(decls):
+                for decl in decls:
+                    self._desugar_AST(decl)
             case AST.DeclarationFunction(_, func):
                 self._desugar_AST(func)
             case AST.Function(body=body):
                 self._desugar_AST(body)
-            case AST.StatementList(stm, next):
-                self._desugar_AST(stm)
-                self._desugar_AST(next)
+            case AST.StatementList(stms):
+                for stm in stms:
+                    self._desugar_AST(stm)
             case AST.StatementIfthenelse(_, then_part, else_part):
                 self._desugar_AST(then_part)
                 self._desugar_AST(else_part)
             case AST.StatementWhile(_, body):
                 self._desugar_AST(body)
-            case AST.StatementFor(body=body):
+            case AST.StatementFor(iter, body=body):
+                ast_node.init = AST.StatementAssignment(iter.name, iter.exp, iter.lineno)
                 self._desugar_AST(body)
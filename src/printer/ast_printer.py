@@ -29,13 +29,11 @@ class ASTTreePrinter(GenericPrinter):
                 if stm_list:
                     self.build_graph(stm_list)
                     self.add_edge(ast_node.dotnum, stm_list.dotnum)
-            case AST.DeclarationList(decl, next):
-                self.build_graph(decl)
+            case AST.DeclarationList(decls):
                 ast_node.dotnum = self.add_node("decl_list")
-                if next:
-                    self.build_graph(next)
-                    self.add_edge(ast_node.dotnum, next.dotnum)
-                self.add_edge(ast_node.dotnum, decl.dotnum)
+                for decl in decls:
+                    self.build_graph(decl)
+                    self.add_edge(ast_node.dotnum, decl.dotnum)
             case AST.DeclarationFunction(type, func):
                 ast_node.dotnum = self.add_node("func_decl")
                 self.build_graph(func)
@@ -56,11 +54,11 @@ class ASTTreePrinter(GenericPrinter):
                 self.add_edge(ast_node.dotnum, tmp_dotnum)
                 self.add_edge(ast_node.dotnum, tmp_dotnum2)
                 self.add_edge(ast_node.dotnum, exp.dotnum)
-            case AST.VariableList(name, next):
-                ast_node.dotnum = self.add_node(name)
-                if next:
-                    self.build_graph(next)
-                    self.add_edge(ast_node.dotnum, next.dotnum)
+            case AST.VariableList(names):
+                ast_node.dotnum = self.add_node("var_list")
+                for name in names:
+                    tmp_dotnum = self.add_node(name)
+                    self.add_edge(ast_node.dotnum, tmp_dotnum)
             case AST.Function(name, par_list, body):
                 ast_node.dotnum = self.add_node(name)
                 if par_list:
@@ -75,20 +73,16 @@ class ASTTreePrinter(GenericPrinter):
                 tmp_dotnum2 = self.add_node(name)
                 self.add_edge(ast_node.dotnum, tmp_dotnum)
                 self.add_edge(ast_node.dotnum, tmp_dotnum2)
-            case AST.ParameterList(param, next):
-                self.build_graph(param)
+            case AST.ParameterList(params):
                 ast_node.dotnum = self.add_node("param_list")
-                self.add_edge(ast_node.dotnum, param.dotnum)
-                if next:
-                    self.build_graph(next)
-                    self.add_edge(ast_node.dotnum, next.dotnum)
-            case AST.StatementList(stm, next):
+                for param in params:
+                    self.build_graph(param)
+                    self.add_edge(ast_node.dotnum, param.dotnum)
+            case AST.StatementList(stms):
                 ast_node.dotnum = self.add_node("stm_list")
-                self.build_graph(stm)
-                self.add_edge(ast_node.dotnum, stm.dotnum)
-                if next:
-                    self.build_graph(next)
-                    self.add_edge(ast_node.dotnum, next.dotnum)
+                for stm in stms:
+                    self.build_graph(stm)
+                    self.add_edge(ast_node.dotnum, stm.dotnum)
             case AST.StatementAssignment(lhs, rhs):
                 self.build_graph(rhs)
                 ast_node.dotnum = self.add_node("=")
@@ -145,12 +139,10 @@ class ASTTreePrinter(GenericPrinter):
                 if body:
                     self.build_graph(body)
                     self.add_edge(ast_node.dotnum, body.dotnum)
-            case AST.ExpressionList(exp, next):
-                self.build_graph(exp)
+            case AST.ExpressionList(exps):
                 ast_node.dotnum = self.add_node("expr_list")
-                self.add_edge(ast_node.dotnum, exp.dotnum)
-                if next:
-                    self.build_graph(next)
-                    self.add_edge(ast_node.dotnum, next.dotnum)
+                for exp in exps:
+                    self.build_graph(exp)
+                    self.add_edge(ast_node.dotnum, exp.dotnum)
             case _:
                 raise ValueError(f"Unrecognized node: {ast_node}")
@@ -23,18 +23,18 @@ class SymbolPrinter(GenericPrinter):
             case AST.Body(decls, stm_list):
                 self.build_graph(decls)
                 self.build_graph(stm_list)
-            case AST.DeclarationList(decl, next):
-                self.build_graph(decl)
-                self.build_graph(next)
+            case AST.DeclarationList(decls):
+                for decl in decls:
+                    self.build_graph(decl)
             case AST.DeclarationFunction(_, func):
                 self.build_graph(func)
             case AST.Function(_, par_list, body):
                 self._add_scope(ast_node, "symbol_table")
                 self.build_graph(par_list)
                 self.build_graph(body)
-            case AST.StatementList(stm, next):
-                self.build_graph(stm)
-                self.build_graph(next)
+            case AST.StatementList(stms):
+                for stm in stms:
+                    self.build_graph(stm)
             case AST.StatementIfthenelse(_, then_part, else_part):
                 self._add_scope(ast_node, "symbol_table_then")
                 self.build_graph(then_part)
@@ -0,0 +1,115 @@
+"""
+Versioned on-disk cache for the PLY lexer and parser tables.
+
+Tables are stored outside the source tree and keyed by a hash of the
+grammar specification and the PLY version, such that a change to either
+results in a fresh build instead of stale tables.
+
+Environment variables
+---------------------
+PANDA_TABLE_CACHE : str
+    Set to `0` to disable the cache. Tables are then built in memory
+    on every startup and nothing is written to disk.
+PANDA_CACHE_DIR : str
+    Cache location; default is `$XDG_CACHE_HOME/panda` or `~/.cache/panda`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import importlib.util
+import os
+import types
+
+import ply
+
+
+def enabled() -> bool:
+    """Whether the table cache should be used.
+    """
+
+    return os.environ.get("PANDA_TABLE_CACHE", "1") != "0"
+
+
+def cache_directory() -> str or None:
+    """Resolve and create the cache directory.
+
+    Returns None if the directory is not available, in which case
+    the caller should fall back to in-memory tables.
+    """
+
+    directory = os.environ.get("PANDA_CACHE_DIR")
+
+    if not directory:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+            os.path.expanduser("~"), ".cache")
+        directory = os.path.join(base, "panda")
+
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError:
+        return None
+
+    return directory
+
+
+def grammar_hash(module_dict: dict, prefix: str) -> str:
+    """Digest of every specification entry in `module_dict`.
+
+    All names starting with `prefix` (rule strings and the docstrings of
+    rule functions), together with `tokens`, `precedence`, `reserved`
+    and the PLY version, contribute to the hash.
+    """
+
+    digest = hashlib.sha256(ply.__version__.encode())
+
+    for name in ("tokens", "precedence", "reserved"):
+        digest.update(repr(module_dict.get(name)).encode())
+
+    for name, value in module_dict.items():
+        if not name.startswith(prefix):
+            continue
+
+        spec = value.__doc__ if isinstance(value, types.FunctionType) else value
+        digest.update(f"{name}={spec!r};".encode())
+
+    return digest.hexdigest()[:16]
+
+
+def temporary_name(name: str) -> str:
+    """Process unique name used while a table is being written.
+    """
+
+    return f"{name}_tmp{os.getpid()}"
+
+
+def publish(directory: str, temporary: str, final: str) -> None:
+    """Atomically move a freshly written table into place, so that
+    concurrent compilers never observe a partially written file.
+    """
+
+    try:
+        os.replace(os.path.join(directory, temporary),
+                   os.path.join(directory, final))
+    except OSError:
+        pass
+
+
+def load_module(directory: str, name: str) -> types.ModuleType or None:
+    """Load a generated table module from the cache directory
+    without touching `sys.path`.
+    """
+
+    path = os.path.join(directory, name + ".py")
+
+    if not os.path.exists(path):
+        return None
+
+    try:
+        spec = importlib.util.spec_from_file_location(name, path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    except Exception:
+        return None
+
+    return module
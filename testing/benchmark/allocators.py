@@ -0,0 +1,85 @@
+"""
+Graph colouring versus linear scan register allocation.
+
+Compile time is the allocation phase on large synthetic programs, and
+runtime is the best wall time of the generated executables.
+
+    Compiler$ python3.10 -m testing.benchmark.allocators [runs]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import src.compiler
+import src.phase.allocator
+import src.phase.linear_scan
+from testing.benchmark.compiler_phases import compile_program
+from testing.benchmark.programs import branches, fibonacci, loop, nested_loops, straight_line
+
+ALLOCATORS = {
+    "graph-coloring": src.phase.allocator.Allocator,
+    "linear-scan": src.phase.linear_scan.LinearScanAllocator,
+}
+
+
+def build(program: str, directory: str, name: str, allocator: str, **options) -> str:
+    """Compile `program` with gcc and return the path of the executable.
+    """
+
+    source = os.path.join(directory, f"{name}.panda")
+    output = os.path.join(directory, name)
+
+    with open(source, "w") as f:
+        f.write(program)
+
+    args = argparse.Namespace(file=source, output=output, compile=True, run=False,
+                              debug=False, runTests=True, stack=False,
+                              allocator=allocator, optimize=0, inline=False, display=False,
+                              register_arguments=False)
+    for option, value in options.items():
+        setattr(args, option, value)
+
+    src.compiler.PandaCompiler(args).compile()
+    return f"{output}.out"
+
+
+def run_ms(executable: str, runs: int) -> float:
+    best = float("inf")
+
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([executable], stdout=subprocess.DEVNULL)
+        best = min(best, time.perf_counter() - start)
+
+    return 1000 * best
+
+
+def main(runs: int) -> None:
+    print("allocation (ms)")
+    print(f"{'program':>16}" + "".join(f"{name:>16}" for name in ALLOCATORS))
+
+    for name, program in [("straight 2000", straight_line(2000)),
+                          ("branches 2000", branches(2000)),
+                          ("loop 2000", loop(2000))]:
+        timings = [compile_program(program, allocator=allocator)["allocate"]
+                   for allocator in ALLOCATORS.values()]
+        print(f"{name:>16}" + "".join(f"{t:>16.1f}" for t in timings))
+
+    print()
+    print("runtime (ms)")
+    print(f"{'program':>16}" + "".join(f"{name:>16}" for name in ALLOCATORS))
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, program in [("fib 30", fibonacci(30)),
+                              ("loops 4000", nested_loops(4000))]:
+            timings = [run_ms(build(program, directory, f"{name.split()[0]}_{i}", allocator), runs)
+                       for i, allocator in enumerate(ALLOCATORS)]
+            print(f"{name:>16}" + "".join(f"{t:>16.1f}" for t in timings))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,89 @@
+"""
+Caller-save registers preserved around calls, when all of them are
+saved versus only those live across the call.
+
+Saves are the pushes and pops around calls and prints in the
+generated assembly, and runtime is the best wall time of
+the generated executables, summed over the corpus. Saving all registers
+is the behaviour of Emit when a call carries no liveness information.
+
+    Compiler$ python3.10 -m testing.benchmark.calls [runs]
+"""
+
+import glob
+import io
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from contextlib import redirect_stderr
+
+import src.phase.allocator
+import src.phase.emit
+from src.enums.code_generation_enum import Meta, Op
+from testing.benchmark.allocators import run_ms
+from testing.benchmark.coalescing import allocate
+from testing.benchmark.programs import fibonacci
+
+_CALLER_SAVE = "|".join(src.phase.emit.Emit()._calleer_save_reg)
+_SAVE = re.compile(rf"(pushq|popq) %({_CALLER_SAVE})$")
+
+
+def assemble(program: str, save_all: bool) -> str:
+    code = allocate(program, src.phase.allocator.Allocator())
+
+    if save_all:
+        for ins in code:
+            if ins.opcode is Op.META and ins.args[0] in (Meta.PRECALL, Meta.POSTRETURN):
+                ins.args = ins.args[:1]
+
+    return src.phase.emit.Emit().emit(code)
+
+
+def measure(program: str, save_all: bool, directory: str, runs: int) -> tuple[int, float]:
+    assembly = assemble(program, save_all)
+    source = os.path.join(directory, "program.s")
+    executable = os.path.join(directory, "program.out")
+
+    with open(source, "w") as f:
+        f.write(assembly)
+
+    subprocess.run(["gcc", source, "-o", executable], stderr=subprocess.DEVNULL, check=True)
+
+    saves = sum(bool(_SAVE.match(line.strip())) for line in assembly.splitlines())
+    return saves, run_ms(executable, runs)
+
+
+def main(runs: int) -> None:
+    corpus = []
+    for path in sorted(glob.glob("testing/test-cases/*.panda")):
+        with open(path) as f:
+            program = f.read()
+        try:
+            with redirect_stderr(io.StringIO()):
+                assemble(program, False)
+        except SystemExit:
+            continue # programs rejected by the compiler
+        corpus.append(program)
+
+    programs = [(f"corpus ({len(corpus)})", corpus),
+                ("fib 25", [fibonacci(25)]),
+                ("fib 32", [fibonacci(32)])]
+
+    print(f"{'':>14}{'saves':>28}{'runtime (ms)':>24}")
+    print(f"{'program':>14}{'all':>12}{'live':>10}{'saved':>6}{'all':>12}{'live':>12}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, sources in programs:
+            before, after = [
+                [sum(values) for values in zip(*(measure(program, save_all, directory, runs)
+                                                 for program in sources))]
+                for save_all in (True, False)]
+
+            print(f"{name:>14}{before[0]:>12}{after[0]:>10}{1 - after[0] / before[0]:>6.0%}"
+                  f"{before[1]:>12.1f}{after[1]:>12.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,119 @@
+"""
+Register copies removed by coalescing, on the test corpus and the
+runtime benchmark programs.
+
+Instructions are counted in the generated assembly, excluding labels
+and directives, and copies are moves between two registers. Runtime is
+the best wall time of the generated executables, summed over the
+corpus.
+
+    Compiler$ python3.10 -m testing.benchmark.coalescing [runs]
+"""
+
+import glob
+import io
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from contextlib import redirect_stderr
+
+import src.dataclass.AST as AST
+import src.phase.allocator
+import src.phase.code_generation_register
+import src.phase.emit
+import src.phase.lexer
+import src.phase.parser
+import src.phase.symbol_collection
+import src.phase.symbol_resolution
+import src.phase.syntactic_desugaring
+import src.utils.interfacing_parser as interfacing_parser
+from src.dataclass.iloc import InstructionBuffer
+from testing.benchmark.allocators import run_ms
+from testing.benchmark.programs import fibonacci, nested_loops, pressure_loop
+
+_REGISTERS = "|".join(src.phase.emit.REGISTERS.values())
+_COPY = re.compile(rf"movq %({_REGISTERS}), %({_REGISTERS})$")
+
+
+def resolve(program: str) -> AST.AstNode:
+    src.phase.lexer.lexer.lineno = 1
+    src.phase.parser.parser.parse(program, lexer=src.phase.lexer.lexer)
+
+    ir = src.phase.symbol_collection.ASTSymbolIncorporator().build_symbol_table(
+        interfacing_parser.the_program, True)
+    ir = src.phase.syntactic_desugaring.ASTSyntacticDesugar().desugar_AST(ir, True)
+    return src.phase.symbol_resolution.ASTSymbolResolver().resolve_symbols(ir, True)
+
+
+def allocate(program: str, allocator: src.phase.allocator.Allocator) -> InstructionBuffer:
+    generator = src.phase.code_generation_register.GenerateCodeRegister()
+    generator.generate_code(resolve(program), True)
+    return allocator.perform_register_allocation(generator.get_code(True), True)
+
+
+def assemble(program: str, allocator: src.phase.allocator.Allocator) -> str:
+    return src.phase.emit.Emit().emit(allocate(program, allocator))
+
+
+def count(assembly: str) -> tuple[int, int]:
+    """Number of instructions and register copies.
+    """
+
+    lines = [line.strip() for line in assembly.splitlines()]
+    instructions = [line for line in lines
+                    if line and not line.endswith(":") and not line.startswith(".")]
+
+    return len(instructions), sum(bool(_COPY.match(line)) for line in instructions)
+
+
+def measure(program: str, allocator: src.phase.allocator.Allocator,
+            directory: str, runs: int) -> tuple[int, int, float]:
+    assembly = assemble(program, allocator)
+    source = os.path.join(directory, "program.s")
+    executable = os.path.join(directory, "program.out")
+
+    with open(source, "w") as f:
+        f.write(assembly)
+
+    subprocess.run(["gcc", source, "-o", executable], stderr=subprocess.DEVNULL, check=True)
+
+    return (*count(assembly), run_ms(executable, runs))
+
+
+def main(runs: int) -> None:
+    corpus = []
+    for path in sorted(glob.glob("testing/test-cases/*.panda")):
+        with open(path) as f:
+            program = f.read()
+        try:
+            with redirect_stderr(io.StringIO()):
+                assemble(program, src.phase.allocator.Allocator(coalesce=False))
+        except SystemExit:
+            continue # programs rejected by the compiler
+        corpus.append(program)
+
+    programs = [(f"corpus ({len(corpus)})", corpus),
+                ("fib 25", [fibonacci(25)]),
+                ("loops 2000", [nested_loops(2000)]),
+                ("pressure 1e6", [pressure_loop(1000000)])]
+
+    print(f"{'':>14}{'instructions':>26}{'copies':>20}{'runtime (ms)':>24}")
+    print(f"{'program':>14}" + f"{'before':>12}{'after':>10}{'saved':>6}" * 2
+          + f"{'before':>12}{'after':>12}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, sources in programs:
+            before, after = [
+                [sum(values) for values in zip(*(measure(program, src.phase.allocator.Allocator(coalesce), directory, runs)
+                                                 for program in sources))]
+                for coalesce in (False, True)]
+
+            print(f"{name:>14}"
+                  + "".join(f"{b:>12}{a:>10}{1 - a / b:>6.0%}" for b, a in zip(before[:2], after[:2]))
+                  + f"{before[2]:>12.1f}{after[2]:>12.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
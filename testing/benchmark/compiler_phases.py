@@ -0,0 +1,80 @@
+"""
+Compile time per phase on synthetic programs of increasing size.
+
+    Compiler$ python3.10 -m testing.benchmark.compiler_phases [statements ...]
+"""
+
+import sys
+import time
+
+import src.phase.allocator
+import src.phase.code_generation_register
+import src.phase.emit
+import src.phase.lexer
+import src.phase.parser
+import src.phase.symbol_collection
+import src.phase.symbol_resolution
+import src.phase.syntactic_desugaring
+import src.utils.interfacing_parser as interfacing_parser
+from testing.benchmark.programs import straight_line
+
+
+def _time(timings: dict, phase: str, function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    timings[phase] = 1000 * (time.perf_counter() - start)
+    return result
+
+
+def compile_program(program: str, in_place: bool = True,
+                    allocator: type = src.phase.allocator.Allocator) -> dict[str, float]:
+    """Run the register pipeline on `program` and return
+    the wall time of every phase in milliseconds.
+
+    With `in_place` unset, every phase copies its input,
+    which was the behaviour before ownership passing.
+    """
+
+    timings = {}
+
+    src.phase.lexer.lexer.lineno = 1
+    _time(timings, "parse", src.phase.parser.parser.parse,
+          program, src.phase.lexer.lexer)
+    ast = interfacing_parser.the_program
+
+    ir = _time(timings, "symbols",
+               src.phase.symbol_collection.ASTSymbolIncorporator().build_symbol_table,
+               ast, in_place)
+    ir = _time(timings, "desugar",
+               src.phase.syntactic_desugaring.ASTSyntacticDesugar().desugar_AST,
+               ir, in_place)
+    ir = _time(timings, "resolve",
+               src.phase.symbol_resolution.ASTSymbolResolver().resolve_symbols,
+               ir, in_place)
+
+    generator = src.phase.code_generation_register.GenerateCodeRegister()
+    _time(timings, "codegen", generator.generate_code, ir, in_place)
+    code = _time(timings, "get_code", generator.get_code, in_place)
+
+    code = _time(timings, "allocate",
+                 allocator().perform_register_allocation,
+                 code, in_place)
+    _time(timings, "emit", src.phase.emit.Emit().emit, code)
+
+    return timings
+
+
+def main(sizes: list[int]) -> None:
+    phases = ["parse", "symbols", "desugar", "resolve", "codegen", "get_code", "allocate", "emit"]
+
+    print(f"{'statements':>10}" + "".join(f"{p:>10}" for p in phases)
+          + f"{'total':>10}")
+
+    for size in sizes:
+        timings = compile_program(straight_line(size))
+        print(f"{size:>10}" + "".join(f"{timings[p]:>10.1f}" for p in phases)
+              + f"{sum(timings.values()):>10.1f}")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [250, 500, 1000, 2000, 4000])
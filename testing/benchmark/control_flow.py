@@ -0,0 +1,62 @@
+"""
+Control-flow graph construction, dominators and liveness
+on the largest scope of large, branching programs.
+
+    Compiler$ python3.10 -m testing.benchmark.control_flow [statements ...]
+"""
+
+import sys
+import time
+
+import src.phase.allocator
+import src.phase.code_generation_register
+import src.phase.lexer
+import src.phase.parser
+import src.phase.symbol_collection
+import src.phase.symbol_resolution
+import src.phase.syntactic_desugaring
+import src.utils.interfacing_parser as interfacing_parser
+from src.dataclass.cfg import ControlFlowGraph
+from testing.benchmark.programs import branches
+
+
+def largest_scope(program: str) -> list:
+    src.phase.lexer.lexer.lineno = 1
+    src.phase.parser.parser.parse(program, lexer=src.phase.lexer.lexer)
+    ir = interfacing_parser.the_program
+    ir = src.phase.symbol_collection.ASTSymbolIncorporator().build_symbol_table(ir, True)
+    ir = src.phase.syntactic_desugaring.ASTSyntacticDesugar().desugar_AST(ir, True)
+    ir = src.phase.symbol_resolution.ASTSymbolResolver().resolve_symbols(ir, True)
+
+    generator = src.phase.code_generation_register.GenerateCodeRegister()
+    generator.generate_code(ir, in_place=True)
+    code = generator.get_code(in_place=True)
+    return max((code.scope(scope) for scope in code.scopes()), key=len)
+
+
+def _ms(function, *args) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = function(*args)
+    return 1000 * (time.perf_counter() - start), result
+
+
+def main(sizes: list[int]) -> None:
+    allocator = src.phase.allocator.Allocator()
+
+    print(f"{'statements':>10}{'instrs':>8}{'blocks':>8}{'edges':>8}"
+          f"{'build':>10}{'dominators':>12}{'liveness':>10}{'graph':>10}")
+
+    for size in sizes:
+        code = largest_scope(branches(size))
+
+        build, cfg = _ms(ControlFlowGraph.build, code)
+        dominators, _ = _ms(cfg.dominators)
+        liveness, names = _ms(cfg.liveness)
+        graph, _ = _ms(allocator._build_graph, cfg, names)
+
+        print(f"{size:>10}{len(code):>8}{len(cfg.blocks):>8}{len(cfg.edges()):>8}"
+              f"{build:>10.1f}{dominators:>12.1f}{liveness:>10.1f}{graph:>10.1f}")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [250, 500, 1000, 2000])
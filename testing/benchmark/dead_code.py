@@ -0,0 +1,91 @@
+"""
+Effect of dead-code elimination in the allocator, i.e., removal of
+functions that are never called, unreachable blocks and dead
+definitions, on the test corpus and on large generated programs.
+
+Instructions are counted in the generated assembly, excluding labels
+and directives. Size is the text segment of the linked executable, as
+reported by `size`, and compile time is the best wall time of code
+generation, allocation and emission.
+
+    Compiler$ python3.10 -m testing.benchmark.dead_code [runs]
+"""
+
+import copy
+import glob
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stderr
+
+import src.phase.allocator
+import src.phase.code_generation_register
+import src.phase.emit
+from testing.benchmark.coalescing import count, resolve
+from testing.benchmark.programs import library, many_functions, straight_line
+
+
+def compile_ms(program: str, eliminate_dead_code: bool, runs: int) -> tuple[str, float]:
+    ast = resolve(program)
+    best = float("inf")
+
+    for _ in range(runs):
+        generator = src.phase.code_generation_register.GenerateCodeRegister()
+        annotated = copy.deepcopy(ast)
+        start = time.perf_counter()
+        generator.generate_code(annotated, True)
+        allocator = src.phase.allocator.Allocator(eliminate_dead_code=eliminate_dead_code)
+        code = allocator.perform_register_allocation(generator.get_code(True), True)
+        assembly = src.phase.emit.Emit().emit(code)
+        best = min(best, time.perf_counter() - start)
+
+    return assembly, best * 1000
+
+
+def size(assembly: str, directory: str) -> int:
+    source = os.path.join(directory, "program.s")
+    executable = os.path.join(directory, "program.out")
+
+    with open(source, "w") as f:
+        f.write(assembly)
+
+    subprocess.run(["gcc", source, "-o", executable], stderr=subprocess.DEVNULL, check=True)
+    report = subprocess.run(["size", executable], capture_output=True, text=True, check=True).stdout
+
+    return int(report.splitlines()[1].split()[0])
+
+
+def main(runs: int) -> None:
+    corpus = []
+    for path in sorted(glob.glob("testing/test-cases/*.panda")):
+        with open(path) as f:
+            program = f.read()
+        try:
+            with redirect_stderr(io.StringIO()):
+                resolve(program)
+        except SystemExit:
+            continue # programs rejected by the compiler
+        corpus.append(program)
+
+    before = sum(count(compile_ms(program, False, 1)[0])[0] for program in corpus)
+    after = sum(count(compile_ms(program, True, 1)[0])[0] for program in corpus)
+    print(f"corpus ({len(corpus)}), instructions {before} -> {after} ({1 - after / before:.0%} removed)")
+    print()
+
+    print(f"{'program':>18}{'instructions':>14}{'after':>8}{'text (B)':>10}{'after':>8}{'compile (ms)':>14}{'after':>8}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, program in [("straight line 2000", straight_line(2000)),
+                              ("functions 500", many_functions(500)),
+                              ("library 500", library(500))]:
+            (before, before_ms), (after, after_ms) = (compile_ms(program, flag, runs) for flag in (False, True))
+            print(f"{name:>18}{count(before)[0]:>14}{count(after)[0]:>8}"
+                  f"{size(before, directory):>10}{size(after, directory):>8}"
+                  f"{before_ms:>14.1f}{after_ms:>8.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
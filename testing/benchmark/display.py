@@ -0,0 +1,41 @@
+"""
+Cost of non-local accesses with static links and with a display, over
+increasing nesting depth of functions, in register and stack mode.
+
+Every iteration of the innermost loop reads a variable and a parameter
+of every enclosing function, which takes one walk of the static links
+per access, or one load of the display. -O 1 hoists the walks out of
+the loop in register mode. Runtime is the best wall time of the
+generated executables.
+
+    Compiler$ python3.10 -m testing.benchmark.display [runs]
+"""
+
+import sys
+import tempfile
+
+from testing.benchmark.allocators import build, run_ms
+from testing.benchmark.programs import closure_loop
+
+MODES = {"register": {}, "-O 1": {"optimize": 1}, "stack": {"stack": True}}
+
+
+def main(runs: int) -> None:
+    print("runtime (ms)")
+    print(f"{'depth':>8}" + "".join(f"{mode + ' links':>16}{'display':>10}" for mode in MODES))
+
+    with tempfile.TemporaryDirectory() as directory:
+        for depth in [1, 2, 4, 8, 16]:
+            program = closure_loop(1000000, depth)
+            timings = []
+            for mode, options in MODES.items():
+                for display in (False, True):
+                    executable = build(program, directory, f"depth_{depth}_{mode.split()[-1]}_{display:d}",
+                                       "graph-coloring", display=display, **options)
+                    timings.append(run_ms(executable, runs))
+            print(f"{depth:>8}" + "".join(f"{links:>16.1f}{display:>10.1f}"
+                                          for links, display in zip(timings[::2], timings[1::2])))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
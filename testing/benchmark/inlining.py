@@ -0,0 +1,70 @@
+"""
+Calls removed by the inliner on the test corpus, and the call overhead
+it saves at runtime, with and without constant folding.
+
+Instructions and calls are counted in the generated assembly,
+excluding labels, directives and calls of printf. Runtime is the best
+wall time of the generated executables.
+
+    Compiler$ python3.10 -m testing.benchmark.inlining [runs]
+"""
+
+import glob
+import io
+import sys
+import tempfile
+from contextlib import redirect_stderr
+
+from testing.benchmark.allocators import build, run_ms
+from testing.benchmark.coalescing import count, resolve
+from testing.benchmark.programs import fibonacci, helper_loop, many_functions
+from src.phase.inlining import ASTInliner
+
+
+def instructions(executable: str) -> tuple[int, int]:
+    # The assembly is written next to the executable
+    with open(executable.removesuffix(".out") + ".s") as f:
+        assembly = f.read()
+
+    calls = sum(line.split()[:1] == ["callq"] and "printf" not in line
+                for line in assembly.splitlines())
+    return count(assembly)[0], calls
+
+
+def main(runs: int) -> None:
+    corpus = []
+    for path in sorted(glob.glob("testing/test-cases/*.panda")):
+        with open(path) as f:
+            program = f.read()
+        try:
+            with redirect_stderr(io.StringIO()):
+                resolve(program)
+        except SystemExit:
+            continue # programs rejected by the compiler
+        corpus.append(program)
+
+    inliner = ASTInliner()
+    for program in corpus:
+        inliner.inline_functions(resolve(program), True)
+    print(f"corpus ({len(corpus)}), {inliner.inlined} calls inlined")
+    print()
+
+    print(f"{'program':>16}{'-O':>4}{'instructions':>14}{'after':>8}{'calls':>8}{'after':>8}{'runtime (ms)':>14}{'after':>8}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, program in [("helpers 1e6", helper_loop(1000000)),
+                              ("functions 500", many_functions(500)),
+                              ("fib 25", fibonacci(25))]:
+            for optimize in (0, 1):
+                results = []
+                for inline in (False, True):
+                    executable = build(program, directory, f"{name.split()[0]}_{optimize}_{inline:d}",
+                                       "graph-coloring", optimize=optimize, inline=inline)
+                    results.append((*instructions(executable), run_ms(executable, runs)))
+                (before, before_calls, before_ms), (after, after_calls, after_ms) = results
+                print(f"{name:>16}{optimize:>4}{before:>14}{after:>8}{before_calls:>8}{after_calls:>8}"
+                      f"{before_ms:>14.1f}{after_ms:>8.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,87 @@
+"""
+Bitset worklist liveness versus the previous set-based solver,
+which sweeps all blocks until nothing changes.
+
+Both solvers start from the same per-block def/use sets of the largest
+scope of a program, and their live sets are checked to be identical.
+Timings are the best of several runs with the garbage collector
+disabled.
+
+    Compiler$ python3.10 -m testing.benchmark.liveness [statements ...]
+"""
+
+import gc
+import sys
+import time
+
+import src.dataclass.cfg
+from src.dataclass.cfg import ControlFlowGraph, registers
+from testing.benchmark.control_flow import largest_scope
+from testing.benchmark.programs import branches, loop
+
+
+def set_liveness(cfg: ControlFlowGraph, def_use: list[tuple[set, set]]) -> list[tuple[set, set]]:
+    """The previous solver, returning (live_in, live_out) per block.
+    """
+
+    reachable = cfg.reverse_postorder()
+    order = reachable + sorted(set(range(len(cfg.blocks))) - set(reachable))
+    live_in = [set() for _ in cfg.blocks]
+    live_out = [set() for _ in cfg.blocks]
+
+    change = True
+    while change:
+        change = False
+        for index in reversed(order):
+            defs, uses = def_use[index]
+            for succ in cfg.blocks[index].succ:
+                live_out[index] |= live_in[succ]
+            new_in = uses | (live_out[index] - defs)
+            if new_in != live_in[index]:
+                live_in[index] = new_in
+                change = True
+
+    return list(zip(live_in, live_out))
+
+
+def _best_ms(function, *args, runs: int = 5) -> float:
+    best = float("inf")
+
+    gc.disable()
+    for _ in range(runs):
+        start = time.perf_counter()
+        function(*args)
+        best = min(best, time.perf_counter() - start)
+    gc.enable()
+
+    return 1000 * best
+
+
+def main(sizes: list[int]) -> None:
+    print(f"{'program':>10}{'statements':>12}{'blocks':>8}{'globals':>9}"
+          f"{'sets (ms)':>12}{'bits (ms)':>12}{'speedup':>9}")
+
+    for name, generator in [("branches", branches), ("loop", loop)]:
+        for size in sizes:
+            cfg = ControlFlowGraph.build(largest_scope(generator(size)))
+
+            names = cfg.liveness()
+            actual = [(registers(block.live_in, names),
+                       registers(block.live_out, names)) for block in cfg.blocks]
+
+            def_use_sets = [block.def_use() for block in cfg.blocks]
+            index = {reg: i for i, reg in enumerate(names)}
+            def_use_bits = [(src.dataclass.cfg._bits(defs, index), src.dataclass.cfg._bits(uses, index))
+                            for defs, uses in def_use_sets]
+
+            assert actual == set_liveness(cfg, def_use_sets), "live sets differ"
+
+            sets = _best_ms(set_liveness, cfg, def_use_sets)
+            bits = _best_ms(cfg._solve_liveness, def_use_bits)
+
+            print(f"{name:>10}{size:>12}{len(cfg.blocks):>8}{len(names):>9}"
+                  f"{sets:>12.2f}{bits:>12.2f}{sets / bits:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [500, 1000, 2000, 4000])
@@ -0,0 +1,87 @@
+"""
+Effect of loop-invariant code motion at -O 1 on the test corpus and
+on loop heavy generated programs, i.e., static-link walks and
+computations hoisted out of loops.
+
+Instructions are counted in the generated assembly, excluding labels
+and directives, and hoisted instructions are counted before
+allocation. Runtime is the best wall time of the generated
+executables.
+
+    Compiler$ python3.10 -m testing.benchmark.loop_invariant [runs]
+"""
+
+import glob
+import io
+import os
+import subprocess
+import sys
+import tempfile
+from contextlib import redirect_stderr
+
+import src.phase.allocator
+import src.phase.code_generation_register
+import src.phase.constant_folding
+import src.phase.emit
+from src.phase.loop_invariant import LoopInvariantCodeMotion
+from testing.benchmark.allocators import run_ms
+from testing.benchmark.coalescing import count, resolve
+from testing.benchmark.programs import closure_loop, nested_loops
+
+
+def assemble(program: str, hoister: LoopInvariantCodeMotion or None) -> str:
+    ast = src.phase.constant_folding.ASTConstantFolder().fold_constants(resolve(program), True)
+    generator = src.phase.code_generation_register.GenerateCodeRegister()
+    generator.generate_code(ast, True)
+    code = generator.get_code(True)
+
+    if hoister is not None:
+        code = hoister.hoist_invariants(code, True)
+
+    code = src.phase.allocator.Allocator().perform_register_allocation(code, True)
+    return src.phase.emit.Emit().emit(code)
+
+
+def measure(assembly: str, directory: str, runs: int) -> float:
+    source = os.path.join(directory, "program.s")
+    executable = os.path.join(directory, "program.out")
+
+    with open(source, "w") as f:
+        f.write(assembly)
+
+    subprocess.run(["gcc", source, "-o", executable], stderr=subprocess.DEVNULL, check=True)
+    return run_ms(executable, runs)
+
+
+def main(runs: int) -> None:
+    corpus = []
+    for path in sorted(glob.glob("testing/test-cases/*.panda")):
+        with open(path) as f:
+            program = f.read()
+        try:
+            with redirect_stderr(io.StringIO()):
+                resolve(program)
+        except SystemExit:
+            continue # programs rejected by the compiler
+        corpus.append(program)
+
+    hoister = LoopInvariantCodeMotion()
+    before = sum(count(assemble(program, None))[0] for program in corpus)
+    after = sum(count(assemble(program, hoister))[0] for program in corpus)
+    print(f"corpus ({len(corpus)}), {hoister.hoisted} instructions hoisted, instructions {before} -> {after}")
+    print()
+
+    print(f"{'program':>16}{'hoisted':>9}{'instructions':>14}{'after':>8}{'runtime (ms)':>14}{'after':>8}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, program in [("closure 1e7", closure_loop(10000000)),
+                              ("closure 5 1e7", closure_loop(10000000, 5)),
+                              ("nested 3000", nested_loops(3000))]:
+            hoister = LoopInvariantCodeMotion()
+            before, after = assemble(program, None), assemble(program, hoister)
+            print(f"{name:>16}{hoister.hoisted:>9}{count(before)[0]:>14}{count(after)[0]:>8}"
+                  f"{measure(before, directory, runs):>14.1f}{measure(after, directory, runs):>8.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
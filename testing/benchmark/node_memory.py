@@ -0,0 +1,66 @@
+"""
+Memory footprint of AST nodes and ILOC instructions.
+
+Allocations are traced while the register pipeline builds the AST and
+the ILOC code of a large program, and divided by the number of nodes
+and instructions that are alive afterwards.
+
+    Compiler$ python3.10 -m testing.benchmark.node_memory [statements]
+"""
+
+import gc
+import sys
+import tracemalloc
+
+import src.dataclass.AST as AST
+import src.phase.code_generation_register
+import src.phase.lexer
+import src.phase.parser
+import src.phase.symbol_collection
+import src.phase.symbol_resolution
+import src.phase.syntactic_desugaring
+import src.utils.interfacing_parser as interfacing_parser
+from src.dataclass.iloc import Instruction
+from testing.benchmark.programs import straight_line
+
+
+def _count(cls: type) -> int:
+    return sum(isinstance(obj, cls) for obj in gc.get_objects())
+
+
+def main(statements: int) -> None:
+    program = straight_line(statements)
+    gc.collect()
+
+    tracemalloc.start()
+
+    src.phase.lexer.lexer.lineno = 1
+    src.phase.parser.parser.parse(program, lexer=src.phase.lexer.lexer)
+    ir = interfacing_parser.the_program
+    ir = src.phase.symbol_collection.ASTSymbolIncorporator().build_symbol_table(ir, True)
+    ir = src.phase.syntactic_desugaring.ASTSyntacticDesugar().desugar_AST(ir, True)
+    ir = src.phase.symbol_resolution.ASTSymbolResolver().resolve_symbols(ir, True)
+    gc.collect()
+    ast_bytes, _ = tracemalloc.get_traced_memory()
+
+    generator = src.phase.code_generation_register.GenerateCodeRegister()
+    generator.generate_code(ir, in_place=True)
+    code = generator.get_code(in_place=True)
+    gc.collect()
+    total_bytes, _ = tracemalloc.get_traced_memory()
+
+    tracemalloc.stop()
+
+    nodes = _count(AST.AstNode)
+    instructions = _count(Instruction)
+
+    print(f"statements      {statements:>10}")
+    print(f"AST nodes       {nodes:>10}   {ast_bytes / nodes:>8.1f} bytes/node")
+    print(f"instructions    {instructions:>10}   "
+          f"{(total_bytes - ast_bytes) / instructions:>8.1f} bytes/instruction")
+
+    del code
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
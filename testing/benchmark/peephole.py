@@ -0,0 +1,93 @@
+"""
+Instructions removed by the peephole optimiser, per rule on the test
+corpus, and the runtime saved on the benchmark programs, in register
+and stack mode.
+
+Instructions are counted in the generated assembly, excluding labels
+and directives. Runtime is the best wall time of the generated
+executables.
+
+    Compiler$ python3.10 -m testing.benchmark.peephole [runs]
+"""
+
+import glob
+import io
+import os
+import subprocess
+import sys
+import tempfile
+from contextlib import redirect_stderr
+
+import src.phase.allocator
+import src.phase.code_generation_stack
+import src.phase.emit
+from src.phase.peephole import Peephole
+from testing.benchmark.allocators import run_ms
+from testing.benchmark.coalescing import allocate, count, resolve
+from testing.benchmark.programs import fibonacci, nested_loops, pressure_loop
+
+MODES = ["register", "stack"]
+
+
+def assemble(program: str, mode: str, peephole: Peephole) -> str:
+    if mode == "stack":
+        generator = src.phase.code_generation_stack.GenerateCodeStack()
+        generator.generate_code(resolve(program), True)
+        code = generator.get_code(True)
+    else:
+        code = allocate(program, src.phase.allocator.Allocator())
+
+    return src.phase.emit.Emit(peephole).emit(code)
+
+
+def measure(program: str, mode: str, peephole: Peephole, directory: str, runs: int) -> tuple[int, float]:
+    assembly = assemble(program, mode, peephole)
+    source = os.path.join(directory, "program.s")
+    executable = os.path.join(directory, "program.out")
+
+    with open(source, "w") as f:
+        f.write(assembly)
+
+    subprocess.run(["gcc", source, "-o", executable], stderr=subprocess.DEVNULL, check=True)
+
+    return count(assembly)[0], run_ms(executable, runs)
+
+
+def main(runs: int) -> None:
+    corpus = []
+    for path in sorted(glob.glob("testing/test-cases/*.panda")):
+        with open(path) as f:
+            program = f.read()
+        try:
+            with redirect_stderr(io.StringIO()):
+                assemble(program, "register", Peephole([]))
+        except SystemExit:
+            continue # programs rejected by the compiler
+        corpus.append(program)
+
+    print(f"corpus ({len(corpus)}), instructions")
+    print(f"{'mode':>10}{'before':>10}{'after':>10}{'saved':>8}   rewrites")
+
+    for mode in MODES:
+        peephole = Peephole()
+        before = sum(count(assemble(program, mode, Peephole([])))[0] for program in corpus)
+        after = sum(count(assemble(program, mode, peephole))[0] for program in corpus)
+        rewrites = ", ".join(f"{rule} {n}" for rule, n in peephole.applied.most_common())
+        print(f"{mode:>10}{before:>10}{after:>10}{1 - after / before:>8.0%}   {rewrites}")
+
+    print()
+    print("runtime (ms)")
+    print(f"{'program':>14}" + "".join(f"{mode + ' before':>18}{'after':>8}" for mode in MODES))
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, program in [("fib 25", fibonacci(25)),
+                              ("loops 2000", nested_loops(2000)),
+                              ("pressure 1e6", pressure_loop(1000000))]:
+            timings = [measure(program, mode, peephole, directory, runs)[1]
+                       for mode in MODES for peephole in (Peephole([]), Peephole())]
+            print(f"{name:>14}" + "".join(f"{before:>18.1f}{after:>8.1f}"
+                                          for before, after in zip(timings[::2], timings[1::2])))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,46 @@
+"""
+Overhead of copying the IR between phases.
+
+Compares the pipeline where every phase deep copies its input with the
+ownership-passing pipeline used by `PandaCompiler.compile`, reporting
+compile time and peak traced memory.
+
+    Compiler$ python3.10 -m testing.benchmark.pipeline_copies [statements ...]
+"""
+
+import sys
+import tracemalloc
+
+from testing.benchmark.compiler_phases import compile_program
+from testing.benchmark.programs import straight_line
+
+
+def _peak_kib(program: str, in_place: bool) -> float:
+    tracemalloc.start()
+    compile_program(program, in_place)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def main(sizes: list[int]) -> None:
+    print(f"{'statements':>10}{'copy (ms)':>12}{'owned (ms)':>12}{'saved':>8}"
+          f"{'copy (KiB)':>12}{'owned (KiB)':>12}{'saved':>8}")
+
+    for size in sizes:
+        program = straight_line(size)
+
+        copying = sum(compile_program(program, in_place=False).values())
+        owned = sum(compile_program(program, in_place=True).values())
+
+        copying_peak = _peak_kib(program, in_place=False)
+        owned_peak = _peak_kib(program, in_place=True)
+
+        print(f"{size:>10}{copying:>12.1f}{owned:>12.1f}"
+              f"{1 - owned / copying:>8.0%}"
+              f"{copying_peak:>12.0f}{owned_peak:>12.0f}"
+              f"{1 - owned_peak / copying_peak:>8.0%}")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [250, 500, 1000, 2000])
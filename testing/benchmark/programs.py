@@ -0,0 +1,185 @@
+"""
+Generators for synthetic Panda programs used by the benchmarks.
+"""
+
+
+def straight_line(statements: int) -> str:
+    """Single scope of `statements` assignments followed by a print.
+    """
+
+    lines = ["int a, b;", "a = 0;", "b = 1;"]
+    lines += [f"a = a + b * {i % 7};" for i in range(statements)]
+    lines.append("print(a);")
+    return "\n".join(lines)
+
+
+def many_functions(functions: int) -> str:
+    """Flat sequence of small functions that are all called once.
+    """
+
+    lines = ["int acc;"]
+    lines += [f"int f{i}(int n) {{ return n + {i}; }}" for i in range(functions)]
+    lines.append("acc = 0;")
+    lines += [f"acc = f{i}(acc);" for i in range(functions)]
+    lines.append("print(acc);")
+    return "\n".join(lines)
+
+
+def branches(statements: int) -> str:
+    """Single scope where every statement contains a comparison,
+    i.e., three basic blocks per statement.
+    """
+
+    lines = ["int a, b;", "a = 0;", "b = 3;"]
+    lines += [f"a = a + (b < {i % 7});" for i in range(statements)]
+    lines.append("print(a);")
+    return "\n".join(lines)
+
+
+def loop(statements: int, variables: int = 64) -> str:
+    """While loop whose body keeps `variables` registers
+    live around the back edge.
+    """
+
+    names = [f"v{j}" for j in range(variables)]
+    lines = ["int i;", "i = 0;", "while (i < 10) {", f"int {', '.join(names)};"]
+    lines += [f"{names[j % variables]} = {names[j % variables]} + "
+              f"({names[(j + 1) % variables]} < i);" for j in range(statements)]
+    lines += ["i = i + 1;", "}"]
+    return "\n".join(lines)
+
+
+def fibonacci(n: int) -> str:
+    """Naive recursive Fibonacci, i.e., call heavy at runtime.
+    """
+
+    return "\n".join([
+        "int fib(int n) {",
+        "    if (n < 2) {",
+        "        return n;",
+        "    }",
+        "    return fib(n - 1) + fib(n - 2);",
+        "}",
+        f"print(fib({n}));"])
+
+
+def nested_loops(n: int) -> str:
+    """Two nested counting loops, i.e., loop heavy at runtime.
+    """
+
+    return "\n".join([
+        "int total, i, j;",
+        "total = 0;",
+        "i = 0;",
+        f"while (i < {n}) {{",
+        "    j = 0;",
+        f"    while (j < {n}) {{",
+        "        total = total + i * j - j / 3;",
+        "        j = j + 1;",
+        "    }",
+        "    i = i + 1;",
+        "}",
+        "print(total);"])
+
+
+def pressure_loop(n: int, variables: int = 14) -> str:
+    """Counting loop whose body keeps more locals live than
+    there are registers, i.e., spill heavy at runtime.
+    """
+
+    names = [f"v{j}" for j in range(variables)]
+    lines = ["int total, i;", "total = 0;", "i = 0;", f"while (i < {n}) {{",
+             f"    int {', '.join(names)};", f"    {names[0]} = i;"]
+    lines += [f"    {names[j]} = {names[j - 1]} * 3 - i;" for j in range(1, variables)]
+    lines += [f"    {names[j]} = {names[j]} + {names[(j + 1) % variables]};" for j in range(variables)]
+    lines += [f"    total = total + {' - '.join(names)};", "    i = i + 1;", "}", "print(total);"]
+    return "\n".join(lines)
+
+
+def library(functions: int, called: int = 10) -> str:
+    """Flat sequence of functions of which only every `called`-th one
+    is called. Every function stores to a local that is never read,
+    and has a print after its return.
+    """
+
+    lines = ["int acc;"]
+    lines += [f"int f{i}(int n) {{ int unused; unused = n * {i}; return n + {i}; print(n); }}"
+              for i in range(functions)]
+    lines.append("acc = 0;")
+    lines += [f"acc = f{i}(acc);" for i in range(0, functions, called)]
+    lines.append("print(acc);")
+    return "\n".join(lines)
+
+
+def helper_loop(n: int) -> str:
+    """Counting loop that calls tiny helper functions,
+    i.e., call overhead heavy at runtime.
+    """
+
+    return "\n".join([
+        "int total, i;",
+        "int sq(int n) { return n * n; }",
+        "int mix(int a, int b) { return a * 3 + b; }",
+        "total = 0;",
+        "i = 0;",
+        f"while (i < {n}) {{",
+        "    total = total + mix(sq(i), i) - sq(i - 1);",
+        "    i = i + 1;",
+        "}",
+        "print(total);"])
+
+
+def recursion(depth: int, repeat: int, tail: bool) -> str:
+    """Recursive sum of `depth` numbers, computed `repeat` times,
+    with the recursive call in tail position or not.
+    """
+
+    call = "sum(n - 1, acc + n)" if tail else "n + sum(n - 1, acc)"
+    return "\n".join([
+        "int total, i;",
+        "int sum(int n, int acc) {",
+        "    if (n == 0) {",
+        "        return acc;",
+        "    }",
+        f"    return {call};",
+        "}",
+        "total = 0;",
+        "i = 0;",
+        f"while (i < {repeat}) {{",
+        f"    total = total + sum({depth}, 0);",
+        "    i = i + 1;",
+        "}",
+        "print(total);"])
+
+
+def closure_loop(n: int, depth: int = 3) -> str:
+    """Counting loop in a function nested `depth` levels deep, that
+    reads a variable of every enclosing scope, i.e., static-link heavy
+    at runtime.
+    """
+
+    lines = []
+    for level in range(depth):
+        lines += [f"int f{level}(int a{level}) {{", f"int v{level};"]
+    lines += [f"int f{depth}(int a{depth}) {{", "int total, i;", "total = 0;", "i = 0;",
+              f"while (i < a{depth}) {{",
+              f"    total = total + i + {' + '.join(f'v{level} * a{level}' for level in range(depth))};",
+              "    i = i + 1;", "}", "return total;", "}"]
+    for level in reversed(range(depth)):
+        lines += [f"v{level} = {level + 2};", f"return f{level + 1}(a{level} + 1);", "}"]
+    lines.append(f"print(f0({n}));")
+    return "\n".join(lines)
+
+
+def induction_loop(n: int) -> str:
+    """For loop whose body multiplies and divides the iterator by
+    constants, i.e., multiplication heavy at runtime.
+    """
+
+    return "\n".join([
+        "int total;",
+        "total = 0;",
+        f"for (int i = 0; i < {n}; i = i + 1) {{",
+        "    total = total + i * 12 - i * 7 + i * 8 + i / 4;",
+        "}",
+        "print(total);"])
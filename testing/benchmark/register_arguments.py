@@ -0,0 +1,43 @@
+"""
+Cost of calls with arguments on the stack and in registers, in register
+mode with and without -O 1.
+
+Naive Fibonacci, a loop calling small helpers and a recursive sum are
+call heavy at runtime. With -R, arguments are passed in registers and
+the static link is only pushed for callees that follow it, so a call
+neither stores its arguments nor loads its parameters. Runtime is the
+best wall time of the generated executables.
+
+    Compiler$ python3.10 -m testing.benchmark.register_arguments [runs]
+"""
+
+import sys
+import tempfile
+
+from testing.benchmark.allocators import build, run_ms
+from testing.benchmark.programs import fibonacci, helper_loop, recursion
+
+PROGRAMS = {"fibonacci": fibonacci(35),
+            "helper_loop": helper_loop(20000000),
+            "recursion": recursion(1000, 20000, False)}
+MODES = {"register": {}, "-O 1": {"optimize": 1}}
+
+
+def main(runs: int) -> None:
+    print("runtime (ms)")
+    print(f"{'program':>12}" + "".join(f"{mode + ' stack':>16}{'-R':>10}" for mode in MODES))
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, program in PROGRAMS.items():
+            timings = []
+            for mode, options in MODES.items():
+                for registers in (False, True):
+                    executable = build(program, directory, f"{name}_{mode.split()[-1]}_{registers:d}",
+                                       "graph-coloring", register_arguments=registers, **options)
+                    timings.append(run_ms(executable, runs))
+            print(f"{name:>12}" + "".join(f"{stack:>16.1f}{registers:>10.1f}"
+                                          for stack, registers in zip(timings[::2], timings[1::2])))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
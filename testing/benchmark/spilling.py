@@ -0,0 +1,42 @@
+"""
+Spill code of both allocators on a loop whose body keeps more locals
+live than there are registers.
+
+Spill loads and stores are the instructions of the generated assembly
+addressing spill slots, i.e., relative to %rbp. Runtime is the best
+wall time of the generated executables.
+
+    Compiler$ python3.10 -m testing.benchmark.spilling [iterations] [runs]
+"""
+
+import re
+import sys
+import tempfile
+
+from testing.benchmark.allocators import ALLOCATORS, build, run_ms
+from testing.benchmark.programs import pressure_loop
+
+_LOAD = re.compile(r"movq -?\d+\(%rbp\), %\w+")
+_STORE = re.compile(r"movq %\w+, -?\d+\(%rbp\)")
+
+
+def spill_code(assembly: str) -> tuple[int, int]:
+    return len(_LOAD.findall(assembly)), len(_STORE.findall(assembly))
+
+
+def main(iterations: int, runs: int) -> None:
+    print(f"{'allocator':>16}{'loads':>8}{'stores':>8}{'runtime (ms)':>14}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for i, allocator in enumerate(ALLOCATORS):
+            executable = build(pressure_loop(iterations), directory, f"pressure_{i}", allocator)
+
+            with open(f"{executable[:-len('.out')]}.s") as f:
+                loads, stores = spill_code(f.read())
+
+            print(f"{allocator:>16}{loads:>8}{stores:>8}{run_ms(executable, runs):>14.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 5)
@@ -0,0 +1,51 @@
+"""
+Cold versus warm compiler startup.
+
+Every sample runs in a fresh interpreter, as on the build farm, and
+measures the time to import the lexer and parser.
+
+    Compiler$ python3.10 -m testing.benchmark.startup [runs]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def _sample(env: dict) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import src.phase.parser"],
+                   env=env, check=True)
+    return time.perf_counter() - start
+
+
+def _median_ms(samples: list[float]) -> float:
+    return 1000 * statistics.median(samples)
+
+
+def main(runs: int) -> None:
+    env = dict(os.environ)
+
+    env["PANDA_TABLE_CACHE"] = "0"
+    no_cache = [_sample(env) for _ in range(runs)]
+
+    env["PANDA_TABLE_CACHE"] = "1"
+    cold, warm = [], []
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as directory:
+            env["PANDA_CACHE_DIR"] = directory
+            cold.append(_sample(env))
+            warm.append(_sample(env))
+
+    print(f"{'mode':<12}{'median (ms)':>12}")
+    print(f"{'no cache':<12}{_median_ms(no_cache):>12.1f}")
+    print(f"{'cold':<12}{_median_ms(cold):>12.1f}")
+    print(f"{'warm':<12}{_median_ms(warm):>12.1f}")
+    print(f"saving      {_median_ms(no_cache) - _median_ms(warm):>12.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10)
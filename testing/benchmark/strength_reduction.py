@@ -0,0 +1,79 @@
+"""
+Effect of strength reduction at -O 1 on the test corpus and on loop
+heavy generated programs, i.e., immediate operands, induction
+variables, and shifts for multiplications and divisions.
+
+Instructions are counted in the generated assembly, excluding labels
+and directives, and multiplications and divisions are the `imulq` and
+`idivq` instructions among them. Runtime is the best wall time of the
+generated executables.
+
+    Compiler$ python3.10 -m testing.benchmark.strength_reduction [runs]
+"""
+
+import glob
+import io
+import sys
+import tempfile
+from contextlib import redirect_stderr
+
+import src.phase.allocator
+import src.phase.code_generation_register
+import src.phase.constant_folding
+import src.phase.emit
+from src.phase.loop_invariant import LoopInvariantCodeMotion
+from src.phase.strength_reduction import StrengthReducer
+from testing.benchmark.coalescing import count, resolve
+from testing.benchmark.loop_invariant import measure
+from testing.benchmark.programs import induction_loop, nested_loops
+
+
+def assemble(program: str, reducer: StrengthReducer or None) -> str:
+    ast = src.phase.constant_folding.ASTConstantFolder().fold_constants(resolve(program), True)
+    generator = src.phase.code_generation_register.GenerateCodeRegister()
+    generator.generate_code(ast, True)
+    code = LoopInvariantCodeMotion().hoist_invariants(generator.get_code(True), True)
+
+    if reducer is not None:
+        code = reducer.reduce_strength(code, True)
+
+    code = src.phase.allocator.Allocator().perform_register_allocation(code, True)
+    return src.phase.emit.Emit().emit(code)
+
+
+def arithmetic(assembly: str) -> int:
+    return sum(line.split()[:1] in (["imulq"], ["idivq"]) for line in assembly.splitlines())
+
+
+def main(runs: int) -> None:
+    corpus = []
+    for path in sorted(glob.glob("testing/test-cases/*.panda")):
+        with open(path) as f:
+            program = f.read()
+        try:
+            with redirect_stderr(io.StringIO()):
+                resolve(program)
+        except SystemExit:
+            continue # programs rejected by the compiler
+        corpus.append(program)
+
+    reducer = StrengthReducer()
+    before = [assemble(program, None) for program in corpus]
+    after = [assemble(program, reducer) for program in corpus]
+    print(f"corpus ({len(corpus)}), instructions {sum(count(a)[0] for a in before)} -> {sum(count(a)[0] for a in after)}, "
+          f"imulq/idivq {sum(map(arithmetic, before))} -> {sum(map(arithmetic, after))}")
+    print(", ".join(f"{kind} {number}" for kind, number in reducer.reduced.items()))
+    print()
+
+    print(f"{'program':>16}{'instructions':>14}{'after':>8}{'mul/div':>9}{'after':>8}{'runtime (ms)':>14}{'after':>8}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, program in [("induction 1e7", induction_loop(10000000)),
+                              ("nested 3000", nested_loops(3000))]:
+            before, after = assemble(program, None), assemble(program, StrengthReducer())
+            print(f"{name:>16}{count(before)[0]:>14}{count(after)[0]:>8}{arithmetic(before):>9}{arithmetic(after):>8}"
+                  f"{measure(before, directory, runs):>14.1f}{measure(after, directory, runs):>8.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,62 @@
+"""
+Symbol lookup on deeply nested scopes.
+
+Compares walking the scope chain with `SymbolTable.lookup`, the previous
+implementation which always walked to the root, and the bindings
+installed by `ASTSymbolResolver`.
+
+    Compiler$ python3.10 -m testing.benchmark.symbol_lookup [depth ...]
+"""
+
+import sys
+import timeit
+
+from src.dataclass.symbol import Symbol, SymbolTable
+from src.enums.symbols_enum import NameCategory
+from src.phase.symbol_resolution import ASTSymbolResolver
+
+
+def _eager_lookup(table: SymbolTable, signature: str) -> tuple:
+    # The lookup before symbol resolution, kept for comparison
+    if table.parent:
+        symval = (table._tab.get(signature, _eager_lookup(table.parent, signature)),
+                  table.level)
+        return symval if isinstance(symval[0], Symbol) else symval[0]
+    return (table._tab.get(signature), table.level)
+
+
+def _scope_chain(depth: int) -> list[SymbolTable]:
+    tables = [SymbolTable(None)]
+    tables[0].insert("a", Symbol("int", NameCategory.VARIABLE, 0), 0)
+    for i in range(depth):
+        tables.append(SymbolTable(tables[-1]))
+        tables[-1].insert(f"v{i}", Symbol("int", NameCategory.VARIABLE, 0), 0)
+    return tables
+
+
+def _ns_per_lookup(statement, number: int) -> float:
+    return 1e9 * min(timeit.repeat(statement, number=number, repeat=5)) / number
+
+
+def main(depths: list[int]) -> None:
+    number = 2000
+
+    print(f"{'depth':>6}{'eager (ns)':>14}{'walk (ns)':>14}{'bound (ns)':>14}")
+
+    for depth in depths:
+        tables = _scope_chain(depth)
+        innermost = tables[-1]
+
+        resolver = ASTSymbolResolver()
+        for table in tables:
+            resolver._enter_scope(table)
+
+        eager = _ns_per_lookup(lambda: _eager_lookup(innermost, "a"), number)
+        walk = _ns_per_lookup(lambda: innermost.lookup("a"), number)
+        bound = _ns_per_lookup(lambda: resolver._visible["a"][-1], number)
+
+        print(f"{depth:>6}{eager:>14.0f}{walk:>14.0f}{bound:>14.0f}")
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or [1, 4, 16, 64, 256])
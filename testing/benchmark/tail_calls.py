@@ -0,0 +1,49 @@
+"""
+Self-recursive calls in tail position, which jump back into the frame
+of the caller, versus the same recursion with the call in a sum, in
+register and stack mode.
+
+Runtime is the best wall time of the generated executables, or
+overflow if they are killed, since the recursion exceeds the stack.
+
+    Compiler$ python3.10 -m testing.benchmark.tail_calls [runs]
+"""
+
+import subprocess
+import sys
+import tempfile
+import time
+
+from testing.benchmark.allocators import build
+from testing.benchmark.programs import recursion
+
+
+def run(executable: str, runs: int) -> str:
+    best = float("inf")
+
+    for _ in range(runs):
+        start = time.perf_counter()
+        process = subprocess.run([executable], stdout=subprocess.DEVNULL)
+        best = min(best, time.perf_counter() - start)
+
+        if process.returncode < 0:
+            return "overflow"
+
+    return f"{1000 * best:.1f}"
+
+
+def main(runs: int) -> None:
+    print("runtime (ms)")
+    print(f"{'program':>22}{'register call':>16}{'tail':>10}{'stack call':>16}{'tail':>10}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for depth, repeat in [(100, 30000), (10000, 300), (1000000, 3)]:
+            timings = [run(build(recursion(depth, repeat, tail), directory, f"sum_{tail:d}",
+                                 "graph-coloring", stack=stack), runs)
+                       for stack in (False, True) for tail in (False, True)]
+            print(f"{f'depth {depth} x {repeat}':>22}" +
+                  "".join(f"{call:>16}{tail:>10}" for call, tail in zip(timings[::2], timings[1::2])))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)